@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark harness: เวลาของแต่ละ stage ของ etl_pipeline และ guess_column_types บนข้อมูล LoanStats สังเคราะห์หลายขนาด
+
+ไฟล์ข้อมูลสร้างด้วย etl_datagen (เก็บไว้ใน --data-dir เพื่อใช้ซ้ำ) แล้วรัน pipeline ถึง load เข้า SQLite ชั่วคราว
+ผลถูกเทียบกับ baseline JSON: stage ที่ช้ากว่า baseline เกิน --tolerance (และเกิน --min-seconds) ถูกรายงานเป็น regression
+และ exit code เป็น 1 baseline ผูกกับเครื่อง (host + จำนวน CPU) จึงไม่ถูก commit: แต่ละ agent บันทึกของตัวเองไว้ใน
+benchmarks/baselines/<host>-<cpus>cpu.json และการเทียบถูกข้ามเมื่อ baseline มาจากเครื่องอื่น
+
+Usage:
+    python benchmarks/bench_pipeline.py                                  # 10K, 100K, 1M rows vs baseline
+    python benchmarks/bench_pipeline.py --scales 10000 100000 --save-baseline   # this agent's baseline
+    python benchmarks/bench_pipeline.py --scales 50000000 --no-load --skip-full-guess
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_datagen  # noqa: E402
+import etl_main  # noqa: E402
+import etl_metrics  # noqa: E402
+import etl_pipeline  # noqa: E402
+
+DEFAULT_SCALES = [10000, 100000, 1000000]
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+# guess_column_types() without sampling reads the whole file into memory
+FULL_GUESS_MAX_ROWS = 5000000
+
+
+def machine_info():
+    return {'host': platform.node(), 'cpu_count': os.cpu_count(), 'python': platform.python_version(),
+            'pandas': pd.__version__, 'platform': platform.platform()}
+
+
+def default_baseline_path(machine):
+    return os.path.join(BASELINE_DIR, f"{machine['host'] or 'unknown'}-{machine['cpu_count']}cpu.json")
+
+
+def same_machine(baseline, machine):
+    # Timings only compare on the host and CPU count they were recorded with
+    recorded = baseline.get('machine', {})
+    return all(recorded.get(key) == machine[key] for key in ('host', 'cpu_count'))
+
+
+def dataset_path(data_dir, rows, seed=0):
+    path = os.path.join(data_dir, f'loanstats_{rows}_{seed}.csv')
+    if not os.path.exists(path):
+        print(f"Generating {rows:,} rows -> {path}")
+        etl_datagen.write_loanstats_csv(path, rows, seed)
+    return path
+
+
+def bench_config(path, work_dir):
+    # Every run parses and profiles from scratch and loads into its own SQLite file
+    config = etl_main.load_config()
+    config.setdefault('data_sources', {})['primary'] = {'file_path': path, 'delimiter': ',', 'has_headers': True}
+    etl = config.setdefault('etl', {})
+    etl['staging_cache'] = {'enabled': False}
+    etl['profiling'] = {'output_path': ''}
+    etl['surrogate_keys'] = {}
+    etl['data_quality'] = dict(etl.get('data_quality', {}),
+                               quarantine_path=os.path.join(work_dir, 'rejects.csv'))
+    return config
+
+
+def run_scale(path, rows, work_dir, load=True, full_guess=True):
+    """
+    One measurement of every stage at one scale: {stage: seconds}.
+    """
+    timings = {}
+    if full_guess:
+        start = time.perf_counter()
+        result, _ = etl_main.guess_column_types(path)
+        timings['guess_column_types'] = time.perf_counter() - start
+        if not result:
+            raise RuntimeError(f"guess_column_types failed on {path}")
+
+    metrics = etl_metrics.PipelineMetrics()
+    engine = None
+    if load:
+        # The parallel loader writes from several threads; SQLite serializes them, so wait instead of failing
+        engine = create_engine(f"sqlite:///{os.path.join(work_dir, 'warehouse.db')}", connect_args={'timeout': 300})
+    pipeline = etl_pipeline.Pipeline(bench_config(path, work_dir), metrics=metrics, engine=engine)
+    try:
+        pipeline.get('load' if load else 'fact')
+    finally:
+        if engine is not None:
+            engine.dispose()
+    for record in metrics.stages:
+        timings[record['stage']] = record['wall_seconds']
+    timings['pipeline_total'] = sum(record['wall_seconds'] for record in metrics.stages)
+    return timings
+
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.05):
+    """
+    Regressions of results against baseline: (scale, stage, baseline seconds, current seconds).
+
+    A stage regresses when it is more than tolerance slower and the difference exceeds min_seconds,
+    so millisecond-level noise on small scales is not reported.
+    """
+    regressions = []
+    for scale, stages in results['scales'].items():
+        reference = baseline.get('scales', {}).get(scale, {})
+        for stage, seconds in stages.items():
+            before = reference.get(stage)
+            if before is not None and seconds > before * (1 + tolerance) and seconds - before > min_seconds:
+                regressions.append((scale, stage, before, seconds))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    lines = []
+    for scale, stages in results['scales'].items():
+        rows = int(scale)
+        reference = (baseline or {}).get('scales', {}).get(scale, {})
+        lines.append(f"{rows:,} rows")
+        for stage, seconds in stages.items():
+            line = f"   {stage:<20} {seconds:8.3f}s {rows / seconds if seconds else 0:12,.0f} rows/s"
+            if reference.get(stage):
+                line += f"   baseline {reference[stage]:8.3f}s ({seconds / reference[stage]:.2f}x)"
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES)
+    parser.add_argument('--repeat', type=int, default=1, help='runs per scale; the fastest run is kept')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'etl_bench_data'))
+    parser.add_argument('--baseline', help='baseline JSON (default: benchmarks/baselines/<host>-<cpus>cpu.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='write these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--min-seconds', type=float, default=0.05)
+    parser.add_argument('--no-load', action='store_true', help='stop after the fact build (no database load)')
+    parser.add_argument('--skip-full-guess', action='store_true',
+                        help=f'skip full-file guess_column_types (always skipped above {FULL_GUESS_MAX_ROWS:,} rows)')
+    args = parser.parse_args(argv)
+
+    results = {'machine': machine_info(), 'scales': {}}
+    baseline_path = args.baseline or default_baseline_path(results['machine'])
+    for rows in args.scales:
+        path = dataset_path(args.data_dir, rows)
+        best = {}
+        for _ in range(args.repeat):
+            work_dir = tempfile.mkdtemp()
+            try:
+                timings = run_scale(path, rows, work_dir, load=not args.no_load,
+                                    full_guess=not args.skip_full_guess and rows <= FULL_GUESS_MAX_ROWS)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            best = {stage: min(seconds, best.get(stage, seconds)) for stage, seconds in timings.items()}
+        results['scales'][str(rows)] = {stage: round(seconds, 4) for stage, seconds in best.items()}
+
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not args.save_baseline and not same_machine(baseline, results['machine']):
+            recorded = baseline.get('machine', {})
+            print(format_results(results))
+            print(f"ℹ️  {baseline_path} was recorded on {recorded.get('host')} with {recorded.get('cpu_count')} CPUs, "
+                  f"not {results['machine']['host']} with {results['machine']['cpu_count']}; skipping the comparison")
+            return 0
+    print(format_results(results, baseline))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline written to {baseline_path}")
+        return 0
+    if baseline is None:
+        print(f"ℹ️  No baseline for this machine at {baseline_path}; run with --save-baseline to record one")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+    for scale, stage, before, seconds in regressions:
+        ratio = f" ({seconds / before:.2f}x)" if before else ''
+        print(f"❌ Regression at {int(scale):,} rows: {stage} {before:.3f}s -> {seconds:.3f}s{ratio}")
+    if regressions:
+        return 1
+    print(f"✅ No regressions beyond {args.tolerance:.0%} of {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark: throughput ของ etl_sources.read_sources เทียบจำนวน worker process
+
+Usage:
+    python benchmarks/bench_sources.py --rows 2000000 --columns 30 --workers 1 2 4 8
+    python benchmarks/bench_sources.py --csv "data/LoanStats_*.csv" --split-mb 64
+
+Speedup is reported against the smallest worker count on the same split plan; it can only approach
+the worker count on a machine with at least that many free cores.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_sources  # noqa: E402
+from bench_type_inference import write_synthetic_csv  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--columns', type=int, default=30)
+    parser.add_argument('--csv', help='reuse existing CSV files (path or glob) instead of generating one')
+    parser.add_argument('--split-mb', type=float, default=32)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args(argv)
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        sources = args.csv
+        if sources is None:
+            sources = os.path.join(tmp_dir, 'synthetic.csv')
+            print(f"Generating {args.rows:,} rows x {args.columns} columns...")
+            write_synthetic_csv(sources, args.rows, args.columns)
+        files = etl_sources.resolve_sources(sources)
+        total_mb = sum(os.path.getsize(path) for path in files) / 1024 ** 2
+        split_bytes = int(args.split_mb * 1024 ** 2)
+        tasks = etl_sources.plan_tasks(files, split_bytes=split_bytes)
+        print(f"{len(files)} files, {total_mb:,.1f} MB, {len(tasks)} parse tasks, {os.cpu_count()} CPU cores")
+
+        start = time.perf_counter()
+        rows = len(pd.concat([pd.read_csv(path, low_memory=False) for path in files], ignore_index=True))
+        baseline = time.perf_counter() - start
+        print(f"pd.read_csv        : {baseline:8.2f}s {total_mb / baseline:8.1f} MB/s")
+
+        single = None
+        counts = sorted(set(args.workers))
+        for workers in counts:
+            start = time.perf_counter()
+            df = etl_sources.read_sources(files, workers=workers, split_bytes=split_bytes)
+            seconds = time.perf_counter() - start
+            single = single or seconds
+            if len(df) != rows:
+                print(f"❌ {workers} workers returned {len(df):,} rows, expected {rows:,}")
+                return 1
+            print(f"{workers:>2} workers         : {seconds:8.2f}s {total_mb / seconds:8.1f} MB/s "
+                  f"({single / seconds:.2f}x vs {counts[0]} worker(s))")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Summary tables ของ vw_loan_summary / vw_monthly_trends ที่คำนวณระหว่าง ETL
+
+aggregates คำนวณจาก fact table ที่อยู่ใน memory อยู่แล้ว: FK ids ถูก factorize เป็น integer codes
+แล้วทุก measure เป็น reduceat บนแถวที่ sort ตาม group ครั้งเดียว ผลถูกเก็บใน agg_loan_summary และ
+agg_monthly_trends (grain มีเดือนของ issue_d เสมอ จึง refresh ทีละเดือนได้) ส่วนคอลัมน์ที่เป็น window
+ข้ามเดือน (loan_percentage, *_change) อยู่ใน views vw_loan_summary_agg / vw_monthly_trends_agg
+
+check_against_views() เทียบกับ SQL เทียบเท่า view ใน sql/create_star_schema.sql บน SQLite stand-in
+
+Usage:
+    python etl_aggregates.py --url sqlite:///warehouse.db      # consistency check
+"""
+
+import argparse
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+
+import etl_db
+import etl_dtypes
+import etl_loader
+
+SUMMARY_TABLE = 'agg_loan_summary'
+TRENDS_TABLE = 'agg_monthly_trends'
+SUMMARY_TABLES = (SUMMARY_TABLE, TRENDS_TABLE)
+SUMMARY_VIEW = 'vw_loan_summary_agg'
+TRENDS_VIEW = 'vw_monthly_trends_agg'
+
+CALENDAR_COLUMNS = ['issue_month', 'year', 'quarter', 'month', 'fiscal_year', 'fiscal_quarter']
+SUMMARY_KEYS = ['home_ownership', 'loan_status', 'year', 'month']
+TRENDS_KEYS = ['year', 'month']
+
+VIEW_DEFINITIONS = {
+    SUMMARY_VIEW: f"""
+SELECT s.*, s.loan_count * 1.0 / SUM(s.loan_count) OVER () AS loan_percentage
+FROM {SUMMARY_TABLE} s""",
+    TRENDS_VIEW: f"""
+SELECT t.*,
+    t.loan_count - LAG(t.loan_count) OVER (ORDER BY t.year, t.month) AS loan_count_change,
+    t.total_volume - LAG(t.total_volume) OVER (ORDER BY t.year, t.month) AS volume_change,
+    t.avg_rate - LAG(t.avg_rate) OVER (ORDER BY t.year, t.month) AS rate_change
+FROM {TRENDS_TABLE} t""",
+}
+
+# vw_loan_summary and vw_monthly_trends of sql/create_star_schema.sql for the columns the ETL loads,
+# in SQL that SQLite runs: computed columns inlined, STDEV from deviations to the group mean (a window AVG)
+_GROUP = 'PARTITION BY h.home_ownership, s.loan_status, d.year, d.month'
+REFERENCE_QUERIES = {
+    SUMMARY_VIEW: f"""
+WITH f AS (
+    SELECT h.home_ownership, s.loan_status, d.year, d.month,
+        f.loan_amnt, f.funded_amnt, f.int_rate, f.installment,
+        f.loan_amnt - AVG(f.loan_amnt) OVER ({_GROUP}) AS loan_amnt_deviation,
+        f.int_rate - AVG(f.int_rate) OVER ({_GROUP}) AS int_rate_deviation
+    FROM loans_fact f
+    JOIN home_ownership_dim h ON f.home_ownership_id = h.home_ownership_id
+    JOIN loan_status_dim s ON f.loan_status_id = s.loan_status_id
+    JOIN issue_d_dim d ON f.issue_d_id = d.issue_d_id
+)
+SELECT f.home_ownership, f.loan_status, f.year, f.month,
+    COUNT(*) AS loan_count,
+    COUNT(*) * 1.0 / SUM(COUNT(*)) OVER () AS loan_percentage,
+    SUM(f.loan_amnt) AS total_loan_amount,
+    SUM(f.funded_amnt) AS total_funded_amount,
+    AVG(f.loan_amnt) AS avg_loan_amount,
+    AVG(f.funded_amnt) AS avg_funded_amount,
+    MIN(f.loan_amnt) AS min_loan_amount,
+    MAX(f.loan_amnt) AS max_loan_amount,
+    sqrt(SUM(f.loan_amnt_deviation * f.loan_amnt_deviation) / (COUNT(*) - 1)) AS stddev_loan_amount,
+    AVG(f.int_rate) AS avg_interest_rate,
+    MIN(f.int_rate) AS min_interest_rate,
+    MAX(f.int_rate) AS max_interest_rate,
+    sqrt(SUM(f.int_rate_deviation * f.int_rate_deviation) / (COUNT(*) - 1)) AS stddev_interest_rate,
+    SUM(f.installment) AS total_monthly_payment,
+    AVG(f.installment) AS avg_monthly_payment,
+    SUM(f.installment * 12) AS total_annual_payment,
+    AVG(f.funded_amnt * 1.0 / NULLIF(f.loan_amnt, 0)) AS avg_funding_ratio,
+    SUM(CASE WHEN f.funded_amnt * 1.0 / NULLIF(f.loan_amnt, 0) = 1 THEN 1 ELSE 0 END) AS fully_funded_count,
+    AVG(f.installment * 1.0 / NULLIF(f.loan_amnt, 0)) AS avg_payment_to_loan_ratio
+FROM f
+GROUP BY f.home_ownership, f.loan_status, f.year, f.month""",
+    TRENDS_VIEW: """
+SELECT d.year, d.month,
+    COUNT(*) AS loan_count,
+    COUNT(*) - LAG(COUNT(*)) OVER (ORDER BY d.year, d.month) AS loan_count_change,
+    SUM(f.loan_amnt) AS total_volume,
+    AVG(f.loan_amnt) AS avg_loan_size,
+    SUM(f.loan_amnt) - LAG(SUM(f.loan_amnt)) OVER (ORDER BY d.year, d.month) AS volume_change,
+    AVG(f.int_rate) AS avg_rate,
+    AVG(f.int_rate) - LAG(AVG(f.int_rate)) OVER (ORDER BY d.year, d.month) AS rate_change,
+    COUNT(CASE WHEN h.home_ownership = 'RENT' THEN 1 END) AS rent_count,
+    COUNT(CASE WHEN h.home_ownership = 'OWN' THEN 1 END) AS own_count,
+    COUNT(CASE WHEN h.home_ownership = 'MORTGAGE' THEN 1 END) AS mortgage_count
+FROM loans_fact f
+JOIN home_ownership_dim h ON f.home_ownership_id = h.home_ownership_id
+JOIN loan_status_dim s ON f.loan_status_id = s.loan_status_id
+JOIN issue_d_dim d ON f.issue_d_id = d.issue_d_id
+GROUP BY d.year, d.month""",
+}
+
+
+### Grouped measures ###
+
+class _Groups:
+    """Rows sorted by group code once; each measure is a reduceat over the contiguous runs"""
+
+    def __init__(self, codes):
+        self.order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[self.order]
+        self.starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])[:len(codes)]
+        self.codes = sorted_codes[self.starts]
+        self.counts = np.diff(np.r_[self.starts, len(codes)])
+
+    def _reduce(self, ufunc, values):
+        values = np.asarray(values)[self.order]
+        return ufunc.reduceat(values, self.starts) if len(self.starts) else values[:0]
+
+    def sum(self, values):
+        return self._reduce(np.add, np.asarray(values, dtype=float))
+
+    def mean(self, values):
+        # NaN (SQL NULL) rows are left out, as AVG() does
+        values = np.asarray(values, dtype=float)
+        present = ~np.isnan(values)
+        totals = self._reduce(np.add, np.where(present, values, 0.0))
+        counts = self._reduce(np.add, present.astype(np.int64))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / counts, np.nan)
+
+    def min(self, values):
+        return self._reduce(np.minimum, np.asarray(values, dtype=float))
+
+    def max(self, values):
+        return self._reduce(np.maximum, np.asarray(values, dtype=float))
+
+    def std(self, values):
+        # Sample standard deviation (STDEV) from deviations to the group mean; NULL for single-row groups
+        values = np.asarray(values, dtype=float)
+        means = np.repeat(self.sum(values) / np.maximum(self.counts, 1), self.counts)
+        deviations = np.empty_like(values)
+        deviations[self.order] = values[self.order] - means
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.counts > 1, np.sqrt(self.sum(deviations ** 2) / (self.counts - 1)), np.nan)
+
+    def count_where(self, mask):
+        return self._reduce(np.add, np.asarray(mask, dtype=np.int64))
+
+
+def _member_labels(dim, column, ids):
+    # Dimension value for each surrogate id
+    return dim[column].to_numpy()[pd.Index(dim[f'{column}_id']).get_indexer(ids)]
+
+
+def _calendar(year, month):
+    # Attributes of the issue_d_dim computed columns; fiscal years start in April
+    year, month = np.asarray(year, dtype=np.int64), np.asarray(month, dtype=np.int64)
+    return pd.DataFrame({
+        'issue_month': [f'{y:04d}-{m:02d}' for y, m in zip(year, month)],
+        'year': year,
+        'quarter': (month - 1) // 3 + 1,
+        'month': month,
+        'fiscal_year': np.where(month >= 4, year, year - 1),
+        'fiscal_quarter': (month - 4) % 12 // 3 + 1,
+    })
+
+
+def summarize(loans_fact, dimensions):
+    """
+    {agg_loan_summary: frame, agg_monthly_trends: frame} from the fact table and its dimensions.
+
+    Groups are built from the integer FK codes; the dimension values are only looked up once per group.
+    """
+    issue_d_dim = dimensions['issue_d_dim']
+    positions = pd.Index(issue_d_dim['issue_d_id']).get_indexer(loans_fact['issue_d_id'])
+    dim_months = (issue_d_dim['year'].to_numpy(dtype=np.int64) * 12 + issue_d_dim['month'].to_numpy(dtype=np.int64)
+                  - 1)
+    month_codes, months = pd.factorize(dim_months[positions])
+    home_codes, home_ids = pd.factorize(loans_fact['home_ownership_id'])
+    status_codes, status_ids = pd.factorize(loans_fact['loan_status_id'])
+
+    loan_amnt, funded_amnt, int_rate, installment = (
+        # Downcast float32 measures as the decimals the fact table holds
+        etl_dtypes.exact_float64(loans_fact[column].to_numpy()) if loans_fact[column].dtype == np.float32
+        else loans_fact[column].to_numpy(dtype=float, na_value=np.nan)
+        for column in ('loan_amnt', 'funded_amnt', 'int_rate', 'installment'))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        funding_ratio = np.where(loan_amnt != 0, funded_amnt / loan_amnt, np.nan)
+        payment_ratio = np.where(loan_amnt != 0, installment / loan_amnt, np.nan)
+
+    keys = (month_codes.astype(np.int64) * len(home_ids) + home_codes) * len(status_ids) + status_codes
+    groups = _Groups(keys)
+    group_months = months[groups.codes // (len(home_ids) * len(status_ids))]
+    group_homes = home_ids[groups.codes // len(status_ids) % len(home_ids)]
+    group_statuses = status_ids[groups.codes % len(status_ids)]
+    summary = _calendar(group_months // 12, group_months % 12 + 1)
+    summary['home_ownership'] = _member_labels(dimensions['home_ownership_dim'], 'home_ownership', group_homes)
+    summary['loan_status'] = _member_labels(dimensions['loan_status_dim'], 'loan_status', group_statuses)
+    summary = summary.assign(
+        loan_count=groups.counts,
+        total_loan_amount=groups.sum(loan_amnt),
+        total_funded_amount=groups.sum(funded_amnt),
+        avg_loan_amount=groups.mean(loan_amnt),
+        avg_funded_amount=groups.mean(funded_amnt),
+        min_loan_amount=groups.min(loan_amnt),
+        max_loan_amount=groups.max(loan_amnt),
+        stddev_loan_amount=groups.std(loan_amnt),
+        avg_interest_rate=groups.mean(int_rate),
+        min_interest_rate=groups.min(int_rate),
+        max_interest_rate=groups.max(int_rate),
+        stddev_interest_rate=groups.std(int_rate),
+        total_monthly_payment=groups.sum(installment),
+        avg_monthly_payment=groups.mean(installment),
+        total_annual_payment=groups.sum(installment * 12),
+        avg_funding_ratio=groups.mean(funding_ratio),
+        fully_funded_count=groups.count_where(funding_ratio == 1),
+        avg_payment_to_loan_ratio=groups.mean(payment_ratio),
+    )
+
+    homes = _member_labels(dimensions['home_ownership_dim'], 'home_ownership', home_ids)[home_codes]
+    groups = _Groups(month_codes)
+    trends = _calendar(months[groups.codes] // 12, months[groups.codes] % 12 + 1).assign(
+        loan_count=groups.counts,
+        total_volume=groups.sum(loan_amnt),
+        avg_loan_size=groups.mean(loan_amnt),
+        avg_rate=groups.mean(int_rate),
+        rent_count=groups.count_where(homes == 'RENT'),
+        own_count=groups.count_where(homes == 'OWN'),
+        mortgage_count=groups.count_where(homes == 'MORTGAGE'),
+    )
+    return {
+        SUMMARY_TABLE: summary.sort_values(['issue_month', 'home_ownership', 'loan_status'], ignore_index=True),
+        TRENDS_TABLE: trends.sort_values('issue_month', ignore_index=True),
+    }
+
+
+### Database ###
+
+def _quote(engine, name):
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def summarize_warehouse(engine):
+    """
+    summarize() over the star schema already in the database, reading loans_fact one issue month at a time.
+
+    For loads that never hold the whole fact table in memory (streaming mode).
+    """
+    dimensions = {name: pd.read_sql(f'SELECT * FROM {_quote(engine, name)}', engine)
+                  for name in ('issue_d_dim', 'home_ownership_dim', 'loan_status_dim')}
+    issue_d_dim = dimensions['issue_d_dim']
+    columns = ', '.join(_quote(engine, column) for column in (
+        'issue_d_id', 'home_ownership_id', 'loan_status_id', 'loan_amnt', 'funded_amnt', 'int_rate', 'installment'))
+    query = text(f'SELECT {columns} FROM loans_fact WHERE issue_d_id IN :ids').bindparams(
+        bindparam('ids', expanding=True))
+    parts = []
+    for _, ids in issue_d_dim.groupby(['year', 'month'])['issue_d_id']:
+        loans_fact = pd.read_sql(query, engine, params={'ids': [int(i) for i in ids]})
+        if len(loans_fact):
+            parts.append(summarize(loans_fact, dimensions))
+    if not parts:
+        return summarize(pd.read_sql(query, engine, params={'ids': [-1]}), dimensions)
+    return {
+        SUMMARY_TABLE: pd.concat([part[SUMMARY_TABLE] for part in parts], ignore_index=True).sort_values(
+            ['issue_month', 'home_ownership', 'loan_status'], ignore_index=True),
+        TRENDS_TABLE: pd.concat([part[TRENDS_TABLE] for part in parts], ignore_index=True).sort_values(
+            'issue_month', ignore_index=True),
+    }
+
+
+def create_summary_views(engine):
+    # The window columns span months, so they are computed over the (small) summary tables at query time
+    with engine.begin() as connection:
+        for view, definition in VIEW_DEFINITIONS.items():
+            connection.exec_driver_sql(f'DROP VIEW IF EXISTS {_quote(engine, view)}')
+            connection.exec_driver_sql(f'CREATE VIEW {_quote(engine, view)} AS {definition}')
+
+
+def refresh_summary_tables(engine, summaries, months=None, method='multi_values'):
+    """
+    Write the summary tables; months=None replaces every month, otherwise only those issue months
+    ('YYYY-MM', including months that no longer have rows) are replaced.
+
+    Each table is refreshed in one transaction, so readers see either the old or the new months.
+    Returns {table: rows written}.
+    """
+    written = {}
+    for table, frame in summaries.items():
+        if months is not None:
+            frame = frame[frame['issue_month'].isin(months)]
+        if (not inspect(engine).has_table(table)
+                or etl_db.table_columns(engine, table) != list(frame.columns)):
+            etl_loader.create_table(frame, table, engine)
+        with engine.begin() as connection:
+            if months is None:
+                connection.execute(text(f'DELETE FROM {_quote(engine, table)}'))
+            elif months:
+                connection.execute(text(f'DELETE FROM {_quote(engine, table)} WHERE issue_month IN :months')
+                                   .bindparams(bindparam('months', expanding=True)), {'months': list(months)})
+            if len(frame):
+                etl_loader.insert_batch(connection, frame, table, engine, method)
+        written[table] = len(frame)
+    create_summary_views(engine)
+    return written
+
+
+def check_against_views(engine, rtol=1e-6):
+    """
+    Compare the summary views with the star schema view definitions computed over the loaded tables.
+
+    Returns {view: {'rows': int, 'mismatches': [description]}}; no mismatches means consistent.
+    """
+    results = {}
+    with engine.connect() as connection:
+        if engine.dialect.name == 'sqlite':
+            # STDEV is expressed with sqrt(), which older SQLite builds lack
+            connection.connection.driver_connection.create_function('sqrt', 1, sql_sqrt)
+        for view, keys in ((SUMMARY_VIEW, SUMMARY_KEYS), (TRENDS_VIEW, TRENDS_KEYS)):
+            expected = pd.read_sql(text(REFERENCE_QUERIES[view]), connection)
+            actual = pd.read_sql(text(f'SELECT * FROM {_quote(engine, view)}'), connection)
+            merged = expected.merge(actual, on=keys, how='outer', suffixes=('_view', '_agg'), indicator=True)
+            mismatches = [f"{dict(zip(keys, row))} only in {'view' if side == 'left_only' else 'summary'}"
+                          for *row, side in merged.loc[merged['_merge'] != 'both', keys + ['_merge']].itertuples(
+                              index=False)]
+            both = merged[merged['_merge'] == 'both']
+            for column in expected.columns.difference(keys):
+                left = both[f'{column}_view'].to_numpy(dtype=float, na_value=np.nan)
+                right = both[f'{column}_agg'].to_numpy(dtype=float, na_value=np.nan)
+                # Tolerance relative to the column's magnitude, so near-zero deviations are not flagged
+                scale = np.nanmax(np.abs(left), initial=0.0)
+                differs = ~np.isclose(left, right, rtol=rtol, atol=rtol * scale, equal_nan=True)
+                if differs.any():
+                    mismatches.append(f"{column}: {int(differs.sum())} groups differ")
+            results[view] = {'rows': len(expected), 'mismatches': mismatches}
+    return results
+
+
+def sql_sqrt(value):
+    return math.sqrt(max(value, 0.0)) if value is not None else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the summary tables against the star schema views')
+    parser.add_argument('--env', default=None, help='database.yaml environment')
+    parser.add_argument('--url', default=None, help='database URL (e.g. sqlite:///warehouse.db)')
+    parser.add_argument('--rtol', type=float, default=1e-6)
+    args = parser.parse_args(argv)
+
+    engine = etl_db.create_db_engine(args.env, url=args.url)
+    results = check_against_views(engine, args.rtol)
+    for view, result in results.items():
+        status = '✅' if not result['mismatches'] else '❌'
+        print(f"{status} {view}: {result['rows']:,} groups, {len(result['mismatches'])} mismatches")
+        for mismatch in result['mismatches'][:20]:
+            print(f"   {mismatch}")
+    return 1 if any(result['mismatches'] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
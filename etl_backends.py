@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Load targets ของ warehouse: SQL Server (mssql+pymssql) หรือ embedded database ในไฟล์เดียว (SQLite, DuckDB)
+
+embedded backend รัน ETL ครบทุก step บนเครื่อง dev / CI โดยไม่ต้องต่อ server และใช้ benchmark load methods ได้
+DuckDB รับ dimension / fact frames เป็น Arrow table ที่ register ไว้ แล้ว INSERT ... SELECT จาก buffers โดยตรง
+(load method 'arrow' ไม่แปลงค่าเป็น Python objects ทีละแถว) ส่วน SQLite ไม่มี Arrow API จึงใช้ executemany
+vw_loan_summary / vw_monthly_trends สร้างจาก etl_aggregates.REFERENCE_QUERIES ซึ่งเป็น SQL เทียบเท่า view ใน DDL
+
+Usage:
+    python etl_main.py --backend sqlite        # output/warehouse.db
+    python etl_main.py --backend duckdb        # output/warehouse.duckdb (pip install duckdb duckdb-engine)
+    ETL_ENV=local python etl_main.py           # database.yaml environment with backend: sqlite
+"""
+
+import os
+
+from sqlalchemy import event
+
+import etl_aggregates
+import etl_dtypes
+
+try:
+    import duckdb
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - DuckDB backend is optional
+    duckdb = None
+    pa = None
+
+# vw_loan_summary / vw_monthly_trends of sql/create_star_schema.sql, over the columns the ETL loads
+VIEWS = {
+    'vw_loan_summary': etl_aggregates.REFERENCE_QUERIES[etl_aggregates.SUMMARY_VIEW],
+    'vw_monthly_trends': etl_aggregates.REFERENCE_QUERIES[etl_aggregates.TRENDS_VIEW],
+}
+
+# Name the Arrow table is registered under for the duration of one INSERT ... SELECT
+INGEST_RELATION = 'etl_arrow_ingest'
+
+
+def _quote(engine, name):
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def arrow_table(df):
+    # Downcast columns widened first, so DECIMAL values are inserted as their decimal value (etl_dtypes)
+    return pa.Table.from_pandas(etl_dtypes.widen_frame(df), preserve_index=False)
+
+
+class Backend:
+    """Server target: the star schema DDL owns the tables' indexes and the views"""
+
+    name = 'mssql'
+    embedded = False
+    # ingest() reads the frame's Arrow buffers instead of binding Python values per row
+    zero_copy = False
+
+    def prepare(self, engine):
+        return engine
+
+    def ingest(self, connection, df, table_name):
+        raise NotImplementedError(f"{self.name} has no Arrow ingestion")
+
+    def create_views(self, engine):
+        return []
+
+
+class EmbeddedBackend(Backend):
+    """Single-file warehouse that the ETL creates itself, views included"""
+
+    embedded = True
+    default_path = None
+
+    def url(self, path=None):
+        path = path or self.default_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return f'{self.name}:///{path}'
+
+    def create_views(self, engine):
+        # Views resolve the tables by name, so they survive replace and swap loads; recreated after each load
+        with engine.begin() as connection:
+            for view, query in VIEWS.items():
+                connection.exec_driver_sql(f'DROP VIEW IF EXISTS {_quote(engine, view)}')
+                connection.exec_driver_sql(f'CREATE VIEW {_quote(engine, view)} AS {query}')
+        return list(VIEWS)
+
+
+class SQLiteBackend(EmbeddedBackend):
+    name = 'sqlite'
+    default_path = 'output/warehouse.db'
+
+    def prepare(self, engine):
+        # The views' STDEV is expressed with sqrt(), which older SQLite builds lack
+        @event.listens_for(engine, 'connect')
+        def register_sqrt(dbapi_connection, connection_record):
+            dbapi_connection.create_function('sqrt', 1, etl_aggregates.sql_sqrt)
+        return engine
+
+
+class DuckDBBackend(EmbeddedBackend):
+    name = 'duckdb'
+    default_path = 'output/warehouse.duckdb'
+    zero_copy = True
+
+    def url(self, path=None):
+        if duckdb is None:
+            raise ImportError("The duckdb backend needs: pip install duckdb duckdb-engine pyarrow")
+        return super().url(path)
+
+    def ingest(self, connection, df, table_name):
+        # DuckDB scans the registered Arrow buffers in place, inside the caller's transaction
+        table = arrow_table(df)
+        engine = connection.engine
+        columns = ', '.join(_quote(engine, column) for column in table.column_names)
+        driver_connection = connection.connection.driver_connection
+        driver_connection.register(INGEST_RELATION, table)
+        try:
+            connection.exec_driver_sql(f'INSERT INTO {_quote(engine, table_name)} ({columns}) '
+                                       f'SELECT {columns} FROM {INGEST_RELATION}')
+        finally:
+            driver_connection.unregister(INGEST_RELATION)
+
+
+BACKENDS = {backend.name: backend for backend in (Backend(), SQLiteBackend(), DuckDBBackend())}
+EMBEDDED_BACKENDS = tuple(name for name, backend in BACKENDS.items() if backend.embedded)
+
+
+def get_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name} (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name]
+
+
+def backend_for(engine):
+    # Other SQLAlchemy dialects are loaded like the server target
+    return BACKENDS.get(engine.dialect.name, BACKENDS['mssql'])
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Columnar staging cache สำหรับไฟล์ CSV ต้นทาง (Arrow IPC / Feather v2 แบบไม่บีบอัด)
+
+CSV ถูก parse ครั้งเดียวต่อ (เนื้อหาไฟล์, read options) แล้วเก็บเป็น Arrow IPC file
+รอบถัดไป memory-map cache และแปลงเฉพาะคอลัมน์ที่ต้องการ แทนการ parse text ใหม่ทั้งไฟล์
+ไฟล์ที่ใช้ล่าสุดนานที่สุดถูกลบก่อนเมื่อขนาดรวมเกิน max_size_mb
+
+pyarrow เป็น optional dependency: ถ้าไม่ได้ติดตั้ง read_csv() จะอ่าน CSV ตรงๆ เหมือนเดิม
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - exercised only without pyarrow
+    pa = None
+    feather = None
+
+DEFAULT_CACHE_DIR = 'cache/staging'
+DEFAULT_MAX_SIZE_MB = 1024
+
+INDEX_FILE = 'index.json'
+HASH_BLOCK_SIZE = 8 * 1024 ** 2
+
+
+def file_digest(file_path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def options_digest(read_kwargs):
+    # usecols is applied on read, so every column subset shares one cache entry
+    options = {key: value for key, value in read_kwargs.items() if key != 'usecols'}
+    return hashlib.blake2b(json.dumps(options, sort_keys=True, default=str).encode(), digest_size=8).hexdigest()
+
+
+class StagingCache:
+    """Cache ของ CSV ที่ parse แล้ว keyed by content hash ของไฟล์ + read options"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 ** 2)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    @property
+    def available(self):
+        return pa is not None
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path()):
+            return {'sources': {}, 'entries': {}}
+        with open(self._index_path(), encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_index(self):
+        tmp_path = f'{self._index_path()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self._index_path())
+
+    def source_hash(self, file_path):
+        # The content hash is only recomputed when size or mtime changed since it was last taken
+        stat = os.stat(file_path)
+        source = self.index['sources'].get(os.path.abspath(file_path))
+        if source and source['size'] == stat.st_size and source['mtime_ns'] == stat.st_mtime_ns:
+            return source['hash']
+        digest = file_digest(file_path)
+        self.index['sources'][os.path.abspath(file_path)] = {
+            'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest}
+        return digest
+
+    def cache_key(self, file_path, read_kwargs):
+        return f'{self.source_hash(file_path)}-{options_digest(read_kwargs)}'
+
+    def read_csv(self, file_path, columns=None, refresh=False, **read_kwargs):
+        """
+        pd.read_csv(file_path, **read_kwargs) served from the columnar cache.
+
+        columns (or usecols in read_kwargs): only these columns are converted to pandas
+        refresh: re-parse the CSV and overwrite the cached copy
+        """
+        columns = columns if columns is not None else read_kwargs.get('usecols')
+        if not self.available:
+            df = pd.read_csv(file_path, **read_kwargs)
+            return df[list(columns)] if columns is not None else df
+
+        key = self.cache_key(file_path, read_kwargs)
+        entry = self.index['entries'].get(key)
+        path = os.path.join(self.cache_dir, f'{key}.arrow')
+        if entry and not refresh and os.path.exists(path):
+            self.hits += 1
+            entry['last_used'] = time.time()
+            self._save_index()
+            return self._read_arrow(path, columns)
+
+        self.misses += 1
+        full_kwargs = {key_: value for key_, value in read_kwargs.items() if key_ != 'usecols'}
+        df = pd.read_csv(file_path, **full_kwargs)
+        try:
+            feather.write_feather(df, path, compression='uncompressed')
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            # Mixed-type object columns cannot be stored as Arrow; serve this read uncached
+            print(f"⚠️  Staging cache skipped for {file_path}: {e}")
+            self._save_index()
+            return df[list(columns)] if columns is not None else df
+
+        self.index['entries'][key] = {
+            'source': os.path.abspath(file_path),
+            'bytes': os.path.getsize(path),
+            'created': time.time(),
+            'last_used': time.time(),
+        }
+        self.evict(keep=key)
+        self._save_index()
+        return df[list(columns)] if columns is not None else df
+
+    def _read_arrow(self, path, columns):
+        # Memory-mapped, so columns that are not selected are never read from disk
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns is not None:
+                table = table.select(list(columns))
+            return table.to_pandas()
+
+    def size_bytes(self):
+        return sum(entry['bytes'] for entry in self.index['entries'].values())
+
+    def evict(self, keep=None):
+        # Least recently used first until the cache fits; the entry just written always stays
+        evicted = []
+        entries = self.index['entries']
+        for key in sorted(entries, key=lambda name: entries[name]['last_used']):
+            if self.size_bytes() <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            path = os.path.join(self.cache_dir, f'{key}.arrow')
+            if os.path.exists(path):
+                os.remove(path)
+            del entries[key]
+            evicted.append(key)
+        return evicted
+
+    def clear(self):
+        for key in list(self.index['entries']):
+            path = os.path.join(self.cache_dir, f'{key}.arrow')
+            if os.path.exists(path):
+                os.remove(path)
+        self.index = {'sources': {}, 'entries': {}}
+        self._save_index()
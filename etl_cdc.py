@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Change data capture ของ loans_fact: hash 64-bit ต่อแถว เทียบกับ hash index ของรอบก่อน
+
+identity ของแถวคือ hash ของ key columns จาก source (เช่น id) หรือ hash ของทั้งแถวเมื่อไม่มี key
+index บน disk (.npy) เป็น array (identity, checksum, rows) เรียงตาม identity ไว้ 24 bytes ต่อ identity
+แถวใน database มี row_key (= identity) จึงลบ/เขียนใหม่เฉพาะแถวที่ inserted, changed หรือ deleted
+ปริมาณงานฝั่ง database จึงขึ้นกับจำนวนแถวที่เปลี่ยน ไม่ใช่ขนาดของทั้งตาราง
+
+dimension ids ต้องคงที่ระหว่างรอบ (etl.surrogate_keys.path) เพราะ FK ids เป็นส่วนหนึ่งของ row hash
+load แบบอื่น (full, incremental, streaming) ลบ index ทิ้ง และเมื่อ loans_fact มีแถวที่ row_key เป็น NULL
+หรือจำนวนแถวไม่ตรงกับ index รอบ CDC ถัดไปจะโหลดใหม่ทั้งหมดแทนการเขียนเฉพาะส่วนต่าง
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, text
+
+import etl_db
+import etl_dtypes
+import etl_loader
+
+DEFAULT_INDEX_PATH = 'state/fact_hashes.npy'
+DEFAULT_KEY_COLUMNS = ['id']
+
+FACT_TABLE = 'loans_fact'
+KEY_COLUMN = 'row_key'
+# Literal row keys per DELETE statement
+DELETE_BATCH = 1000
+
+IDENTITY, CHECKSUM, ROWS = 0, 1, 2
+
+
+### Hashing ###
+
+def row_hashes(df):
+    # The frame as loaded (downcast columns widened back), so the hash does not depend on etl.dtypes
+    return pd.util.hash_pandas_object(etl_dtypes.widen_frame(df), index=False).to_numpy()
+
+
+def build_index(identities, hashes):
+    """
+    (identities, checksum, rows) per distinct identity, sorted by identity; the checksum is the
+    sum of the row hashes, so it does not depend on row order.
+    """
+    keys, inverse, counts = np.unique(identities, return_inverse=True, return_counts=True)
+    checksums = np.zeros(len(keys), dtype=np.uint64)
+    np.add.at(checksums, inverse, hashes)
+    return np.column_stack([keys, checksums, counts.astype(np.uint64)]), inverse
+
+
+def load_index(index_path=DEFAULT_INDEX_PATH):
+    if not os.path.exists(index_path):
+        return None
+    return np.load(index_path)
+
+
+def drop_index(index_path=DEFAULT_INDEX_PATH):
+    # After a load that writes loans_fact without row keys, so the next CDC run reloads every row
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+
+def save_index(index, index_path=DEFAULT_INDEX_PATH):
+    # Write-then-rename so an interrupted run keeps the previous index
+    directory = os.path.dirname(index_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{index_path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, index)
+    os.replace(tmp_path, index_path)
+
+
+def diff_index(current, previous):
+    """
+    Compare two sorted indexes; returns boolean masks over their rows:
+    (inserted in current, changed in current, deleted in previous).
+    """
+    inserted = ~np.isin(current[:, IDENTITY], previous[:, IDENTITY], assume_unique=True)
+    deleted = ~np.isin(previous[:, IDENTITY], current[:, IDENTITY], assume_unique=True)
+    _, in_current, in_previous = np.intersect1d(current[:, IDENTITY], previous[:, IDENTITY], assume_unique=True,
+                                                return_indices=True)
+    differs = np.any(current[in_current, CHECKSUM:] != previous[in_previous, CHECKSUM:], axis=1)
+    changed = np.zeros(len(current), dtype=bool)
+    changed[in_current[differs]] = True
+    return inserted, changed, deleted
+
+
+### Database ###
+
+def as_row_keys(identities):
+    # BIGINT column: the same 64 bits read as signed
+    return np.asarray(identities, dtype=np.uint64).view(np.int64)
+
+
+def has_row_keys(engine):
+    if not inspect(engine).has_table(FACT_TABLE):
+        return False
+    return KEY_COLUMN in etl_db.table_columns(engine, FACT_TABLE)
+
+
+def index_matches_table(engine, index):
+    """
+    True when loans_fact has a row_key on every row and as many rows as the index describes; another load mode
+    in between (rows without row_key, or other rows) means the table has to be reloaded.
+    """
+    if not has_row_keys(engine):
+        return False
+    with engine.connect() as connection:
+        rows, missing = connection.execute(text(
+            f'SELECT COUNT(*), COUNT(*) - COUNT({KEY_COLUMN}) FROM {FACT_TABLE}')).one()
+    return missing == 0 and rows == int(index[:, ROWS].sum())
+
+
+def delete_row_keys(engine, row_keys):
+    # One transaction, so the previous rows disappear together
+    deleted = 0
+    with engine.begin() as connection:
+        for start in range(0, len(row_keys), DELETE_BATCH):
+            keys = ', '.join(str(int(key)) for key in row_keys[start:start + DELETE_BATCH])
+            result = connection.execute(text(f'DELETE FROM {FACT_TABLE} WHERE {KEY_COLUMN} IN ({keys})'))
+            deleted += etl_db.affected_rows(result)
+    return deleted
+
+
+def sync_dimensions(engine, dimensions, method='multi_values', batch_size=etl_loader.DEFAULT_BATCH_SIZE):
+    """
+    Append the dimension members whose id the table does not have yet; returns {table: new members}.
+
+    The ids come from the persistent surrogate key store, so an existing id always means the same member.
+    """
+    new_members = {}
+    for name, dim in dimensions.items():
+        id_column = f"{name[:-len('_dim')]}_id"
+        if not inspect(engine).has_table(name):
+            etl_loader.load_table(dim, name, engine, method, batch_size)
+            new_members[name] = len(dim)
+            continue
+        existing = pd.read_sql(f'SELECT {id_column} FROM {name}', engine)[id_column]
+        new_dim = dim[~dim[id_column].isin(existing)]
+        if len(new_dim):
+            etl_loader.insert_rows(new_dim, name, engine, method, batch_size)
+        new_members[name] = len(new_dim)
+    return new_members
+
+
+def run_cdc_load(engine, loans_fact, keys=None, dimensions=None, index_path=DEFAULT_INDEX_PATH,
+                 method='multi_values', batch_size=etl_loader.DEFAULT_BATCH_SIZE):
+    """
+    Write only the loans_fact rows that were inserted, changed or deleted since the last run.
+
+    keys: source key columns aligned with loans_fact (e.g. the validated frame's id); None uses the row
+    hash as identity, so a changed row counts as one deleted and one inserted row.
+    Returns a summary dict: rows, inserted, changed, deleted, unchanged (row counts), rows_written,
+    rows_deleted (database rows removed), full_reload, new_members.
+    """
+    new_members = sync_dimensions(engine, dimensions, method, batch_size) if dimensions else {}
+    hashes = row_hashes(loans_fact)
+    identities = hashes if keys is None else pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    current, group_of_row = build_index(identities, hashes)
+
+    previous = load_index(index_path)
+    full_reload = previous is None or not index_matches_table(engine, previous)
+    if full_reload:
+        print(f"⚠️  {FACT_TABLE} does not match the row hash index ({index_path}), reloading every row")
+        previous = np.empty((0, 3), dtype=np.uint64)
+    inserted, changed, deleted = diff_index(current, previous)
+
+    # Inserted keys are deleted too, which clears rows left by a run that failed before saving its index
+    stale = np.concatenate([current[inserted | changed, IDENTITY], previous[deleted, IDENTITY]])
+    write = inserted | changed
+    rows = loans_fact.iloc[np.flatnonzero(write[group_of_row])]
+    rows = rows.assign(**{KEY_COLUMN: as_row_keys(identities[write[group_of_row]])})
+
+    if full_reload:
+        etl_loader.create_table(rows, FACT_TABLE, engine, if_exists='replace')
+        # Not on DuckDB, which cannot rename an indexed table as a later swap load does
+        if engine.dialect.name != 'duckdb':
+            with engine.begin() as connection:
+                connection.exec_driver_sql(f'CREATE INDEX IX_{FACT_TABLE}_{KEY_COLUMN} ON {FACT_TABLE} '
+                                           f'({KEY_COLUMN})')
+        rows_deleted = 0
+    else:
+        rows_deleted = delete_row_keys(engine, as_row_keys(stale))
+    stats = etl_loader.insert_rows(rows, FACT_TABLE, engine, method, batch_size) if len(rows) else {'rows': 0}
+
+    # The index moves forward only after the database work succeeded
+    save_index(current, index_path)
+    counts = current[:, ROWS].astype(np.int64)
+    return {
+        'rows': len(loans_fact),
+        'inserted': int(counts[inserted].sum()),
+        'changed': int(counts[changed].sum()),
+        'deleted': int(previous[deleted, ROWS].astype(np.int64).sum()),
+        'unchanged': int(counts[~write].sum()),
+        'rows_written': stats['rows'],
+        'rows_deleted': rows_deleted,
+        'full_reload': full_reload,
+        'new_members': new_members,
+    }
+
+
+def format_summary(summary):
+    share = summary['rows_written'] / summary['rows'] if summary['rows'] else 0.0
+    return (f"{summary['inserted']:,} inserted, {summary['changed']:,} changed, {summary['deleted']:,} deleted, "
+            f"{summary['unchanged']:,} unchanged; {summary['rows_written']:,} rows written ({share:.1%} of "
+            f"{summary['rows']:,}), {summary['rows_deleted']:,} removed")
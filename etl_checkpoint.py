@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Checkpoints สำหรับ resume pipeline run ที่ล้มกลางทาง (etl_main.py --resume)
+
+output ของ stage ที่แพง (validate, dimensions, fact) ถูกเก็บเป็น Arrow IPC files ใน checkpoint directory
+พร้อม manifest.json ที่ผูกกับ run key (fingerprint ของไฟล์ต้นทาง + config) run ที่ resume จึงข้าม stage เหล่านี้ได้
+ความคืบหน้าของ Step 8 ถูกเก็บในตาราง etl_load_progress ของ database ปลายทาง และ commit ใน transaction
+เดียวกับแต่ละ batch ของ loans_fact: resume จึงโหลดต่อจาก batch สุดท้ายที่ commit แล้ว ไม่ซ้ำและไม่ขาด
+
+pyarrow เป็น optional dependency: ถ้าไม่ได้ติดตั้ง ไม่มีการเขียน checkpoint แต่ load progress ยังใช้ได้
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from sqlalchemy import BigInteger, Column, Integer, MetaData, String, Table
+
+import etl_db
+import etl_loader
+import etl_profile
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - exercised only without pyarrow
+    pa = None
+    feather = None
+
+DEFAULT_CHECKPOINT_DIR = 'state/checkpoints'
+# Stages whose outputs are checkpointed; everything upstream of them is skipped on resume
+CHECKPOINT_NODES = ('validate', 'dimensions', 'fact')
+
+MANIFEST_FILE = 'manifest.json'
+FORMAT_VERSION = 1
+PROGRESS_TABLE = 'etl_load_progress'
+# Settings that may change between a failed run and its resume without changing the data
+RESUME_SAFE_SETTINGS = ('loading', 'metrics', 'checkpoint')
+
+
+def run_key(sources, config):
+    """
+    Identity of a run: the source files (path, size, mtime) and every setting that shapes the data.
+    """
+    etl = {key: value for key, value in config.get('etl', {}).items() if key not in RESUME_SAFE_SETTINGS}
+    payload = json.dumps({'sources': etl_profile.source_fingerprint(sources), 'config': dict(config, etl=etl)},
+                         sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Stage outputs of one run key in a local columnar store.
+
+    resume=False (or a manifest of another run key) starts from an empty store.
+    """
+
+    def __init__(self, directory, run_key, resume=False):
+        self.directory = directory
+        self.run_key = run_key
+        manifest = self._load_manifest()
+        self.resumed = (resume and manifest.get('version') == FORMAT_VERSION
+                        and manifest.get('run_key') == run_key)
+        if not self.resumed:
+            self.clear()
+            manifest = {'version': FORMAT_VERSION, 'run_key': run_key, 'stages': {}}
+        self.manifest = manifest
+
+    @property
+    def available(self):
+        return pa is not None
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _load_manifest(self):
+        if not os.path.exists(self._manifest_path()):
+            return {}
+        with open(self._manifest_path(), encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        # The manifest is written last, so a stage only counts as saved once all of its files exist
+        tmp_path = f'{self._manifest_path()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
+    def stages(self):
+        return list(self.manifest['stages'])
+
+    def has(self, name):
+        return name in self.manifest['stages']
+
+    def save(self, name, output):
+        """
+        Store a stage output: a DataFrame, a dict of DataFrames, a tuple of those, or JSON values.
+        """
+        if not self.available:
+            return False
+        stage_dir = os.path.join(self.directory, name)
+        shutil.rmtree(stage_dir, ignore_errors=True)
+        os.makedirs(stage_dir)
+        try:
+            encoded = self._encode(output, stage_dir, name)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            # Mixed-type object columns cannot be stored as Arrow; that stage is recomputed on resume
+            print(f"⚠️  Checkpoint skipped for {name}: {e}")
+            shutil.rmtree(stage_dir, ignore_errors=True)
+            return False
+        self.manifest['stages'][name] = {'output': encoded, 'saved': time.time()}
+        self._save_manifest()
+        return True
+
+    def load(self, name):
+        return self._decode(self.manifest['stages'][name]['output'], os.path.join(self.directory, name))
+
+    def discard(self, name):
+        if self.manifest['stages'].pop(name, None) is not None:
+            self._save_manifest()
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self.manifest = {'version': FORMAT_VERSION, 'run_key': self.run_key, 'stages': {}}
+
+    def _encode(self, value, stage_dir, label):
+        if isinstance(value, pd.DataFrame):
+            file_name = f'{label}.arrow'
+            # Arrow keeps the index, categoricals and nullable dtypes, so the frame restores as it was
+            feather.write_feather(value, os.path.join(stage_dir, file_name), compression='uncompressed')
+            return {'kind': 'frame', 'file': file_name}
+        if isinstance(value, tuple):
+            return {'kind': 'tuple',
+                    'items': [self._encode(item, stage_dir, f'{label}.{index}') for index, item in enumerate(value)]}
+        if isinstance(value, dict) and value and all(isinstance(item, pd.DataFrame) for item in value.values()):
+            return {'kind': 'frames',
+                    'items': {key: self._encode(item, stage_dir, f'{label}.{key}') for key, item in value.items()}}
+        json.dumps(value)
+        return {'kind': 'json', 'value': value}
+
+    def _decode(self, encoded, stage_dir):
+        if encoded['kind'] == 'frame':
+            return feather.read_table(os.path.join(stage_dir, encoded['file']), memory_map=True).to_pandas()
+        if encoded['kind'] == 'tuple':
+            return tuple(self._decode(item, stage_dir) for item in encoded['items'])
+        if encoded['kind'] == 'frames':
+            return {key: self._decode(item, stage_dir) for key, item in encoded['items'].items()}
+        return encoded['value']
+
+
+class LoadProgress:
+    """
+    Rows committed per table and partition for one run key, kept in the target database.
+
+    mark() runs inside the caller's transaction, so a batch and its progress commit (or roll back) together.
+    """
+
+    def __init__(self, engine, run_key):
+        self.engine = engine
+        self.run_key = run_key
+        self.table = Table(PROGRESS_TABLE, MetaData(),
+                           Column('run_key', String(32), nullable=False),
+                           Column('table_name', String(128), nullable=False),
+                           Column('part', Integer, nullable=False),
+                           Column('rows_committed', BigInteger, nullable=False))
+        self.table.create(engine, checkfirst=True)
+
+    def committed(self):
+        # {(table_name, part): rows_committed}
+        statement = self.table.select().where(self.table.c.run_key == self.run_key)
+        with self.engine.connect() as connection:
+            return {(row.table_name, row.part): row.rows_committed for row in connection.execute(statement)}
+
+    def mark(self, connection, table_name, part, rows):
+        match = ((self.table.c.run_key == self.run_key) & (self.table.c.table_name == table_name)
+                 & (self.table.c.part == part))
+        if etl_db.affected_rows(connection.execute(self.table.update().where(match).values(rows_committed=rows))) == 0:
+            connection.execute(self.table.insert().values(run_key=self.run_key, table_name=table_name, part=part,
+                                                          rows_committed=rows))
+
+    def reset(self):
+        with self.engine.begin() as connection:
+            connection.execute(self.table.delete().where(self.table.c.run_key == self.run_key))
+
+
+def _load_dimension(progress, dim, table, engine, method, batch_size):
+    # A dimension is small and replaced as a whole; it is marked once it has committed
+    stats = etl_loader.load_table(dim, table, engine, method, batch_size)
+    with engine.begin() as connection:
+        progress.mark(connection, table, 0, len(dim))
+    return stats
+
+
+def _load_fact_partition(progress, part, table, index, offset, engine, method, batch_size):
+    # Each batch commits in its own transaction together with the partition's new row count
+    start = time.perf_counter()
+    batches = 0
+    for begin in range(offset, len(part), batch_size):
+        batch = part.iloc[begin:begin + batch_size]
+        with engine.begin() as connection:
+            etl_loader.insert_batch(connection, batch, table, engine, method)
+            progress.mark(connection, table, index, begin + len(batch))
+        batches += 1
+    seconds = time.perf_counter() - start
+    rows = len(part) - offset
+    return {
+        'table': table,
+        'method': etl_loader.batch_method(method),
+        'rows': rows,
+        'batches': batches,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds > 0 else float('inf'),
+        'worker': threading.current_thread().name,
+        'partition': index,
+        'skipped_rows': offset,
+    }
+
+
+def load_star_schema_resumable(engine, dimensions, loans_fact, progress, method='multi_values',
+                               batch_size=etl_loader.DEFAULT_BATCH_SIZE, workers=3, fact_partitions=4,
+                               table_suffix=''):
+    """
+    load_star_schema_parallel() that records its progress and continues where an earlier attempt stopped.
+
+    Dimensions that committed are not reloaded; each fact partition continues after its last committed batch,
+    using the partition count it was started with. The caller calls progress.reset() once the run is complete.
+    """
+    start = time.perf_counter()
+    committed = progress.committed()
+    workers = max(1, min(workers, etl_db.max_connections(engine)))
+    fact_table = 'loans_fact' + table_suffix
+    stats = []
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='etl-load') as executor:
+        futures = []
+        for name, dim in dimensions.items():
+            table = name + table_suffix
+            if (table, 0) in committed:
+                print(f"⏭️  {table} already loaded ({committed[(table, 0)]:,} rows)")
+            else:
+                futures.append(executor.submit(_load_dimension, progress, dim, table, engine, method, batch_size))
+        for future in futures:
+            stats.append(future.result())
+            print(f"✅ {stats[-1]['table']} loaded ({etl_loader.format_load_stats(stats[-1])}) "
+                  f"[{stats[-1]['worker']}]")
+
+        offsets = {part: rows for (table, part), rows in committed.items() if table == fact_table}
+        if offsets:
+            partitions = etl_loader.partition_frame(loans_fact, len(offsets))
+            print(f"⏭️  Resuming {fact_table} after {sum(offsets.values()):,} committed rows")
+        else:
+            etl_loader.create_table(loans_fact, fact_table, engine)
+            partitions = etl_loader.partition_frame(loans_fact, fact_partitions)
+            offsets = {index: 0 for index in range(len(partitions))}
+            with engine.begin() as connection:
+                for index in offsets:
+                    progress.mark(connection, fact_table, index, 0)
+
+        futures = [executor.submit(_load_fact_partition, progress, part, fact_table, index, offsets[index], engine,
+                                   method, batch_size)
+                   for index, part in enumerate(partitions)]
+        for index, future in enumerate(futures):
+            part_stats = future.result()
+            stats.append(part_stats)
+            print(f"✅ {fact_table} partition {index + 1}/{len(partitions)} loaded "
+                  f"({etl_loader.format_load_stats(part_stats)}) [{part_stats['worker']}]")
+
+    return {'tables': stats, 'workers': etl_loader.summarize_workers(stats), 'seconds': time.perf_counter() - start}
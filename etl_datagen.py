@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Synthetic LoanStats generator: สร้างไฟล์ CSV ที่มี schema แบบ LoanStats สำหรับ tests และ benchmarks
+
+คอลัมน์ที่ pipeline ต้องใช้ (tests/quick_test.py) ไม่มีค่าว่าง, int_rate/revol_util มี "%" ต่อท้าย,
+วันที่เป็น "Mon-YYYY" และคอลัมน์อื่นมีสัดส่วนค่าว่างใกล้เคียงไฟล์จริง เพื่อให้ Step 3/4 ตัดคอลัมน์เหมือนข้อมูลจริง
+ข้อมูลถูกสร้างและเขียนทีละ block (BLOCK_ROWS แถว, random stream ของแต่ละ block มาจาก seed และตำแหน่ง block)
+จึงสร้างได้ตั้งแต่ 10K ถึง 50M แถวด้วย memory คงที่ และไฟล์ขนาดทวีคูณของ BLOCK_ROWS เป็น prefix ของไฟล์ที่ใหญ่กว่า
+
+Usage:
+    python etl_datagen.py data/LoanStats_web_small.csv --rows 20000
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ['loan_amnt', 'funded_amnt', 'term', 'int_rate', 'installment',
+                    'home_ownership', 'loan_status', 'issue_d', 'application_type']
+
+# Share of empty values per optional column, in the range seen in the LendingClub exports
+NULL_RATES = {
+    'emp_title': 0.06,
+    'emp_length': 0.05,
+    'annual_inc': 0.0001,
+    'dti': 0.001,
+    'revol_util': 0.0008,
+    'mths_since_last_delinq': 0.51,
+    'mths_since_last_record': 0.84,
+    'last_pymnt_d': 0.001,
+    'desc': 0.92,
+}
+
+# (value, weight) pairs
+HOME_OWNERSHIP = [('MORTGAGE', 0.49), ('RENT', 0.40), ('OWN', 0.108), ('ANY', 0.002)]
+LOAN_STATUS = [('Current', 0.55), ('Fully Paid', 0.30), ('Charged Off', 0.10), ('Late (31-120 days)', 0.025),
+               ('In Grace Period', 0.015), ('Late (16-30 days)', 0.01)]
+TERMS = [(' 36 months', 0.72), (' 60 months', 0.28)]
+APPLICATION_TYPES = [('Individual', 0.96), ('Joint App', 0.04)]
+EMP_TITLES = [('Teacher', 0.2), ('Manager', 0.2), ('Registered Nurse', 0.15), ('Driver', 0.15),
+              ('Owner', 0.1), ('Sales', 0.1), ('Engineer', 0.1)]
+EMP_LENGTHS = [('10+ years', 0.33), ('2 years', 0.09), ('< 1 year', 0.08), ('3 years', 0.08), ('1 year', 0.07),
+               ('5 years', 0.06), ('4 years', 0.06), ('6 years', 0.05), ('7 years', 0.05), ('8 years', 0.05),
+               ('9 years', 0.08)]
+PURPOSES = [('debt_consolidation', 0.58), ('credit_card', 0.22), ('home_improvement', 0.07), ('other', 0.06),
+            ('major_purchase', 0.03), ('medical', 0.02), ('car', 0.02)]
+GRADES = 'ABCDEFG'
+GRADE_WEIGHTS = [0.17, 0.29, 0.28, 0.15, 0.07, 0.03, 0.01]
+# Base interest rate per grade (percent); sub grades add 0.6 points each
+GRADE_RATES = [6.0, 10.0, 13.5, 17.5, 21.5, 25.0, 28.5]
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+FIRST_ISSUE_YEAR = 2012
+ISSUE_YEARS = 6
+
+COLUMNS = ['id', 'loan_amnt', 'funded_amnt', 'term', 'int_rate', 'installment', 'grade', 'sub_grade',
+           'emp_title', 'emp_length', 'home_ownership', 'annual_inc', 'loan_status', 'issue_d', 'purpose',
+           'dti', 'revol_util', 'mths_since_last_delinq', 'mths_since_last_record', 'last_pymnt_d',
+           'application_type', 'desc']
+
+BLOCK_ROWS = 100000
+
+
+def _choice(rng, pairs, size):
+    values, weights = zip(*pairs)
+    weights = np.asarray(weights) / np.sum(weights)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size, p=weights)]
+
+
+def _with_nulls(rng, values, column):
+    # object columns get None, numeric columns NaN; both are written as empty fields
+    rate = NULL_RATES.get(column, 0.0)
+    if rate == 0.0:
+        return values
+    missing = rng.random(len(values)) < rate
+    if values.dtype == object:
+        values = values.copy()
+        values[missing] = None
+        return values
+    return np.where(missing, np.nan, values)
+
+
+def _month_labels(month_index):
+    # month_index counts months from Jan of FIRST_ISSUE_YEAR
+    labels = np.array([f'{MONTHS[i % 12]}-{FIRST_ISSUE_YEAR + i // 12}'
+                       for i in range(int(month_index.max()) + 1)], dtype=object)
+    return labels[month_index]
+
+
+def _format_percent(values, decimals):
+    # Few distinct rates: format each distinct value once and broadcast through the inverse index
+    uniques, inverse = np.unique(values, return_inverse=True)
+    labels = np.array([f'{value:.{decimals}f}%' for value in uniques], dtype=object)
+    return labels[inverse]
+
+
+def generate_rows(rows, seed=0):
+    """
+    The first rows rows of the synthetic dataset for seed, as a DataFrame.
+    """
+    frames = [_generate(min(BLOCK_ROWS, rows - start), seed, start) for start in range(0, rows, BLOCK_ROWS)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+
+
+def _generate(rows, seed, start):
+    rng = np.random.default_rng([seed, start])
+
+    loan_amnt = rng.integers(20, 1601, rows) * 25
+    # About 3% of loans are funded below the requested amount, never above it
+    shortfall = np.where(rng.random(rows) < 0.03, rng.integers(1, 40, rows) * 25, 0)
+    funded_amnt = np.maximum(loan_amnt - shortfall, 500)
+
+    term = _choice(rng, TERMS, rows)
+    months = np.where(term == ' 36 months', 36, 60)
+
+    grade_index = rng.choice(len(GRADES), rows, p=GRADE_WEIGHTS)
+    sub_level = rng.integers(1, 6, rows)
+    rate = np.asarray(GRADE_RATES)[grade_index] + (sub_level - 1) * 0.6 + rng.normal(0, 0.3, rows)
+    rate = np.round(np.clip(rate, 5.31, 30.99), 2)
+    grades = np.asarray(list(GRADES), dtype=object)[grade_index]
+    sub_grade = grades + sub_level.astype(str).astype(object)
+
+    # Standard amortized payment on the funded amount
+    monthly = rate / 100 / 12
+    installment = np.round(funded_amnt * monthly / (1 - (1 + monthly) ** -months), 2)
+
+    issue_month = rng.integers(0, ISSUE_YEARS * 12, rows)
+    last_payment = issue_month + rng.integers(1, 24, rows)
+
+    frame = pd.DataFrame({
+        'id': np.arange(start, start + rows),
+        'loan_amnt': loan_amnt,
+        'funded_amnt': funded_amnt,
+        'term': term,
+        'int_rate': _format_percent(rate, 2),
+        'installment': installment,
+        'grade': grades,
+        'sub_grade': sub_grade,
+        'emp_title': _with_nulls(rng, _choice(rng, EMP_TITLES, rows), 'emp_title'),
+        'emp_length': _with_nulls(rng, _choice(rng, EMP_LENGTHS, rows), 'emp_length'),
+        'home_ownership': _choice(rng, HOME_OWNERSHIP, rows),
+        'annual_inc': _with_nulls(rng, np.round(rng.lognormal(11.1, 0.55, rows), -2), 'annual_inc'),
+        'loan_status': _choice(rng, LOAN_STATUS, rows),
+        'issue_d': _month_labels(issue_month),
+        'purpose': _choice(rng, PURPOSES, rows),
+        'dti': _with_nulls(rng, np.round(rng.gamma(4.0, 4.5, rows), 2), 'dti'),
+        'revol_util': _with_nulls(rng, _format_percent(np.round(rng.uniform(0, 100, rows), 1), 1), 'revol_util'),
+        'mths_since_last_delinq': _with_nulls(rng, rng.integers(0, 120, rows).astype(float),
+                                              'mths_since_last_delinq'),
+        'mths_since_last_record': _with_nulls(rng, rng.integers(0, 120, rows).astype(float),
+                                              'mths_since_last_record'),
+        'last_pymnt_d': _with_nulls(rng, _month_labels(last_payment), 'last_pymnt_d'),
+        'application_type': _choice(rng, APPLICATION_TYPES, rows),
+        'desc': _with_nulls(rng, np.full(rows, 'Borrower added on loan listing', dtype=object), 'desc'),
+    })
+    return frame[COLUMNS]
+
+
+def write_loanstats_csv(path, rows, seed=0):
+    """
+    Write rows synthetic LoanStats rows to path one block at a time; returns path.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if rows == 0:
+            pd.DataFrame(columns=COLUMNS).to_csv(f, index=False)
+        for start in range(0, rows, BLOCK_ROWS):
+            _generate(min(BLOCK_ROWS, rows - start), seed, start).to_csv(f, header=start == 0, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic LoanStats CSV')
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    write_loanstats_csv(args.path, args.rows, args.seed)
+    size_mb = os.path.getsize(args.path) / 1024 ** 2
+    print(f"✅ Wrote {args.rows:,} rows to {args.path} ({size_mb:,.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
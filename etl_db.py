@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Database engine factory ที่อ่าน config/database.yaml ตาม environment
+
+Credentials: password มาจาก argument, environment variable DB_PASSWORD (Jenkins credentials) หรือ password
+ของ environment ใน YAML ตามลำดับ ไม่มีค่า default (ค่าว่าง = integrated authentication);
+DB_SERVER / DB_NAME / DB_USERNAME override ค่าใน YAML ได้เหมือน jenkins_test.py
+"""
+
+import os
+
+import yaml
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+
+DEFAULT_DB_CONFIG_PATH = 'config/database.yaml'
+DEFAULT_ENVIRONMENT = 'development'
+
+
+def load_db_config(config_path=DEFAULT_DB_CONFIG_PATH):
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def build_db_url(environment=None, config_path=DEFAULT_DB_CONFIG_PATH, password=None):
+    """
+    SQLAlchemy URL of an environment in database.yaml: its url or embedded backend as a string, otherwise
+    an sqlalchemy URL object for SQL Server, so credentials with '@', ':', '/' or '%' need no escaping.
+    """
+    environment = environment or os.getenv('ETL_ENV', DEFAULT_ENVIRONMENT)
+    config = load_db_config(config_path)
+    settings = config.get('database', {}).get(environment)
+    if settings is None:
+        raise ValueError(f"Unknown database environment: {environment}")
+
+    # An explicit URL (e.g. sqlite:///warehouse.db for local runs) wins over the MSSQL fields
+    if settings.get('url'):
+        return settings['url']
+    # Embedded warehouse file (backend: sqlite | duckdb, path: optional)
+    if settings.get('backend', 'mssql') != 'mssql':
+        import etl_backends  # etl_backends -> etl_aggregates -> etl_db
+        return etl_backends.get_backend(settings['backend']).url(settings.get('path'))
+
+    server = os.getenv('DB_SERVER', settings.get('server'))
+    database = os.getenv('DB_NAME', settings.get('database'))
+    username = os.getenv('DB_USERNAME', settings.get('username'))
+    if password is None:
+        password = os.getenv('DB_PASSWORD', settings.get('password'))
+    if password is None:
+        raise ValueError(f"No database password for environment {environment}: set DB_PASSWORD "
+                         f"(Jenkins credentials) or database.{environment}.password in {config_path}")
+    return URL.create('mssql+pymssql', username=username, password=password, host=server, database=database)
+
+
+def pool_options(url, connection):
+    # Pool settings only apply to pooled drivers; in-memory SQLite / DuckDB use a single static connection
+    url = make_url(url)
+    if url.get_backend_name() in ('sqlite', 'duckdb') and url.database in (None, '', ':memory:'):
+        return {}
+
+    options = {
+        'pool_size': connection.get('pool_size', 5),
+        'max_overflow': connection.get('max_overflow', 10),
+        'pool_timeout': connection.get('pool_timeout', 30),
+        'pool_pre_ping': True,
+    }
+    if url.get_backend_name() == 'mssql' and 'timeout' in connection:
+        options['connect_args'] = {'login_timeout': connection['timeout']}
+    return options
+
+
+def create_db_engine(environment=None, config_path=DEFAULT_DB_CONFIG_PATH, password=None, url=None):
+    """
+    Create a pooled SQLAlchemy engine for the given environment of database.yaml.
+
+    url: bypass the YAML lookup but still apply the connection pool settings
+    """
+    import etl_backends  # etl_backends -> etl_aggregates -> etl_db
+    config = load_db_config(config_path)
+    url = url or build_db_url(environment, config_path, password)
+    engine = create_engine(url, **pool_options(url, config.get('connection', {})))
+    # Per-backend connection setup, e.g. the functions SQLite's views need
+    return etl_backends.backend_for(engine).prepare(engine)
+
+
+def table_columns(engine, table_name):
+    # Column names of an empty result: works on every dialect, including those without column reflection
+    quoted = engine.dialect.identifier_preparer.quote(table_name)
+    with engine.connect() as connection:
+        return list(connection.exec_driver_sql(f'SELECT * FROM {quoted} WHERE 1 = 0').keys())
+
+
+def affected_rows(result):
+    # DuckDB returns the count of a DELETE / UPDATE as a result row and leaves the DBAPI rowcount at -1
+    if result.rowcount == -1 and result.returns_rows:
+        return result.scalar()
+    return result.rowcount
+
+
+def max_connections(engine):
+    # Upper bound of concurrently checked-out connections for this engine's pool
+    pool = engine.pool
+    if hasattr(pool, 'size') and hasattr(pool, '_max_overflow'):
+        return pool.size() + max(pool._max_overflow, 0)
+    return 1
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Downcast ตาม DDL: เลือก dtype ที่เล็กที่สุดที่ไม่เสียค่า สำหรับแต่ละคอลัมน์ที่มี type ใน sql/create_star_schema.sql
+(หรือ schema spec ใน etl.dtypes.schema)
+
+    INT/SMALLINT/TINYINT/BIGINT และ DECIMAL ที่เป็นจำนวนเต็ม -> int8/int16/int32 ตามช่วงค่าจริง
+    DECIMAL(p,s) -> float32 เมื่อทุกค่ามีทศนิยมไม่เกิน s หลัก, อยู่ในช่วงของ p
+                    และ round trip ผ่าน float32 ที่ scale s ได้ตรง
+    NVARCHAR ที่มีค่าไม่ซ้ำน้อย -> category
+
+ทุกคอลัมน์ถูกตรวจก่อน downcast คอลัมน์ที่ไม่ผ่านคงเดิมพร้อมเหตุผลใน report
+ค่า float32 ถูกขยายกลับเป็น float64 ของทศนิยมเดิม (exact_float64) ก่อนเข้า database และก่อนคำนวณ aggregates
+ส่วน table ที่ etl_loader สร้างเองยังได้ SQL types เดิม (widen_frame)
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SCHEMA_SQL = 'sql/create_star_schema.sql'
+
+INTEGER_TYPES = ('TINYINT', 'SMALLINT', 'INT', 'BIGINT', 'BIT')
+STRING_TYPES = ('NVARCHAR', 'VARCHAR', 'NCHAR', 'CHAR')
+# Smallest first
+INTEGER_DTYPES = ('int8', 'int16', 'int32', 'int64')
+
+# A value is taken to have at most s decimals when value * 10**s is this close to an integer
+SCALE_TOLERANCE = 1e-6
+# Decimal places tried when a float32 is widened back to its decimal value
+MAX_SCALE = 9
+
+# String columns become category below these distinct counts (as etl_main.low_cardinality_columns)
+CATEGORY_MAX_DISTINCT = 1000
+CATEGORY_MAX_RATIO = 0.5
+
+_CREATE_TABLE = re.compile(r'CREATE TABLE (\w+) \((.*?)\n\);', re.DOTALL | re.IGNORECASE)
+_COLUMN = re.compile(r'^\s*(\w+)\s+([A-Z]+\w*)(?:\((\w+)(?:\s*,\s*(\d+))?\))?', re.IGNORECASE)
+_NOT_COLUMNS = ('INDEX', 'CONSTRAINT', 'PRIMARY', 'FOREIGN', 'UNIQUE', 'CHECK')
+
+
+def parse_sql_type(definition):
+    """
+    {'type', 'precision', 'scale', 'length'} of a column type such as 'DECIMAL(18,2)' or 'NVARCHAR(50)'.
+    """
+    match = _COLUMN.match(f'column {definition}')
+    if not match:
+        raise ValueError(f"Cannot parse SQL type: {definition}")
+    _, sql_type, first, second = match.groups()
+    sql_type = sql_type.upper()
+    spec = {'type': sql_type, 'precision': None, 'scale': None, 'length': None}
+    if sql_type in ('DECIMAL', 'NUMERIC'):
+        spec['precision'] = int(first or 18)
+        spec['scale'] = int(second or 0)
+    elif sql_type in STRING_TYPES and first:
+        spec['length'] = None if first.upper() == 'MAX' else int(first)
+    return spec
+
+
+def _definitions(body):
+    # Top-level comma separated items of a CREATE TABLE body, comments removed
+    body = re.sub(r'--[^\n]*', '', body)
+    items, depth, start = [], 0, 0
+    for position, char in enumerate(body):
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if char == ',' and depth == 0:
+            items.append(body[start:position])
+            start = position + 1
+    return items + [body[start:]]
+
+
+def parse_schema_sql(sql_path=DEFAULT_SCHEMA_SQL):
+    """
+    {table: {column: type spec}} from the CREATE TABLE statements; computed columns (AS ...) are skipped.
+    """
+    with open(sql_path, encoding='utf-8') as f:
+        script = f.read()
+    schema = {}
+    for table, body in _CREATE_TABLE.findall(script):
+        columns = {}
+        for definition in _definitions(body):
+            match = _COLUMN.match(definition)
+            if not match or match.group(1).upper() in _NOT_COLUMNS or match.group(2).upper() == 'AS':
+                continue
+            name, sql_type, first, second = match.groups()
+            definition = sql_type + (f'({first}' + (f',{second}' if second else '') + ')' if first else '')
+            columns[name] = parse_sql_type(definition)
+        schema[table] = columns
+    return schema
+
+
+def load_schema(sql_path=DEFAULT_SCHEMA_SQL, spec=None):
+    # The DDL, with the column types of spec ({table: {column: 'DECIMAL(18,2)'}}) added or overriding it
+    schema = parse_schema_sql(sql_path) if sql_path else {}
+    for table, columns in (spec or {}).items():
+        schema.setdefault(table, {}).update({column: parse_sql_type(definition)
+                                             for column, definition in columns.items()})
+    return schema
+
+
+### Per-column decisions ###
+
+def _smallest_integer(values):
+    low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+    for dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return None
+
+
+def _integer_target(series):
+    # Lossless only without nulls and for whole numbers
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return None, 'not numeric'
+    if series.isna().any():
+        return None, 'has nulls'
+    values = series.to_numpy()
+    if not pd.api.types.is_integer_dtype(series) and not np.array_equal(values, np.round(values)):
+        return None, 'has fractions'
+    return _smallest_integer(values), 'range fits'
+
+
+def _decimal_target(series, precision, scale):
+    if pd.api.types.is_integer_dtype(series) and not series.isna().any():
+        # Whole amounts need no fraction at all
+        if len(series) and np.abs(series.to_numpy()).max() >= 10 ** (precision - scale):
+            return None, f'exceeds DECIMAL({precision},{scale})'
+        return _smallest_integer(series.to_numpy()), 'whole numbers'
+    if not pd.api.types.is_float_dtype(series):
+        return None, 'not numeric'
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[~np.isnan(values)]
+    if len(values) and np.abs(values).max() >= 10 ** (precision - scale):
+        return None, f'exceeds DECIMAL({precision},{scale})'
+    scaled = values * 10.0 ** scale
+    digits = np.round(scaled)
+    if not np.all(np.abs(scaled - digits) <= SCALE_TOLERANCE):
+        return None, f'more than {scale} decimals'
+    narrow = values.astype(np.float32)
+    # Neighbouring float32 values closer than 10**-s apart, so exactly one s-decimal maps to each of them
+    if len(values) and np.spacing(np.abs(narrow).max()) * 2 >= 10.0 ** -scale:
+        return None, 'needs more digits than float32'
+    if not np.array_equal(np.round(narrow.astype(np.float64) * 10.0 ** scale), digits):
+        return None, 'needs more digits than float32'
+    return 'float32', f'exact at scale {scale}'
+
+
+def _string_target(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return None, 'already category'
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return None, 'not text'
+    non_null = int(series.notna().sum())
+    distinct = series.nunique()
+    if non_null == 0 or distinct > CATEGORY_MAX_DISTINCT or distinct / non_null > CATEGORY_MAX_RATIO:
+        return None, 'high cardinality'
+    return 'category', f'{distinct} distinct values'
+
+
+def plan_frame(df, columns, categorical=True):
+    """
+    Target dtype of every column of df that has a type in columns ({column: type spec}).
+
+    Returns [{'column', 'sql_type', 'from', 'to', 'reason'}]; 'to' is None when the column stays as it is.
+    """
+    plan = []
+    for column, spec in columns.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        sql_type = spec['type']
+        if sql_type in INTEGER_TYPES:
+            target, reason = _integer_target(series)
+        elif sql_type in ('DECIMAL', 'NUMERIC'):
+            target, reason = _decimal_target(series, spec['precision'], spec['scale'])
+        elif sql_type in STRING_TYPES and categorical:
+            target, reason = _string_target(series)
+        else:
+            target, reason = None, 'no smaller type'
+        if target is not None and str(series.dtype) == target:
+            target, reason = None, 'already smallest'
+        if target not in (None, 'category') and series.dtype.kind in 'iuf' \
+                and np.dtype(target).itemsize >= series.dtype.itemsize:
+            target, reason = None, 'already smallest'
+        plan.append({'column': column, 'sql_type': sql_type, 'from': str(series.dtype), 'to': target,
+                     'reason': reason})
+    return plan
+
+
+def apply_plan(df, plan):
+    # A new frame; the caller's frame keeps its dtypes
+    changes = {entry['column']: entry['to'] for entry in plan if entry['to'] is not None}
+    return df.astype(changes) if changes else df
+
+
+### Widening ###
+
+def exact_float64(values):
+    """
+    float64 array of values; a float32 becomes the float64 of the shortest decimal (up to MAX_SCALE places)
+    that rounds back to it, e.g. float32(0.1356) -> 0.1356 rather than 0.13560000061988831.
+    """
+    values = np.asarray(values)
+    if values.dtype != np.float32:
+        return values.astype(np.float64)
+    wide = values.astype(np.float64)
+    result = wide.copy()
+    pending = np.flatnonzero(np.isfinite(wide))
+    for scale in range(MAX_SCALE + 1):
+        if not len(pending):
+            break
+        # digits / 10**s of two exact floats is the correctly rounded decimal
+        candidates = np.rint(wide[pending] * 10.0 ** scale) / 10.0 ** scale
+        found = candidates.astype(np.float32) == values[pending]
+        result[pending[found]] = candidates[found]
+        pending = pending[~found]
+    return result
+
+
+def widen_frame(df):
+    # The frame with the dtypes it had before downcasting: float32 as exact float64, small integers as int64
+    changes = {}
+    for column in df.columns:
+        dtype = df[column].dtype
+        if dtype == np.float32:
+            changes[column] = exact_float64(df[column].to_numpy())
+        elif dtype.kind == 'i' and dtype.itemsize < 8:
+            changes[column] = df[column].to_numpy(dtype=np.int64)
+    return df.assign(**changes) if changes else df
+
+
+### Report ###
+
+def row_bytes(series):
+    # Bytes per row the loader copies out of the column: item size of fixed-width values,
+    # average encoded length of text and categories
+    if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype.kind not in 'iufbM':
+        if not len(series):
+            return 0.0
+        return float(series.astype(str).str.len().fillna(0).mean()) * 2
+    return float(series.dtype.itemsize)
+
+
+def downcast(df, columns, table=None, categorical=True):
+    """
+    Plan and apply the downcast of one table; returns (frame, report).
+
+    report: {'table', 'rows', 'memory_before', 'memory_after', 'payload_row_before', 'payload_row_after',
+    'columns': plan}; memory in bytes (deep), payload in bytes per row.
+    """
+    plan = plan_frame(df, columns, categorical)
+    result = apply_plan(df, plan)
+    report = {
+        'table': table,
+        'rows': len(df),
+        'memory_before': int(df.memory_usage(deep=True).sum()),
+        'memory_after': int(result.memory_usage(deep=True).sum()),
+        'payload_row_before': sum(row_bytes(df[column]) for column in df.columns),
+        'payload_row_after': sum(row_bytes(result[column]) for column in result.columns),
+        'columns': plan,
+    }
+    return result, report
+
+
+def format_report(report):
+    saved = report['memory_before'] - report['memory_after']
+    share = saved / report['memory_before'] if report['memory_before'] else 0.0
+    changed = ', '.join(f"{entry['column']} {entry['from']}->{entry['to']}"
+                        for entry in report['columns'] if entry['to'] is not None)
+    line = (f"{report['table']}: memory {report['memory_before'] / 1024 ** 2:.2f} -> "
+            f"{report['memory_after'] / 1024 ** 2:.2f} MB ({share:.0%} saved), load payload "
+            f"{report['payload_row_before']:.0f} -> {report['payload_row_after']:.0f} bytes/row")
+    return line + (f" [{changed}]" if changed else '')
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Incremental load แบ่ง partition ตามเดือนของ issue_d
+
+แต่ละ partition มี checksum (จำนวนแถว + ผลรวม hash ของแถว) เก็บใน state file ภายในเครื่อง
+รอบถัดไปจะลบ/โหลดเฉพาะเดือนที่ checksum เปลี่ยน และเพิ่มเฉพาะ dimension member ใหม่
+(id เดิมไม่เปลี่ยน) งานฝั่งฐานข้อมูลจึงขึ้นกับขนาดของ delta ไม่ใช่ history ทั้งหมด
+load แบบอื่น (full, streaming, CDC) ลบ state file ทิ้ง รอบ incremental ถัดไปจึงแทนที่ loans_fact ทั้งตาราง
+"""
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, text
+
+import etl_db
+import etl_loader
+import etl_main
+
+DEFAULT_STATE_PATH = 'state/partition_state.json'
+
+PARTITION_COLUMN = 'issue_d'
+
+
+### Partition checksums ###
+
+def month_codes(issue_d):
+    # Factorize the (few hundred) distinct dates first so only those are formatted
+    date_codes, dates = pd.factorize(issue_d)
+    months = pd.DatetimeIndex(dates).strftime('%Y-%m')
+    month_of_date, month_labels = pd.factorize(months)
+    return month_of_date[date_codes] if len(date_codes) else np.array([], dtype=int), list(month_labels)
+
+
+def partition_checksums(df, columns=None):
+    """
+    Checksum per issue_d month: "<rows>:<sum of 64-bit row hashes>", independent of row order.
+    """
+    if df.empty:
+        return {}
+    columns = columns or [col for col in etl_main.DIMENSION_COLUMNS + etl_main.FACT_COLUMNS if col in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    codes, months = month_codes(df[PARTITION_COLUMN])
+
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sums = np.add.reduceat(row_hashes[order], starts)
+    counts = np.diff(np.r_[starts, len(order)])
+    return {months[sorted_codes[start]]: f'{count}:{total:016x}'
+            for start, total, count in zip(starts, sums, counts)}
+
+
+### State store ###
+
+def load_partition_state(state_path=DEFAULT_STATE_PATH):
+    if not os.path.exists(state_path):
+        return {'partitions': {}, 'watermark': None}
+    with open(state_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_partition_state(partitions, state_path=DEFAULT_STATE_PATH):
+    # Write-then-rename so an interrupted run never leaves a truncated state file
+    state = {
+        'partitions': dict(sorted(partitions.items())),
+        'watermark': max(partitions) if partitions else None,
+        'updated_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    directory = os.path.dirname(state_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{state_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+    return state
+
+
+def drop_partition_state(state_path=DEFAULT_STATE_PATH):
+    # After a load that replaced loans_fact some other way, so the next incremental run reloads every month
+    if os.path.exists(state_path):
+        os.remove(state_path)
+
+
+def plan_partitions(current, previous):
+    changed = sorted(month for month, checksum in current.items() if previous.get(month) != checksum)
+    deleted = sorted(month for month in previous if month not in current)
+    return changed, deleted
+
+
+### Dimension upsert ###
+
+def read_dimension(engine, column):
+    name = f'{column}_dim'
+    if not inspect(engine).has_table(name):
+        return None
+    dim = pd.read_sql(f'SELECT * FROM {name}', engine)
+    if column == PARTITION_COLUMN:
+        dim[column] = pd.to_datetime(dim[column])
+    return dim
+
+
+def upsert_dimension(engine, values, column, method='multi_values', batch_size=etl_loader.DEFAULT_BATCH_SIZE,
+                     key_store=None):
+    """
+    Append members of values that the dimension table does not have yet; existing ids never change.
+
+    New members get the next ids after the table's, or their ids from key_store (etl_keystore) when given,
+    so they match the other load modes. Returns (full dimension frame, number of new members).
+    """
+    name = f'{column}_dim'
+    uniques = pd.Index(pd.unique(values))
+    existing = read_dimension(engine, column)
+
+    if existing is None:
+        dim = etl_main.build_dimension_table(uniques.to_series(), column)
+        if key_store is not None:
+            dim[f'{column}_id'] = key_store.ids_for(column, dim[column])
+        etl_loader.load_table(dim, name, engine, method, batch_size)
+        return dim, len(dim)
+
+    new_members = uniques[pd.Index(existing[column]).get_indexer(uniques) < 0]
+    if len(new_members) == 0:
+        return existing, 0
+
+    new_dim = etl_main.build_dimension_table(new_members.to_series(), column)
+    if key_store is not None:
+        new_dim[f'{column}_id'] = key_store.ids_for(column, new_dim[column])
+    else:
+        next_id = int(existing[f'{column}_id'].max()) + 1 if len(existing) else 0
+        new_dim[f'{column}_id'] += next_id
+    etl_loader.insert_rows(new_dim[list(existing.columns)], name, engine, method, batch_size)
+    return pd.concat([existing, new_dim[list(existing.columns)]], ignore_index=True), len(new_dim)
+
+
+### Incremental run ###
+
+def _delete_all(engine):
+    with engine.begin() as connection:
+        return etl_db.affected_rows(connection.execute(text('DELETE FROM loans_fact')))
+
+
+def _delete_months(engine, issue_d_dim, months):
+    if not months or issue_d_dim is None or not inspect(engine).has_table('loans_fact'):
+        return 0
+    dim_months = issue_d_dim[PARTITION_COLUMN].dt.strftime('%Y-%m')
+    ids = [int(i) for i in issue_d_dim.loc[dim_months.isin(months), 'issue_d_id']]
+    if not ids:
+        return 0
+    with engine.begin() as connection:
+        result = connection.execute(text(f"DELETE FROM loans_fact WHERE issue_d_id IN ({', '.join(map(str, ids))})"))
+        return etl_db.affected_rows(result)
+
+
+def run_incremental_load(engine, df_prepared, state_path=DEFAULT_STATE_PATH, method='multi_values',
+                         batch_size=etl_loader.DEFAULT_BATCH_SIZE, key_store=None):
+    """
+    Load only the issue_d months whose checksum changed since the last successful run.
+
+    key_store: persistent surrogate keys (etl_keystore) for new dimension members
+
+    Returns a summary dict: months, changed, deleted, rows_deleted, rows_loaded, new_members, full_reload.
+    """
+    state = load_partition_state(state_path)
+    previous = state.get('partitions', {})
+    has_fact = inspect(engine).has_table('loans_fact')
+    if previous and not has_fact:
+        print("⚠️  loans_fact not found, reloading every partition")
+        previous = {}
+    # Without state the table may hold rows of any month (e.g. from a full load), so all of them are replaced
+    full_reload = not previous and has_fact
+    if full_reload:
+        print(f"⚠️  No partition state ({state_path}), replacing every loans_fact row")
+
+    current = partition_checksums(df_prepared)
+    changed, deleted = plan_partitions(current, previous)
+    print(f"✅ {len(current)} partitions, {len(changed)} changed, {len(deleted)} removed "
+          f"(watermark {state.get('watermark')})")
+
+    # Only members of the changed partitions can be new to the dimensions
+    codes, months = month_codes(df_prepared[PARTITION_COLUMN])
+    changed_set = set(changed)
+    changed_codes = [index for index, month in enumerate(months) if month in changed_set]
+    delta = df_prepared[np.isin(codes, changed_codes)]
+
+    dimensions = {}
+    new_members = {}
+    for column in etl_main.DIMENSION_COLUMNS:
+        if column in delta.columns:
+            dimensions[column], new_members[f'{column}_dim'] = upsert_dimension(engine, delta[column], column,
+                                                                                method, batch_size, key_store)
+
+    issue_d_dim = dimensions.get(PARTITION_COLUMN)
+    if issue_d_dim is None:
+        issue_d_dim = read_dimension(engine, PARTITION_COLUMN)
+    rows_deleted = _delete_all(engine) if full_reload else _delete_months(engine, issue_d_dim, changed + deleted)
+
+    rows_loaded = 0
+    if len(delta):
+        loans_fact = delta.copy()
+        for column, dim in dimensions.items():
+            loans_fact[f'{column}_id'] = etl_main.lookup_surrogate_ids(dim, column, loans_fact[column])
+        loans_fact = loans_fact[[col for col in etl_main.FACT_COLUMNS if col in loans_fact.columns]]
+        etl_loader.create_table(loans_fact, 'loans_fact', engine, if_exists='append')
+        stats = etl_loader.insert_rows(loans_fact, 'loans_fact', engine, method, batch_size)
+        rows_loaded = stats['rows']
+        print(f"✅ loans_fact delta loaded ({etl_loader.format_load_stats(stats)})")
+
+    # State moves forward only after the database work succeeded
+    save_partition_state(current, state_path)
+    return {
+        'months': len(current),
+        'changed': changed,
+        'deleted': deleted,
+        'rows_deleted': rows_deleted,
+        'rows_loaded': rows_loaded,
+        'new_members': new_members,
+        'full_reload': full_reload,
+    }
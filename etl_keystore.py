@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Surrogate key store ถาวรสำหรับ dimension tables (SQLite file ภายในเครื่อง)
+
+natural key -> surrogate id ของแต่ละ dimension ถูกเก็บข้ามรอบการรัน id จึงไม่เลื่อนเมื่อข้อมูลเปลี่ยน
+member ใหม่ได้ id ต่อท้าย (max + 1) โดยไม่ต้อง rebuild และ lookup ทำแบบ vectorized ด้วย Index.get_indexer
+"""
+
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_KEYSTORE_PATH = 'state/surrogate_keys.db'
+
+
+def natural_keys(uniques):
+    # Text form of each member; dates keep a fixed ISO format so reruns produce the same key
+    uniques = pd.Series(uniques)
+    if pd.api.types.is_datetime64_any_dtype(uniques):
+        return pd.Index(uniques.dt.strftime('%Y-%m-%dT%H:%M:%S'))
+    return pd.Index(uniques.astype(str))
+
+
+class SurrogateKeyStore:
+    """Key map ต่อ dimension: id เริ่มที่ 0 เรียงตามลำดับที่พบครั้งแรกและไม่ถูกนำกลับมาใช้ซ้ำ"""
+
+    def __init__(self, path=DEFAULT_KEYSTORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS key_map ('
+            ' dimension TEXT NOT NULL, natural_key TEXT NOT NULL, surrogate_id INTEGER NOT NULL,'
+            ' PRIMARY KEY (dimension, natural_key))')
+        self.connection.commit()
+        self._members = {}
+
+    def members(self, dimension):
+        # Natural keys in id order; ids are dense so a key's position is its id
+        if dimension not in self._members:
+            rows = self.connection.execute(
+                'SELECT natural_key FROM key_map WHERE dimension = ? ORDER BY surrogate_id', (dimension,))
+            self._members[dimension] = pd.Index([row[0] for row in rows], dtype=object)
+        return self._members[dimension]
+
+    def ids_for(self, dimension, values):
+        """
+        Surrogate id of every value, appending ids for members the store has not seen yet.
+        """
+        codes, uniques = pd.factorize(pd.Series(values))
+        if (codes < 0).any():
+            raise ValueError(f"Null natural key in dimension {dimension}")
+
+        keys = natural_keys(uniques)
+        members = self.members(dimension)
+        positions = members.get_indexer(keys)
+        new_keys = keys[positions < 0]
+        if len(new_keys):
+            start = len(members)
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT INTO key_map (dimension, natural_key, surrogate_id) VALUES (?, ?, ?)',
+                    [(dimension, key, start + offset) for offset, key in enumerate(new_keys)])
+            members = members.append(pd.Index(new_keys, dtype=object))
+            self._members[dimension] = members
+            positions = members.get_indexer(keys)
+        return positions.astype(np.int64)[codes]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Bulk loader สำหรับ star schema (แทน DataFrame.to_sql แบบ default)
+
+Methods:
+    to_sql        - pandas default, one parameterized INSERT per row (baseline)
+    multi_values  - multi-row INSERT ... VALUES (...), (...) batches sized to the driver parameter limit
+    executemany   - raw DBAPI cursor.executemany() in batches of batch_size rows
+    staging_file  - write a staging file delimited by ASCII control characters, then bcp it in (MSSQL with
+                    a trusted connection) or stream it back through executemany (SQL logins, other dialects,
+                    e.g. SQLite as a local stand-in)
+    arrow         - hand the frame's Arrow buffers to the database (DuckDB, see etl_backends); targets without
+                    an Arrow ingestion API use executemany
+
+Every load reports rows/second so the methods can be compared per table.
+"""
+
+import csv
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import MetaData, Table
+
+import etl_db
+import etl_dtypes
+
+LOAD_METHODS = ('to_sql', 'multi_values', 'executemany', 'staging_file', 'arrow')
+
+DEFAULT_BATCH_SIZE = 5000
+
+# SQL Server rejects statements with more than 2100 parameters or 1000 VALUES rows
+MAX_STATEMENT_PARAMETERS = 2000
+MAX_VALUES_ROWS = 1000
+
+# Staging file terminators: ASCII unit / record separators, which loan data never contains, so no escaping
+FIELD_TERMINATOR = '\x1f'
+ROW_TERMINATOR = '\x1e'
+
+
+def _quote(engine, name):
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def _insert_statement(engine, table_name, columns, rows=1):
+    # pymssql binds %s; SQLite's qmark and DuckDB's numeric_dollar drivers both accept ?
+    placeholder = '%s' if engine.dialect.paramstyle in ('format', 'pyformat') else '?'
+    column_list = ', '.join(_quote(engine, column) for column in columns)
+    values = ', '.join(['(' + ', '.join([placeholder] * len(columns)) + ')'] * rows)
+    return f'INSERT INTO {_quote(engine, table_name)} ({column_list}) VALUES {values}'
+
+
+def _python_columns(df):
+    # DBAPI drivers bind Python scalars, not NumPy ones; NaN/NaT become NULL
+    columns = []
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = np.array(series.dt.to_pydatetime(), dtype=object)
+        elif series.dtype == np.float32:
+            # Downcast DECIMAL columns (etl_dtypes) are bound as their decimal value
+            values = etl_dtypes.exact_float64(series.to_numpy()).astype(object)
+        else:
+            values = series.to_numpy(dtype=object, copy=True)
+        values[pd.isna(series).to_numpy()] = None
+        columns.append(values.tolist())
+    return columns
+
+
+def iter_row_batches(df, batch_size):
+    for start in range(0, len(df), batch_size):
+        yield list(zip(*_python_columns(df.iloc[start:start + batch_size])))
+
+
+def values_batch_rows(column_count):
+    # Rows per multi-row VALUES statement that keep the parameter count under the driver limit
+    return max(1, min(MAX_VALUES_ROWS, MAX_STATEMENT_PARAMETERS // max(column_count, 1)))
+
+
+def create_table(df, table_name, engine, if_exists='replace'):
+    # Let pandas map dtypes to SQL types, but only for the empty schema; downcast columns keep their full types
+    if if_exists == 'replace':
+        # Dropped by name: pandas would reflect the old table first, which duckdb-engine cannot do
+        Table(table_name, MetaData()).drop(engine, checkfirst=True)
+    etl_dtypes.widen_frame(df.head(0)).to_sql(table_name, con=engine, if_exists=if_exists, index=False)
+
+
+def _load_to_sql(df, table_name, engine, batch_size):
+    df = etl_dtypes.widen_frame(df)
+    df.to_sql(table_name, con=engine, if_exists='append', index=False, chunksize=batch_size)
+    return -(-len(df) // batch_size) if len(df) else 0
+
+
+def _load_multi_values(df, table_name, engine, batch_size):
+    # The statement text is built once per batch shape, parameters are bound flat
+    rows = min(batch_size, values_batch_rows(len(df.columns)))
+    columns = list(df.columns)
+    statements = {}
+    count = 0
+    with engine.begin() as connection:
+        cursor = connection.connection.cursor()
+        try:
+            for batch in iter_row_batches(df, rows):
+                if len(batch) not in statements:
+                    statements[len(batch)] = _insert_statement(engine, table_name, columns, len(batch))
+                cursor.execute(statements[len(batch)], tuple(value for row in batch for value in row))
+                count += 1
+        finally:
+            cursor.close()
+    return count
+
+
+def _executemany(engine, statement, batches):
+    count = 0
+    with engine.begin() as connection:
+        cursor = connection.connection.cursor()
+        try:
+            for rows in batches:
+                cursor.executemany(statement, rows)
+                count += 1
+        finally:
+            cursor.close()
+    return count
+
+
+def _load_executemany(df, table_name, engine, batch_size):
+    statement = _insert_statement(engine, table_name, list(df.columns))
+    return _executemany(engine, statement, iter_row_batches(df, batch_size))
+
+
+def _staging_frame(df):
+    # bcp -c has no escape character and BIT columns take 0/1, not True/False
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.infer_dtype(series, skipna=True) == 'boolean':
+            columns[column] = series.astype('Int8')
+        elif not pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_datetime64_any_dtype(series):
+            if series.astype('string').str.contains(f'[{FIELD_TERMINATOR}{ROW_TERMINATOR}]', na=False).any():
+                raise ValueError(f"Column {column} contains a staging file terminator (\\x1f or \\x1e)")
+    return df.assign(**columns) if columns else df
+
+
+def _write_staging_file(df, path):
+    # No header, empty field = NULL: the character format bcp -c expects, with control-character terminators
+    _staging_frame(df).to_csv(path, sep=FIELD_TERMINATOR, header=False, index=False, na_rep='',
+                              date_format='%Y-%m-%d %H:%M:%S', lineterminator=ROW_TERMINATOR,
+                              quoting=csv.QUOTE_NONE, encoding='utf-8')
+
+
+def _iter_staging_records(path, block_size=1 << 20):
+    with open(path, newline='', encoding='utf-8') as f:
+        pending = ''
+        for block in iter(lambda: f.read(block_size), ''):
+            *records, pending = (pending + block).split(ROW_TERMINATOR)
+            yield from records
+        if pending:
+            yield pending
+
+
+def _iter_staging_batches(path, batch_size):
+    batch = []
+    for record in _iter_staging_records(path):
+        batch.append(tuple(value if value != '' else None for value in record.split(FIELD_TERMINATOR)))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bcp_command(engine, table_name, path, batch_size):
+    # Trusted connection (-T) only: a -P password would show in the process list and CI logs
+    url = engine.url
+    return ['bcp', f'{url.database}.dbo.{table_name}', 'in', path, '-S', url.host, '-T', '-c',
+            '-t', f'0x{ord(FIELD_TERMINATOR):02x}', '-r', f'0x{ord(ROW_TERMINATOR):02x}', '-b',
+            str(batch_size)]
+
+
+def _load_staging_file(df, table_name, engine, batch_size):
+    staging_dir = tempfile.mkdtemp(prefix='etl_staging_')
+    try:
+        path = os.path.join(staging_dir, f'{table_name}.dat')
+        _write_staging_file(df, path)
+
+        # A SQL login's password is never handed to bcp; such engines insert the file through the driver
+        if engine.dialect.name == 'mssql' and not engine.url.password and shutil.which('bcp'):
+            subprocess.run(_bcp_command(engine, table_name, path, batch_size), check=True, capture_output=True)
+            return -(-len(df) // batch_size) if len(df) else 0
+
+        statement = _insert_statement(engine, table_name, list(df.columns))
+        return _executemany(engine, statement, _iter_staging_batches(path, batch_size))
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def _load_arrow(df, table_name, engine, batch_size):
+    import etl_backends  # etl_backends builds its views from etl_aggregates, which imports this module
+    backend = etl_backends.backend_for(engine)
+    if backend.zero_copy:
+        with engine.begin() as connection:
+            backend.ingest(connection, df, table_name)
+        return 1
+    # SQLite and pymssql only bind Python values, which the NumPy column path builds fastest
+    return _load_executemany(df, table_name, engine, batch_size)
+
+
+_LOADERS = {
+    'to_sql': _load_to_sql,
+    'multi_values': _load_multi_values,
+    'executemany': _load_executemany,
+    'staging_file': _load_staging_file,
+    'arrow': _load_arrow,
+}
+
+
+def insert_rows(df, table_name, engine, method='multi_values', batch_size=DEFAULT_BATCH_SIZE):
+    # Insert into an existing table; returns the same stats dict as load_table()
+    if method not in _LOADERS:
+        raise ValueError(f"Unknown load method: {method} (expected one of {', '.join(LOAD_METHODS)})")
+
+    start = time.perf_counter()
+    batches = _LOADERS[method](df, table_name, engine, batch_size) if len(df) else 0
+    seconds = time.perf_counter() - start
+    return {
+        'table': table_name,
+        'method': method,
+        'rows': len(df),
+        'batches': batches,
+        'seconds': seconds,
+        'rows_per_sec': len(df) / seconds if seconds > 0 else float('inf'),
+        'worker': threading.current_thread().name,
+    }
+
+
+def batch_method(method):
+    # Method used by insert_batch(): to_sql and bcp manage their own connections, so they fall back to executemany
+    return method if method in ('multi_values', 'executemany', 'arrow') else 'executemany'
+
+
+def insert_batch(connection, df, table_name, engine, method='multi_values'):
+    """
+    Insert df through an open connection, inside the caller's transaction.
+
+    Lets a caller commit a batch together with its own bookkeeping (see etl_checkpoint). Returns statements run.
+    """
+    if method not in _LOADERS:
+        raise ValueError(f"Unknown load method: {method} (expected one of {', '.join(LOAD_METHODS)})")
+    if method == 'arrow':
+        # Zero-copy backends (DuckDB) read the Arrow buffers; the others bind rows through executemany below
+        import etl_backends
+        backend = etl_backends.backend_for(engine)
+        if backend.zero_copy:
+            backend.ingest(connection, df, table_name)
+            return 1
+    columns = list(df.columns)
+    cursor = connection.connection.cursor()
+    try:
+        if batch_method(method) != 'multi_values':
+            cursor.executemany(_insert_statement(engine, table_name, columns),
+                               list(zip(*_python_columns(df))))
+            return 1
+        count = 0
+        for batch in iter_row_batches(df, values_batch_rows(len(columns))):
+            cursor.execute(_insert_statement(engine, table_name, columns, len(batch)),
+                           tuple(value for row in batch for value in row))
+            count += 1
+        return count
+    finally:
+        cursor.close()
+
+
+def load_table(df, table_name, engine, method='multi_values', batch_size=DEFAULT_BATCH_SIZE, if_exists='replace'):
+    """
+    Create (or replace/append to) table_name and bulk insert df with the chosen method.
+
+    Returns {'table', 'method', 'rows', 'batches', 'seconds', 'rows_per_sec', 'worker'}.
+    """
+    if method not in _LOADERS:
+        raise ValueError(f"Unknown load method: {method} (expected one of {', '.join(LOAD_METHODS)})")
+
+    start = time.perf_counter()
+    create_table(df, table_name, engine, if_exists)
+    stats = insert_rows(df, table_name, engine, method, batch_size)
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_sec'] = len(df) / stats['seconds'] if stats['seconds'] > 0 else float('inf')
+    return stats
+
+
+def load_star_schema(engine, dimensions, loans_fact, method='multi_values', batch_size=DEFAULT_BATCH_SIZE,
+                     if_exists='replace'):
+    # Dimensions first so the fact table's surrogate ids always have their members
+    stats = []
+    for name, dim in dimensions.items():
+        stats.append(load_table(dim, name, engine, method, batch_size, if_exists))
+        print(f"✅ {name} loaded ({format_load_stats(stats[-1])})")
+    stats.append(load_table(loans_fact, 'loans_fact', engine, method, batch_size, if_exists))
+    print(f"✅ loans_fact loaded ({format_load_stats(stats[-1])})")
+    return stats
+
+
+def partition_frame(df, partitions):
+    # Contiguous row ranges, so partition i always holds the same rows for a given frame
+    bounds = np.linspace(0, len(df), max(1, partitions) + 1).astype(int)
+    return [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def load_star_schema_parallel(engine, dimensions, loans_fact, method='multi_values', batch_size=DEFAULT_BATCH_SIZE,
+                              workers=3, fact_partitions=4, if_exists='replace', table_suffix=''):
+    """
+    Load the dimensions concurrently, then the fact table in partitioned parallel batches.
+
+    The fact load starts only after every dimension load has committed. table_suffix loads into renamed
+    tables (e.g. the shadow tables of etl_swap). Returns
+    {'tables': [per table/partition stats], 'workers': {worker: seconds}, 'seconds': wall time}.
+    """
+    start = time.perf_counter()
+    workers = max(1, min(workers, etl_db.max_connections(engine)))
+    fact_table = 'loans_fact' + table_suffix
+    stats = []
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='etl-load') as executor:
+        futures = [executor.submit(load_table, dim, name + table_suffix, engine, method, batch_size, if_exists)
+                   for name, dim in dimensions.items()]
+        for future in futures:
+            stats.append(future.result())
+            print(f"✅ {stats[-1]['table']} loaded ({format_load_stats(stats[-1])}) [{stats[-1]['worker']}]")
+
+        create_table(loans_fact, fact_table, engine, if_exists)
+        partitions = partition_frame(loans_fact, fact_partitions)
+        futures = [executor.submit(insert_rows, part, fact_table, engine, method, batch_size)
+                   for part in partitions]
+        for index, future in enumerate(futures):
+            part_stats = future.result()
+            part_stats['partition'] = index
+            stats.append(part_stats)
+            print(f"✅ {fact_table} partition {index + 1}/{len(partitions)} loaded "
+                  f"({format_load_stats(part_stats)}) [{part_stats['worker']}]")
+
+    return {'tables': stats, 'workers': summarize_workers(stats), 'seconds': time.perf_counter() - start}
+
+
+def summarize_workers(stats):
+    busy = {}
+    for entry in stats:
+        busy[entry['worker']] = busy.get(entry['worker'], 0.0) + entry['seconds']
+    return busy
+
+
+def format_timing_breakdown(result):
+    lines = ["Load timing breakdown:"]
+    tables = {}
+    for entry in result['tables']:
+        total = tables.setdefault(entry['table'], {'rows': 0, 'seconds': 0.0})
+        total['rows'] += entry['rows']
+        total['seconds'] += entry['seconds']
+    # One name column wide enough for the longest table (e.g. loans_fact__shadow) or worker name
+    width = max(len(name) for name in [*tables, *result['workers'], 'wall time'])
+    for table, total in tables.items():
+        lines.append(f"   {table:<{width}} {total['rows']:>12,} rows {total['seconds']:8.2f}s (summed over workers)")
+    for worker, seconds in sorted(result['workers'].items()):
+        lines.append(f"   {worker:<{width}} busy {seconds:8.2f}s")
+    lines.append(f"   {'wall time':<{width}} {result['seconds']:8.2f}s")
+    return '\n'.join(lines)
+
+
+def format_load_stats(stats):
+    return (f"{stats['rows']:,} rows in {stats['seconds']:.2f}s, "
+            f"{stats['rows_per_sec']:,.0f} rows/s via {stats['method']}")
@@ -1,185 +1,631 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-import re
+import argparse
+import io
+import os
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
-import urllib
+import yaml
+
+import etl_metrics
+import etl_transform
 import warnings
 warnings.filterwarnings('ignore')
 
 ### กำหนด data type ที่เหมาะสมกับ attribute values (Custom data types) ###
 
-def guess_column_types(file_path, delimiter=',', has_headers=True):
+DATETIME_PATTERN = r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}'
+DATE_PATTERN = r'\d{4}-\d{2}-\d{2}'
+
+# Number of leading values checked before a pattern is tested on the whole column
+PROBE_SIZE = 1000
+
+# Byte layout of "YYYY-MM-DD HH:MM:SS": positions that must be digits and fixed separators
+_DATE_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9]
+_DATE_SEPARATORS = {4: b'-', 7: b'-'}
+_TIME_DIGITS = [11, 12, 14, 15, 17, 18]
+_TIME_SEPARATORS = {10: b' ', 13: b':', 16: b':'}
+
+
+def _match_date_patterns(values):
+    # Returns (all values match DATE_PATTERN, all values match DATETIME_PATTERN) with the
+    # same semantics as re.match(pattern, str(value)), using one fixed-width byte pass.
+    text = values.astype(str).to_numpy(dtype=object)
     try:
-        # Read the CSV file using the specified delimiter and header settings
-        df = pd.read_csv(file_path, sep=delimiter,low_memory=False, header=0 if has_headers else None)
+        raw = np.asarray(text, dtype='S19')
+    except UnicodeEncodeError:
+        # Non-ASCII text may hold Unicode digits that \d accepts, so defer to the regex
+        text = pd.Series(text, dtype=object)
+        is_date = bool(text.str.match(DATE_PATTERN).all())
+        return is_date, is_date and bool(text.str.match(DATETIME_PATTERN).all())
 
-        # Initialize a dictionary to store column data types
-        column_types = {}
+    chars = raw.view(np.uint8).reshape(len(raw), 19)
+    digits = (chars >= ord('0')) & (chars <= ord('9'))
 
-        # Loop through columns and infer data types
-        for column in df.columns:
-            # sample_values = df[column].dropna().sample(min(5, len(df[column])), random_state=42)
+    is_date = digits[:, _DATE_DIGITS].all() and all(
+        (chars[:, pos] == ord(sep)).all() for pos, sep in _DATE_SEPARATORS.items())
+    if not is_date:
+        return False, False
+    is_datetime = digits[:, _TIME_DIGITS].all() and all(
+        (chars[:, pos] == ord(sep)).all() for pos, sep in _TIME_SEPARATORS.items())
+    return True, bool(is_datetime)
 
-            # Check for datetime format "YYYY-MM-DD HH:MM:SS"
-            is_datetime = all(re.match(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', str(value)) for value in df[column])
 
-            # Check for date format "YYYY-MM-DD"
-            is_date = all(re.match(r'\d{4}-\d{2}-\d{2}', str(value)) for value in df[column])
+def infer_column_type(series):
+    # Numeric and boolean columns can never render as "YYYY-MM-DD", and a null
+    # renders as "nan"/"None" which fails both patterns, so neither needs a scan.
+    maybe_date = not (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series))
+    if maybe_date and series.isna().any():
+        maybe_date = False
 
-            # Assign data type based on format detection
-            if is_datetime:
-                inferred_type = 'datetime64'
-            elif is_date:
-                inferred_type = 'date'
-            else:
-                inferred_type = pd.api.types.infer_dtype(df[column], skipna=True)
+    # Stop early when the leading values already break the date pattern
+    if maybe_date and not _match_date_patterns(series.iloc[:PROBE_SIZE])[0]:
+        maybe_date = False
 
-            column_types[column] = inferred_type
+    if maybe_date:
+        is_date, is_datetime = _match_date_patterns(series)
+        if is_datetime:
+            return 'datetime64'
+        if is_date:
+            return 'date'
+
+    return pd.api.types.infer_dtype(series, skipna=True)
+
+
+def infer_column_types(df):
+    return {column: infer_column_type(df[column]) for column in df.columns}
+
+
+def guess_column_types(file_path, delimiter=',', has_headers=True, sample_size=None, chunk_size=10000,
+                       confirm=False, cache=None):
+    # cache: etl_schema_cache.SchemaCache; an unchanged file layout skips inference altogether
+    if cache is not None:
+        result, column_types, _ = cache.column_types(
+            file_path, lambda: guess_column_types(file_path, delimiter, has_headers, sample_size, chunk_size,
+                                                  confirm) + (None,),
+            delimiter, has_headers, settings={'sample_size': sample_size, 'confirm': confirm})
+        return (result, column_types)
+
+    # Sampling mode: bounded memory, see sample_column_types() for the confidence report
+    if sample_size:
+        result, column_types, _ = sample_column_types(file_path, delimiter, has_headers, sample_size=sample_size,
+                                                      chunk_size=chunk_size, confirm=confirm)
+        return (result, column_types)
+
+    try:
+        # Read the CSV file using the specified delimiter and header settings
+        df = pd.read_csv(file_path, sep=delimiter,low_memory=False, header=0 if has_headers else None)
+
+        # Infer data types column by column with vectorized pattern checks
+        column_types = infer_column_types(df)
 
         return (True, column_types)  # Return success and column types
     except pd.errors.ParserError as e:
         return (False, str(e))  # Return error message
 
 
-def main():
+### Sample-based type inference (memory ไม่ขึ้นกับขนาดไฟล์) ###
+
+INTEGER_PATTERN = r'\s*[+-]?\d+\s*'
+BOOLEAN_VALUES = ['True', 'TRUE', 'true', 'False', 'FALSE', 'false']
+
+
+def _read_raw_chunks(file_path, delimiter, has_headers, chunk_size):
+    # Raw text chunks: values keep their original spelling so the sample can be re-parsed exactly
+    return pd.read_csv(file_path, sep=delimiter, header=0 if has_headers else None, dtype=str,
+                       chunksize=chunk_size)
+
+
+def _reservoir_sample(chunks, sample_size, method, rng):
+    # Algorithm R applied chunk by chunk; only the reservoir and one chunk are ever in memory
+    reservoir = None
+    columns = None
+    filled = 0
+    seen = 0
+
+    for chunk in chunks:
+        if reservoir is None:
+            columns = chunk.columns
+            reservoir = np.empty((sample_size, len(columns)), dtype=object)
+
+        take = min(sample_size - filled, len(chunk))
+        if take > 0:
+            reservoir[filled:filled + take] = chunk.iloc[:take].to_numpy(dtype=object)
+            filled += take
+
+        rest = len(chunk) - take
+        if rest > 0 and method == 'reservoir':
+            positions = np.arange(seen + take, seen + len(chunk))
+            slots = rng.integers(0, positions + 1)
+            chosen = np.flatnonzero(slots < sample_size)
+            if len(chosen):
+                # A later row overwrites an earlier one drawn for the same slot
+                last_first = chosen[::-1]
+                unique_slots, first_index = np.unique(slots[last_first], return_index=True)
+                rows = last_first[first_index] + take
+                reservoir[unique_slots] = chunk.iloc[rows].to_numpy(dtype=object)
+        seen += len(chunk)
+
+        if method == 'head' and filled >= sample_size:
+            break
+
+    if reservoir is None:
+        return pd.DataFrame(), 0
+    return pd.DataFrame(reservoir[:filled], columns=columns), seen
+
+
+def _parse_sample(raw_sample, delimiter):
+    # Round-trip the raw sample through the C parser so dtypes match a full pd.read_csv()
+    buffer = io.StringIO()
+    raw_sample.to_csv(buffer, sep=delimiter, index=False)
+    buffer.seek(0)
+    typed = pd.read_csv(buffer, sep=delimiter, low_memory=False)
+    typed.columns = raw_sample.columns
+    return typed
+
+
+def _sample_confidence(non_null, complete):
+    # Rule of three: n conforming observations bound the non-conforming share below 3/n (95%)
+    if complete:
+        return 1.0
+    if non_null == 0:
+        return 0.0
+    return round(max(0.0, 1.0 - 3.0 / non_null), 4)
+
+
+def _column_evidence(raw, evidence):
+    # Update which type labels are still possible for one raw text column chunk
+    not_null = raw.notna()
+    if not not_null.all():
+        evidence['has_null'] = True
+    values = raw[not_null]
+    if len(values) == 0:
+        return
+    evidence['all_null'] = False
+
+    if not evidence['has_null'] and (evidence['date'] or evidence['datetime']):
+        is_date, is_datetime = _match_date_patterns(values)
+        evidence['date'] = evidence['date'] and is_date
+        evidence['datetime'] = evidence['datetime'] and is_datetime
+    if evidence['integer']:
+        evidence['integer'] = bool(values.str.fullmatch(INTEGER_PATTERN).all())
+    if evidence['numeric'] and not evidence['integer']:
+        evidence['numeric'] = bool(pd.to_numeric(values, errors='coerce').notna().all())
+    if evidence['boolean']:
+        evidence['boolean'] = bool(values.isin(BOOLEAN_VALUES).all())
+
+
+def _label_fits(label, evidence):
+    no_null = not evidence['has_null']
+    if evidence['all_null']:
+        return True
+    if label == 'datetime64':
+        return no_null and evidence['datetime']
+    if label == 'date':
+        return no_null and evidence['date'] and not evidence['datetime']
+    if label == 'integer':
+        return no_null and evidence['integer']
+    if label in ('floating', 'mixed-integer-float'):
+        return evidence['numeric'] or evidence['integer']
+    if label == 'boolean':
+        return evidence['boolean']
+    # string/mixed labels are never too specific: a sample can only over-specialize
+    return True
+
+
+def _label_from_evidence(evidence):
+    no_null = not evidence['has_null']
+    if no_null and evidence['datetime']:
+        return 'datetime64'
+    if no_null and evidence['date']:
+        return 'date'
+    if no_null and evidence['integer']:
+        return 'integer'
+    if evidence['numeric'] or evidence['integer']:
+        return 'floating'
+    if evidence['boolean']:
+        return 'boolean'
+    return 'string'
+
+
+def _new_evidence():
+    return {'has_null': False, 'all_null': True, 'date': True, 'datetime': True,
+            'integer': True, 'numeric': True, 'boolean': True}
+
+
+def _confirm_column_types(chunks, column_types):
+    # Full streaming pass; each check is dropped for a column as soon as it fails once
+    evidence = {column: _new_evidence() for column in column_types}
+    for chunk in chunks:
+        for column in chunk.columns:
+            _column_evidence(chunk[column], evidence[column])
+
+    confirmed = {}
+    for column, label in column_types.items():
+        confirmed[column] = label if _label_fits(label, evidence[column]) else _label_from_evidence(evidence[column])
+    return confirmed
+
+
+def revalidate_column_types(raw_sample, column_types, delimiter=','):
+    """
+    Check known column types against a raw text sample (e.g. of a newer file with the same layout).
+
+    Labels the sample still fits are kept; the columns it contradicts are inferred again from the sample.
+    Returns (column_types, re-inferred columns).
+    """
+    stale = []
+    for column, label in column_types.items():
+        evidence = _new_evidence()
+        _column_evidence(raw_sample[column], evidence)
+        if not _label_fits(label, evidence):
+            stale.append(column)
+    column_types = dict(column_types)
+    if stale:
+        column_types.update(infer_column_types(_parse_sample(raw_sample[stale], delimiter)))
+    return column_types, stale
+
+
+def sample_report(raw_sample, complete=False):
+    # Per-column confidence and sample counts, as reported by sample_column_types()
+    report = {}
+    for column in raw_sample.columns:
+        non_null = int(raw_sample[column].notna().sum())
+        report[column] = {
+            'confidence': _sample_confidence(non_null, complete),
+            'sampled': len(raw_sample),
+            'non_null': non_null,
+            'distinct': int(raw_sample[column].nunique()),
+        }
+    return report
+
+
+def sample_column_types(file_path, delimiter=',', has_headers=True, sample_size=10000, chunk_size=10000,
+                        method='reservoir', confirm=False, random_state=42):
+    """
+    Infer column types from a sample streamed with read_csv(chunksize=...).
+
+    method: 'reservoir' (uniform sample of the whole file) or 'head' (first sample_size rows)
+    confirm: run a second streaming pass that verifies and, if needed, demotes each label
+
+    Returns (True, column_types, report) where report[column] holds 'confidence', 'sampled',
+    'non_null' and 'distinct', or (False, error_message, None).
+    """
+    if method not in ('reservoir', 'head'):
+        raise ValueError(f"Unknown sampling method: {method}")
+
+    try:
+        rng = np.random.default_rng(random_state)
+        chunks = _read_raw_chunks(file_path, delimiter, has_headers, chunk_size)
+        raw_sample, rows_seen = _reservoir_sample(chunks, sample_size, method, rng)
+        complete = rows_seen < sample_size or (method == 'reservoir' and rows_seen == sample_size)
+
+        column_types = infer_column_types(_parse_sample(raw_sample, delimiter))
+
+        if confirm and not complete:
+            chunks = _read_raw_chunks(file_path, delimiter, has_headers, chunk_size)
+            column_types = _confirm_column_types(chunks, column_types)
+            complete = True
+
+        return (True, column_types, sample_report(raw_sample, complete))
+    except pd.errors.ParserError as e:
+        return (False, str(e), None)
+
+
+### Typed read spec: แปลง column types เป็น dtype สำหรับ pd.read_csv ครั้งเดียว ###
+
+# A string column is read as category when its sample has few distinct values
+CATEGORY_MAX_DISTINCT = 1000
+CATEGORY_MAX_RATIO = 0.5
+
+
+def low_cardinality_columns(column_types, report, max_distinct=CATEGORY_MAX_DISTINCT, max_ratio=CATEGORY_MAX_RATIO):
+    # Decided from the sample report of sample_column_types(); no extra pass over the file
+    columns = []
+    for column, label in column_types.items():
+        stats = (report or {}).get(column)
+        if label != 'string' or not stats or not stats.get('non_null'):
+            continue
+        if stats['distinct'] <= max_distinct and stats['distinct'] / stats['non_null'] <= max_ratio:
+            columns.append(column)
+    return columns
+
+
+def categorical_memory_report(df):
+    # Bytes of each category column versus the same values held as plain strings
+    report = {}
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            as_category = int(df[column].memory_usage(deep=True, index=False))
+            as_string = int(df[column].astype(str).memory_usage(deep=True, index=False))
+            report[column] = {'category_bytes': as_category, 'string_bytes': as_string,
+                              'saved_bytes': as_string - as_category}
+    return report
+
+
+def build_read_spec(column_types, report=None, columns=None, categorical=None):
+    """
+    Turn inferred column types into keyword arguments for a single typed pd.read_csv().
+
+    report: sample report from sample_column_types(); integer columns that were not
+            confirmed on the whole file use the nullable Int64 dtype so late nulls still fit
+    columns: optional subset of columns to read (usecols)
+    categorical: string columns to read as pandas category (see low_cardinality_columns)
+    """
+    dtype = {}
+    parse_dates = []
+    selected = [column for column in column_types if columns is None or column in columns]
+
+    for column in selected:
+        label = column_types[column]
+        confirmed = report is None or report.get(column, {}).get('confidence', 0.0) >= 1.0
+        if label in ('datetime64', 'date'):
+            parse_dates.append(column)
+        elif label == 'integer':
+            dtype[column] = 'int64' if confirmed else 'Int64'
+        elif label in ('floating', 'mixed-integer-float', 'empty'):
+            dtype[column] = 'float64'
+        elif label == 'boolean':
+            dtype[column] = 'boolean'
+        elif label == 'string':
+            dtype[column] = 'category' if categorical and column in categorical else 'str'
+
+    spec = {'dtype': dtype, 'parse_dates': parse_dates}
+    if columns is not None:
+        spec['usecols'] = selected
+    return spec
+
+
+def load_typed_csv(file_path, column_types, report=None, delimiter=',', has_headers=True, columns=None,
+                   categorical=None, cache=None, refresh_cache=False):
+    """
+    One typed parse; a sample that missed a late outlier falls back to pandas' own inference.
+
+    cache: optional etl_cache.StagingCache serving the parse from its columnar copy
+    """
+    header = 0 if has_headers else None
+    if cache is None:
+        spec = build_read_spec(column_types, report, columns, categorical)
+    else:
+        # The cache keys on the full-file spec so every column subset is served by one entry
+        spec = build_read_spec(column_types, report, None, categorical)
+        if columns is not None:
+            spec['usecols'] = [column for column in column_types if column in columns]
+
+    def read(**kwargs):
+        if cache is None:
+            return pd.read_csv(file_path, sep=delimiter, header=header, low_memory=False, **kwargs)
+        return cache.read_csv(file_path, refresh=refresh_cache, sep=delimiter, header=header, low_memory=False,
+                              **kwargs)
+
+    try:
+        return read(**spec)
+    except (ValueError, TypeError) as e:
+        print(f"⚠️  Typed read failed ({e}), re-reading without dtype spec")
+        return read(usecols=spec.get('usecols'))
+
+
+### Configuration ###
+
+DEFAULT_CONFIG_PATH = 'config/etl_config.yaml'
+
+
+def load_config(config_path=DEFAULT_CONFIG_PATH):
+    # Missing config file means "use the built-in defaults" so ad-hoc runs keep working
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+### ETL steps ###
+
+DIMENSION_COLUMNS = ['home_ownership', 'loan_status', 'issue_d']
+
+FACT_COLUMNS = ['application_type', 'loan_amnt', 'funded_amnt', 'term', 'int_rate',
+                'installment', 'home_ownership_id', 'loan_status_id', 'issue_d_id',
+                'data_quality_score', 'has_data_issues', 'validation_errors']
+
+
+def filter_columns_by_missing(null_counts, row_count, max_missing_percentage=30):
+    # Step 3 decision from per-column null counts, so merged chunk counts work as well as one frame
+    missing_percentage = null_counts / row_count * 100
+    return missing_percentage[missing_percentage <= max_missing_percentage].index.tolist()
+
+
+def select_columns_by_null_count(null_counts, acceptable_max_null=26):
+    # Step 4 decision: columns whose absolute null count is small enough to drop those rows
+    return null_counts[null_counts <= acceptable_max_null].index.tolist()
+
+
+def transform_data(df, plan=None):
+    # Step 5 transforms applied in place; returns the names of the converted columns
+    plan = etl_transform.compile_transformations() if plan is None else plan
+    return [entry['column'] for entry in etl_transform.apply_plan(df, plan) if entry['applied']]
+
+
+def build_dimension_table(values, column):
+    # values: unique members in first-seen order; the row position is the surrogate id
+    dim = pd.DataFrame({column: pd.Series(values).reset_index(drop=True)})
+    if column == 'issue_d':
+        dim['month'] = dim['issue_d'].dt.month
+        dim['year'] = dim['issue_d'].dt.year
+    dim[f'{column}_id'] = dim.index
+    return dim
+
+
+def build_dimension_tables(df, key_store=None):
+    """
+    Step 6: one dimension per available column, members in first-seen order.
+
+    Without key_store the row position is the id (same rows as drop_duplicates().reset_index(),
+    whether the column is read as object or as category); with a SurrogateKeyStore the ids are the
+    persistent ones from previous runs.
+    """
+    dimensions = {}
+    for column in DIMENSION_COLUMNS:
+        if column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                # The used categories in order of first appearance, found from the integer codes
+                codes = df[column].cat.codes.to_numpy()
+                members = df[column].cat.categories.take(pd.unique(codes[codes >= 0]))
+            else:
+                members = df[column].drop_duplicates()
+            dim = build_dimension_table(members, column)
+            if key_store is not None:
+                dim[f'{column}_id'] = key_store.ids_for(column, dim[column])
+            dimensions[f'{column}_dim'] = dim
+    return dimensions
+
+
+def lookup_surrogate_ids(dim, column, values):
+    # Vectorized lookup: position of each value in the dimension, then that row's id
+    index = pd.Index(dim[column])
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Look up each category once; the codes index straight into the result
+        codes = values.cat.codes.to_numpy()
+        positions = np.append(index.get_indexer(values.cat.categories), -1)[codes]
+    else:
+        positions = index.get_indexer(values)
+    ids = dim[f'{column}_id'].to_numpy()[positions]
+    if (positions < 0).any():
+        return np.where(positions < 0, np.nan, ids)
+    return ids
+
+
+def build_fact_table(df, dimensions):
+    # Step 7: swap each dimension value for its surrogate id and keep the fact columns
+    loans_fact = df.copy()
+    for column in DIMENSION_COLUMNS:
+        dim = dimensions.get(f'{column}_dim')
+        if dim is not None:
+            loans_fact[f'{column}_id'] = lookup_surrogate_ids(dim, column, loans_fact[column])
+
+    available_columns = [col for col in FACT_COLUMNS if col in loans_fact.columns]
+    return loans_fact[available_columns]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Loan data ETL pipeline')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help='ETL config file')
+    parser.add_argument('--env', default=None, help='database.yaml environment (default: $ETL_ENV or development)')
+    parser.add_argument('--backend', choices=['sqlite', 'duckdb'], default=None,
+                        help='load into an embedded warehouse file under output/ instead of the --env database')
+    parser.add_argument('--streaming', action='store_true',
+                        help='process the source in chunks within etl.processing.memory_limit_mb')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='--streaming with the next chunks prepared while earlier ones load (etl.processing)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='load only issue_d months whose content changed since the last run')
+    parser.add_argument('--cdc', action='store_true',
+                        help='write only the loans_fact rows inserted, changed or deleted since the last run')
+    parser.add_argument('--refresh-cache', action='store_true',
+                        help='re-parse the source CSV and overwrite its staging cache entry')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue a failed run from its checkpoints and last committed load batch')
+    return parser.parse_args(argv)
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args([])
+
     # Configuration
-    file_path = 'data/LoanStats_web_small.csv'
-    acceptableMax_null = 26
-    
-    # Database configuration - ปรับให้ใช้ mssql.minddatatech.com
-    server = 'mssql.minddatatech.com'
-    database = 'TestDB'
-    username = 'SA'
-    password = 'Passw0rd123456'
-    
+    config = load_config(args.config)
+    if args.pipelined:
+        # Pipelined execution is a mode of the chunked run
+        args.streaming = True
+        config.setdefault('etl', {}).setdefault('processing', {})['pipelined'] = True
+
+    # Every step is measured; metrics are written and budgets checked even when a step returns early
+    metrics = etl_metrics.PipelineMetrics()
+    try:
+        run_pipeline(args, config, metrics)
+    finally:
+        if metrics.stages:
+            print("\n⏱️  Stage metrics:")
+            print(metrics.format_table())
+        try:
+            paths = etl_metrics.publish(metrics, config)
+            if paths:
+                print(f"✅ Metrics written to {', '.join(paths)}")
+        except etl_metrics.BudgetExceeded as e:
+            print(f"❌ Budget exceeded: {e}")
+            raise
+
+
+def run_pipeline(args, config, metrics):
+    # The CLI is one caller of the staged pipeline API; each node it asks for runs once and is measured
+    import etl_checkpoint
+    import etl_pipeline
+    # Only the full batch run (through Step 8) is checkpointed
+    checkpoint = config.get('etl', {}).get('checkpoint', {})
+    checkpoint_dir = None
+    if (checkpoint.get('enabled', False) or args.resume) and not (args.streaming or args.incremental or args.cdc):
+        checkpoint_dir = checkpoint.get('dir', etl_checkpoint.DEFAULT_CHECKPOINT_DIR)
+    # --backend loads into an embedded warehouse file instead of the database.yaml environment
+    engine = None
+    if args.backend:
+        import etl_backends
+        import etl_db
+        engine = etl_db.create_db_engine(url=etl_backends.get_backend(args.backend).url())
+    pipeline = etl_pipeline.Pipeline(config, metrics=metrics, engine=engine, env=args.env,
+                                     refresh_cache=args.refresh_cache, checkpoint_dir=checkpoint_dir,
+                                     resume=args.resume)
+    # Summary tables are refreshed after every batch, streaming or incremental load
+    aggregates = config.get('etl', {}).get('aggregates', {}).get('enabled', False)
+
     print("=== ETL Pipeline Started ===")
-    
-    # Step 1: Guess column types
-    print("Step 1: Analyzing column types...")
-    result, column_types_or_error = guess_column_types(file_path)
-    
-    if not result:
-        print(f"Error: {column_types_or_error}")
+    try:
+        # A resumed run may not need type inference at all
+        if args.streaming or args.incremental or 'type_inference' in pipeline.pending('load'):
+            pipeline.get('type_inference')
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        return
+
+    if args.streaming:
+        try:
+            pipeline.get('streaming')
+            if aggregates:
+                pipeline.get('streaming_aggregates')
+        except Exception as e:
+            print(f"❌ Streaming ETL failed: {str(e)}")
         return
-    
-    print(f"✅ Column types analyzed: {len(column_types_or_error)} columns")
-    
-    # Step 2: Load raw data
-    print("Step 2: Loading raw data...")
-    raw_df = pd.read_csv(file_path, low_memory=False)
-    print(f"✅ Loaded {len(raw_df):,} rows, {len(raw_df.columns)} columns")
-    
-    # Step 3: Filter columns by missing data percentage
-    print("Step 3: Filtering columns by missing data...")
-    missing_percentage = raw_df.isnull().mean() * 100
-    columns_to_keep = missing_percentage[missing_percentage <= 30].index.tolist()
-    filteredCol_df = raw_df[columns_to_keep]
-    print(f"✅ Kept {len(columns_to_keep)} columns (≤30% missing data)")
-    
-    # Step 4: Filter rows by acceptable null count
-    print("Step 4: Filtering rows by null count...")
-    selected_columns = [col for col in filteredCol_df.columns if filteredCol_df[col].isnull().sum() <= acceptableMax_null]
-    df_selected = filteredCol_df[selected_columns]
-    noNull_df = df_selected.dropna()
-    print(f"✅ Selected {len(selected_columns)} columns, {len(noNull_df):,} clean rows")
-    
-    # Step 5: Data transformation
-    print("Step 5: Transforming data...")
-    df_prepared = noNull_df.copy()
-    
-    # Transform issue_d to datetime
-    if 'issue_d' in df_prepared.columns:
-        df_prepared['issue_d'] = pd.to_datetime(df_prepared['issue_d'], format='%b-%Y')
-        print("✅ Converted issue_d to datetime")
-    
-    # Transform int_rate to float
-    if 'int_rate' in df_prepared.columns and df_prepared['int_rate'].dtype == 'object':
-        df_prepared['int_rate'] = df_prepared['int_rate'].str.rstrip('%').astype('float') / 100.0
-        print("✅ Converted int_rate to float")
-    
-    # Step 6: Create dimension tables
-    print("Step 6: Creating dimension tables...")
-    
-    # Home ownership dimension
-    if 'home_ownership' in df_prepared.columns:
-        home_ownership_dim = df_prepared[['home_ownership']].drop_duplicates().reset_index(drop=True)
-        home_ownership_dim['home_ownership_id'] = home_ownership_dim.index
-        print(f"✅ Home ownership dimension: {len(home_ownership_dim)} records")
-    
-    # Loan status dimension
-    if 'loan_status' in df_prepared.columns:
-        loan_status_dim = df_prepared[['loan_status']].drop_duplicates().reset_index(drop=True)
-        loan_status_dim['loan_status_id'] = loan_status_dim.index
-        print(f"✅ Loan status dimension: {len(loan_status_dim)} records")
-    
-    # Issue date dimension
-    if 'issue_d' in df_prepared.columns:
-        issue_d_dim = df_prepared[['issue_d']].drop_duplicates().reset_index(drop=True)
-        issue_d_dim['month'] = issue_d_dim['issue_d'].dt.month
-        issue_d_dim['year'] = issue_d_dim['issue_d'].dt.year
-        issue_d_dim['issue_d_id'] = issue_d_dim.index
-        print(f"✅ Issue date dimension: {len(issue_d_dim)} records")
-    
-    # Step 7: Create fact table
-    print("Step 7: Creating fact table...")
-    
-    # Create mapping dictionaries
-    home_ownership_map = home_ownership_dim.set_index('home_ownership')['home_ownership_id'].to_dict()
-    loan_status_map = loan_status_dim.set_index('loan_status')['loan_status_id'].to_dict()
-    issue_d_map = issue_d_dim.set_index('issue_d')['issue_d_id'].to_dict()
-    
-    # Create fact table
-    loans_fact = df_prepared.copy()
-    loans_fact['home_ownership_id'] = loans_fact['home_ownership'].map(home_ownership_map)
-    loans_fact['loan_status_id'] = loans_fact['loan_status'].map(loan_status_map)
-    loans_fact['issue_d_id'] = loans_fact['issue_d'].map(issue_d_map)
-    
-    # Select fact columns
-    fact_columns = ['application_type', 'loan_amnt', 'funded_amnt', 'term', 'int_rate', 
-                   'installment', 'home_ownership_id', 'loan_status_id', 'issue_d_id']
-    available_columns = [col for col in fact_columns if col in loans_fact.columns]
-    loans_fact = loans_fact[available_columns]
-    
-    print(f"✅ Fact table created: {len(loans_fact):,} records, {len(available_columns)} columns")
-    
-    # Step 8: Load to database
-    print("Step 8: Loading to database...")
-    
+
+    if args.incremental:
+        pipeline.get('validate')
+        try:
+            pipeline.get('incremental_load')
+            if aggregates:
+                pipeline.get('incremental_aggregates')
+        except Exception as e:
+            print(f"❌ Incremental load failed: {str(e)}")
+        return
+
+    pipeline.get('fact')
     try:
-        # Create database engine
-        engine = create_engine(f'mssql+pymssql://{username}:{password}@{server}/{database}')
-        
-        # Load dimension tables
-        home_ownership_dim.to_sql('home_ownership_dim', con=engine, if_exists='replace', index=False)
-        print("✅ home_ownership_dim loaded")
-        
-        loan_status_dim.to_sql('loan_status_dim', con=engine, if_exists='replace', index=False)
-        print("✅ loan_status_dim loaded")
-        
-        issue_d_dim.to_sql('issue_d_dim', con=engine, if_exists='replace', index=False)
-        print("✅ issue_d_dim loaded")
-        
-        # Load fact table
-        loans_fact.to_sql('loans_fact', con=engine, if_exists='replace', index=False)
-        print("✅ loans_fact loaded")
-        
+        # Step 8 writes the whole star schema, or with --cdc only the changed fact rows
+        pipeline.get('cdc_load' if args.cdc else 'load')
+        if aggregates:
+            pipeline.get('cdc_aggregates' if args.cdc else 'load_aggregates')
         print("=== ETL Pipeline Completed Successfully ===")
-        
     except Exception as e:
         print(f"❌ Database loading failed: {str(e)}")
         return
-    
-    # Display summary
+
+    # Display summary (a resumed run never loaded the stages before its checkpoints)
+    dimensions, loans_fact = pipeline.get('dimensions'), pipeline.get('fact')
     print("\n📊 ETL Summary:")
-    print(f"   Original data: {len(raw_df):,} rows, {len(raw_df.columns)} columns")
-    print(f"   Clean data: {len(noNull_df):,} rows, {len(selected_columns)} columns")
-    print(f"   Home ownership types: {len(home_ownership_dim)}")
-    print(f"   Loan status types: {len(loan_status_dim)}")
-    print(f"   Date range: {len(issue_d_dim)} unique dates")
+    if pipeline.computed('filter'):
+        raw_df, clean_df = pipeline.get('extract'), pipeline.get('filter')
+        print(f"   Original data: {len(raw_df):,} rows, {len(raw_df.columns)} columns")
+        print(f"   Clean data: {len(clean_df):,} rows, {len(clean_df.columns)} columns")
+    print(f"   Home ownership types: {len(dimensions['home_ownership_dim'])}")
+    print(f"   Loan status types: {len(dimensions['loan_status_dim'])}")
+    print(f"   Date range: {len(dimensions['issue_d_dim'])} unique dates")
     print(f"   Final fact table: {len(loans_fact):,} records")
 
 
 if __name__ == "__main__":
-    main()
+    main(parse_args())
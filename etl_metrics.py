@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Stage instrumentation: wall time, CPU time, peak RSS delta และจำนวนแถวเข้า/ออกของแต่ละ step ใน etl_main
+
+ผลถูกเขียนเป็น JSON lines (หนึ่งบรรทัดต่อ stage ต่อ run) และ Prometheus text format
+(สำหรับ node_exporter textfile collector) แล้วตรวจกับ budgets ใน etl_config.yaml:
+etl.validation.max_processing_time (วินาทีของทั้ง run), etl.metrics.budgets.max_rss_mb และ stage_seconds
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import psutil
+
+DEFAULT_JSON_PATH = 'reports/metrics/stages.jsonl'
+DEFAULT_PROMETHEUS_PATH = 'reports/metrics/etl.prom'
+
+# RSS is sampled this often while a stage runs, so short allocation spikes inside a step are seen
+SAMPLE_INTERVAL_SEC = 0.02
+
+
+class BudgetExceeded(RuntimeError):
+    """A stage or the whole run went over its configured time or memory budget"""
+
+    def __init__(self, violations):
+        self.violations = violations
+        super().__init__('; '.join(violations))
+
+
+class _PeakRSS:
+    # Background sampler: the highest RSS seen between start() and stop()
+    def __init__(self, interval=SAMPLE_INTERVAL_SEC):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = self.process.memory_info().rss
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+        return self.peak
+
+
+class PipelineMetrics:
+    """เก็บ metrics ของแต่ละ stage ใน run เดียว"""
+
+    def __init__(self, run_id=None, pipeline='loans_etl'):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.pipeline = pipeline
+        self.started = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Measure the block as one stage; set record['rows_out'] (and rows_in if unknown up front) inside it.
+
+            with metrics.stage('transform', rows_in=len(df)) as record:
+                ...
+                record['rows_out'] = len(df)
+        """
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None, 'status': 'ok'}
+        rss_start = psutil.Process().memory_info().rss
+        sampler = _PeakRSS().start()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        except BaseException:
+            record['status'] = 'failed'
+            raise
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.process_time() - cpu_start
+            peak = sampler.stop()
+            record['peak_rss_mb'] = peak / 1024 ** 2
+            record['peak_rss_delta_mb'] = (peak - rss_start) / 1024 ** 2
+            self.stages.append(record)
+
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def peak_rss_mb(self):
+        return max((record['peak_rss_mb'] for record in self.stages), default=0.0)
+
+    def check_budgets(self, max_total_seconds=None, max_rss_mb=None, stage_seconds=None):
+        """
+        Return a list of budget violations (empty when every budget holds).
+        """
+        violations = []
+        total = self.total_seconds()
+        if max_total_seconds and total > max_total_seconds:
+            violations.append(f"run took {total:.1f}s, budget {max_total_seconds}s")
+        if max_rss_mb and self.peak_rss_mb() > max_rss_mb:
+            violations.append(f"peak RSS {self.peak_rss_mb():.0f} MB, budget {max_rss_mb} MB")
+        for record in self.stages:
+            budget = (stage_seconds or {}).get(record['stage'])
+            if budget and record['wall_seconds'] > budget:
+                violations.append(f"stage {record['stage']} took {record['wall_seconds']:.1f}s, budget {budget}s")
+        return violations
+
+    def enforce_budgets(self, **budgets):
+        violations = self.check_budgets(**budgets)
+        if violations:
+            raise BudgetExceeded(violations)
+
+    def to_json_lines(self):
+        timestamp = datetime.now().isoformat(timespec='seconds')
+        return ''.join(json.dumps(dict(record, run_id=self.run_id, pipeline=self.pipeline, timestamp=timestamp)) + '\n'
+                       for record in self.stages)
+
+    def write_json_lines(self, path=DEFAULT_JSON_PATH):
+        # Appended, so the file keeps the history of every run
+        _make_parent(path)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(self.to_json_lines())
+        return path
+
+    def to_prometheus(self):
+        labels = f'pipeline="{self.pipeline}"'
+        lines = []
+        gauges = [
+            ('etl_stage_wall_seconds', 'Wall-clock seconds spent in the stage', 'wall_seconds'),
+            ('etl_stage_cpu_seconds', 'CPU seconds (user + system) spent in the stage', 'cpu_seconds'),
+            ('etl_stage_peak_rss_delta_bytes', 'Peak RSS growth during the stage', 'peak_rss_delta_mb'),
+            ('etl_stage_rows_in', 'Rows entering the stage', 'rows_in'),
+            ('etl_stage_rows_out', 'Rows leaving the stage', 'rows_out'),
+        ]
+        for metric, description, key in gauges:
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} gauge')
+            for record in self.stages:
+                value = record[key]
+                if value is None:
+                    continue
+                if key == 'peak_rss_delta_mb':
+                    value = int(value * 1024 ** 2)
+                lines.append(f'{metric}{{{labels},stage="{record["stage"]}"}} {value}')
+        # Threads inside a stage (pipelined streaming): busy share of the stage and time spent waiting on a queue
+        workers = [(record['stage'], worker) for record in self.stages for worker in record.get('workers', [])]
+        for metric, description, key in [
+                ('etl_stage_worker_utilization', 'Share of the stage a worker spent busy', 'utilization'),
+                ('etl_stage_worker_wait_seconds', 'Seconds a worker waited on its queue', 'wait_seconds')]:
+            if workers:
+                lines.append(f'# HELP {metric} {description}')
+                lines.append(f'# TYPE {metric} gauge')
+            for stage, worker in workers:
+                lines.append(f'{metric}{{{labels},stage="{stage}",worker="{worker["stage"]}"}} {worker[key]}')
+        lines.append('# HELP etl_run_seconds Wall-clock seconds of the whole run')
+        lines.append('# TYPE etl_run_seconds gauge')
+        lines.append(f'etl_run_seconds{{{labels}}} {self.total_seconds()}')
+        lines.append('# HELP etl_run_success 1 when every stage completed')
+        lines.append('# TYPE etl_run_success gauge')
+        success = int(all(record['status'] == 'ok' for record in self.stages))
+        lines.append(f'etl_run_success{{{labels}}} {success}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path=DEFAULT_PROMETHEUS_PATH):
+        # Replaced atomically so a textfile collector never reads half a file
+        _make_parent(path)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+    def format_table(self):
+        lines = [f"   {'stage':<16} {'wall s':>8} {'cpu s':>8} {'ΔRSS MB':>8} {'rows in':>10} {'rows out':>10}"]
+        for record in self.stages:
+            rows_in = '' if record['rows_in'] is None else f"{record['rows_in']:,}"
+            rows_out = '' if record['rows_out'] is None else f"{record['rows_out']:,}"
+            lines.append(f"   {record['stage']:<16} {record['wall_seconds']:8.2f} {record['cpu_seconds']:8.2f} "
+                         f"{record['peak_rss_delta_mb']:8.1f} {rows_in:>10} {rows_out:>10}")
+        return '\n'.join(lines)
+
+
+def _make_parent(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def publish(metrics, config):
+    """
+    Write the JSON lines and Prometheus files configured under etl.metrics, then enforce the budgets.
+
+    Raises BudgetExceeded after the files are written, so a failed run still leaves its metrics behind.
+    """
+    etl_config = config.get('etl', {})
+    settings = etl_config.get('metrics', {})
+    budgets = settings.get('budgets', {})
+    paths = []
+    if settings.get('json_path', DEFAULT_JSON_PATH):
+        paths.append(metrics.write_json_lines(settings.get('json_path', DEFAULT_JSON_PATH)))
+    if settings.get('prometheus_path', DEFAULT_PROMETHEUS_PATH):
+        paths.append(metrics.write_prometheus(settings.get('prometheus_path', DEFAULT_PROMETHEUS_PATH)))
+    metrics.enforce_budgets(max_total_seconds=etl_config.get('validation', {}).get('max_processing_time'),
+                            max_rss_mb=budgets.get('max_rss_mb'),
+                            stage_seconds=budgets.get('stage_seconds'))
+    return paths
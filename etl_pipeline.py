@@ -0,0 +1,576 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Staged pipeline API: ทุก step ของ etl_main เป็น node ที่คำนวณเมื่อถูกขอเท่านั้นและ cache ผลไว้
+
+    pipeline = Pipeline(config)
+    issue_d_dim = pipeline.get('dimensions')['issue_d_dim']   # ไม่ build fact table และไม่ต่อ database
+
+node ขอ input ของตัวเองก่อนเริ่มจับเวลา metrics ของแต่ละ stage จึงไม่ซ้อนกัน
+เมื่อระบุ checkpoint_dir output ของ etl_checkpoint.CHECKPOINT_NODES ถูกเก็บไว้ และ resume=True ใช้ของเดิมแทนการคำนวณใหม่
+CLI (etl_main.main) และ tests ใช้ API เดียวกันนี้
+"""
+
+from contextlib import contextmanager
+
+import numpy as np
+from sqlalchemy import inspect
+
+import etl_checkpoint
+import etl_db
+import etl_loader
+import etl_main
+import etl_profile
+import etl_swap
+import etl_transform
+import etl_validation
+
+
+class Node:
+    """หนึ่ง stage: function(pipeline, *inputs) และชื่อ node ที่เป็น input"""
+
+    def __init__(self, name, function, inputs=(), rows=None, details=None):
+        self.name = name
+        self.function = function
+        self.inputs = tuple(inputs)
+        # rows(output) -> rows written, for outputs that are not DataFrames
+        self.rows = rows
+        # details(output) -> extra fields for the stage's metrics record
+        self.details = details
+
+
+def _row_count(value):
+    # DataFrame, dict of DataFrames (dimensions) or a tuple led by a DataFrame (validate)
+    if hasattr(value, 'columns') and hasattr(value, 'index'):
+        return len(value)
+    if isinstance(value, dict) and value and all(hasattr(item, 'columns') for item in value.values()):
+        return sum(len(item) for item in value.values())
+    if isinstance(value, tuple) and value:
+        return _row_count(value[0])
+    return None
+
+
+### Stages ###
+
+def resolve_sources(pipeline):
+    # file_path may be a glob (e.g. monthly drops) or data_sources.primary.files a list of them
+    import etl_sources
+    source = pipeline.source
+    return etl_sources.resolve_sources(source.get('files') or source.get('file_path', 'data/LoanStats_web_small.csv'))
+
+
+def infer_types(pipeline, sources):
+    # Step 1: sampled from the first source file; returns (column_types, report)
+    print("Step 1: Analyzing column types...")
+    inference = pipeline.settings('type_inference')
+    options = dict(sample_size=inference.get('sample_size', 10000),
+                   method=inference.get('sample_method', 'head'),
+                   confirm=inference.get('confirm_full_pass', False))
+
+    def sample():
+        return etl_main.sample_column_types(sources[0], pipeline.delimiter, pipeline.has_headers, **options)
+
+    schema_cache = inference.get('schema_cache', {})
+    if schema_cache.get('enabled', False):
+        # An unchanged header and sampled content reuse the stored types (see etl_schema_cache)
+        import etl_schema_cache
+        cache = etl_schema_cache.SchemaCache(schema_cache.get('path', etl_schema_cache.DEFAULT_CACHE_PATH))
+        result, column_types_or_error, type_report = cache.column_types(
+            sources[0], sample, pipeline.delimiter, pipeline.has_headers, settings=options)
+        if result:
+            reinferred = f", re-inferred {', '.join(cache.last_reinferred)}" if cache.last_reinferred else ''
+            print(f"✅ Schema cache {cache.last_status}{reinferred} (total {cache.stats()['total']})")
+    else:
+        result, column_types_or_error, type_report = sample()
+    if not result:
+        raise ValueError(column_types_or_error)
+    print(f"✅ Column types analyzed: {len(column_types_or_error)} columns")
+    return column_types_or_error, type_report
+
+
+def extract(pipeline, sources, column_types):
+    # Step 2: one typed parse (staging cache for one file, a process pool for several files or parts)
+    import etl_sources
+    print("Step 2: Loading raw data...")
+    column_types, type_report = column_types
+    inference = pipeline.settings('type_inference')
+    staging = pipeline.settings('staging_cache')
+    processing = pipeline.settings('processing')
+    categorical = etl_main.low_cardinality_columns(
+        column_types, type_report,
+        inference.get('category_max_distinct', etl_main.CATEGORY_MAX_DISTINCT),
+        inference.get('category_max_ratio', etl_main.CATEGORY_MAX_RATIO))
+
+    cache = None
+    if staging.get('enabled', False):
+        import etl_cache
+        cache = etl_cache.StagingCache(staging.get('dir', etl_cache.DEFAULT_CACHE_DIR),
+                                       staging.get('max_size_mb', etl_cache.DEFAULT_MAX_SIZE_MB))
+    split_bytes = int(processing.get('split_mb', etl_sources.DEFAULT_SPLIT_MB) * 1024 ** 2)
+    tasks = etl_sources.plan_tasks(sources, pipeline.delimiter, pipeline.has_headers, split_bytes)
+    if len(tasks) > 1:
+        # Several files, or one file above split_mb: parse the parts in a process pool
+        cache = None
+        raw_df = etl_sources.load_typed_sources(sources, column_types, type_report, pipeline.delimiter,
+                                                pipeline.has_headers, categorical=categorical,
+                                                workers=processing.get('parse_workers'), split_bytes=split_bytes)
+        print(f"✅ Parsed {len(sources)} files as {len(tasks)} parts in parallel")
+    else:
+        raw_df = etl_main.load_typed_csv(sources[0], column_types, type_report, pipeline.delimiter,
+                                         pipeline.has_headers, categorical=categorical, cache=cache,
+                                         refresh_cache=pipeline.refresh_cache)
+    if cache is not None:
+        print(f"✅ Staging cache {'hit' if cache.hits else 'miss'} ({cache.size_bytes() / 1024 ** 2:.1f} MB cached)")
+    print(f"✅ Loaded {len(raw_df):,} rows, {len(raw_df.columns)} columns")
+    for column, usage in etl_main.categorical_memory_report(raw_df).items():
+        print(f"✅ {column} as category: {usage['category_bytes'] / 1024 ** 2:.2f} MB "
+              f"(saved {usage['saved_bytes'] / 1024 ** 2:.2f} MB vs strings)")
+    return raw_df
+
+
+def profile_columns(pipeline, sources, raw_df):
+    # A saved profile of the same source files is reused, otherwise raw_df is profiled in one pass
+    profile_path = pipeline.settings('profiling').get('output_path', etl_profile.DEFAULT_PROFILE_PATH)
+    profile = etl_profile.load_saved_profile(sources, profile_path)
+    if profile is not None and profile.rows == len(raw_df):
+        print(f"✅ Reused column profile {profile_path}")
+        return profile
+    profile = etl_profile.profile_frame(raw_df, sources, pipeline.settings('processing').get('chunk_size'))
+    if profile_path:
+        profile.save(profile_path)
+    print(f"✅ Profiled {len(profile.columns)} columns -> {profile_path or 'not saved'}")
+    return profile
+
+
+def filter_missing(pipeline, raw_df, profile):
+    # Steps 3 and 4 from the profile's null counts
+    quality = pipeline.settings('data_quality')
+    max_missing_percentage = quality.get('max_missing_percentage', 30)
+    print("Step 3: Filtering columns by missing data...")
+    null_counts = profile.null_counts()
+    columns_to_keep = etl_main.filter_columns_by_missing(null_counts, profile.rows, max_missing_percentage)
+    print(f"✅ Kept {len(columns_to_keep)} columns (≤{max_missing_percentage}% missing data)")
+
+    print("Step 4: Filtering rows by null count...")
+    selected_columns = etl_main.select_columns_by_null_count(null_counts[columns_to_keep],
+                                                             quality.get('acceptable_max_null', 26))
+    noNull_df = raw_df[selected_columns].dropna()
+    print(f"✅ Selected {len(selected_columns)} columns, {len(noNull_df):,} clean rows")
+    return noNull_df
+
+
+def transform(pipeline, noNull_df):
+    # Step 5: the plan converts columns of a shallow copy, so the cached filter output is left as it was
+    print("Step 5: Transforming data...")
+    df_prepared = noNull_df.copy(deep=False)
+    plan = etl_transform.compile_transformations(pipeline.config.get('transformations'))
+    timings = etl_transform.apply_plan(df_prepared, plan)
+    for entry in timings:
+        if entry['applied']:
+            print(f"✅ Converted {entry['column']}")
+    print(etl_transform.format_rule_timings(timings))
+    return df_prepared
+
+
+def validate(pipeline, df_prepared):
+    # Step 5b: returns (valid, quarantine, summary); quarantined rows are written out
+    print("Step 5b: Validating business rules...")
+    quality = pipeline.settings('data_quality')
+    # validate() adds the quality columns in place, so it gets a shallow copy of the cached transform output
+    valid, quarantine, summary = etl_validation.validate(df_prepared.copy(deep=False),
+                                                         pipeline.config.get('business_rules', {}))
+    if len(quarantine):
+        path = etl_validation.write_quarantine(
+            quarantine, quality.get('quarantine_path', etl_validation.DEFAULT_QUARANTINE_PATH))
+        print(f"⚠️  Quarantined {len(quarantine):,} rows violating loans_fact constraints -> {path}")
+    print(f"✅ {summary['rows_with_issues']:,} rows with business rule issues, "
+          f"average quality score {summary['avg_quality_score']:.1f}")
+    return valid, quarantine, summary
+
+
+def plan_dtypes(pipeline):
+    # Column types of the star schema DDL (etl.dtypes); None leaves the frames as they are
+    settings = pipeline.settings('dtypes')
+    if not settings.get('enabled', False):
+        return None
+    import etl_dtypes
+    return etl_dtypes.load_schema(settings.get('schema_sql', etl_dtypes.DEFAULT_SCHEMA_SQL), settings.get('schema'))
+
+
+def _downcast(schema, table, df, categorical=True):
+    import etl_dtypes
+    df, report = etl_dtypes.downcast(df, schema.get(table, {}), table, categorical)
+    print(f"✅ {etl_dtypes.format_report(report)}")
+    return df
+
+
+@contextmanager
+def surrogate_keys(pipeline):
+    # The persistent key store when etl.surrogate_keys.path is set (else None); every load mode assigns ids with it
+    key_path = pipeline.settings('surrogate_keys').get('path')
+    if not key_path:
+        yield None
+        return
+    import etl_keystore
+    print(f"✅ Using persistent surrogate keys from {key_path}")
+    with etl_keystore.SurrogateKeyStore(key_path) as key_store:
+        yield key_store
+
+
+def build_dimensions(pipeline, validated, schema):
+    # Step 6: persistent surrogate keys when etl.surrogate_keys.path is set
+    print("Step 6: Creating dimension tables...")
+    with surrogate_keys(pipeline) as key_store:
+        dimensions = etl_main.build_dimension_tables(validated[0], key_store)
+    for name, dim in dimensions.items():
+        print(f"✅ {name}: {len(dim)} records")
+    if schema is not None:
+        # Members are unique, so only the ids and calendar attributes get smaller
+        dimensions = {name: _downcast(schema, name, dim, categorical=False) for name, dim in dimensions.items()}
+    return dimensions
+
+
+def build_fact(pipeline, validated, dimensions, schema):
+    print("Step 7: Creating fact table...")
+    loans_fact = etl_main.build_fact_table(validated[0], dimensions)
+    print(f"✅ Fact table created: {len(loans_fact):,} records, {len(loans_fact.columns)} columns")
+    if schema is not None:
+        loans_fact = _downcast(schema, 'loans_fact', loans_fact)
+    return loans_fact
+
+
+def create_views(engine):
+    # Embedded warehouses get the star schema views after every load; on SQL Server the DDL owns them
+    import etl_backends
+    views = etl_backends.backend_for(engine).create_views(engine)
+    if views:
+        print(f"✅ Views created: {', '.join(views)}")
+    return views
+
+
+def drop_change_state(pipeline, *modes):
+    # A load in one mode makes the change tracking of the other modes ('cdc', 'incremental') stale,
+    # so their next run starts over from the whole table
+    if 'cdc' in modes:
+        import etl_cdc
+        etl_cdc.drop_index(pipeline.settings('cdc').get('index_path', etl_cdc.DEFAULT_INDEX_PATH))
+    if 'incremental' in modes:
+        import etl_incremental
+        etl_incremental.drop_partition_state(
+            pipeline.settings('incremental').get('state_path', etl_incremental.DEFAULT_STATE_PATH))
+
+
+def load(pipeline, dimensions, loans_fact):
+    # Step 8: dimensions load concurrently, then the fact table in parallel partitions
+    print("Step 8: Loading to database...")
+    loading = pipeline.settings('loading')
+    mode = loading.get('mode', 'replace')
+    if mode not in etl_swap.LOAD_MODES:
+        raise ValueError(f"Unknown load mode: {mode} (expected one of {', '.join(etl_swap.LOAD_MODES)})")
+    options = dict(method=loading.get('method', 'multi_values'),
+                   batch_size=loading.get('batch_size', etl_loader.DEFAULT_BATCH_SIZE),
+                   workers=loading.get('parallel_workers', 3),
+                   fact_partitions=loading.get('fact_partitions', 4))
+    if mode == 'swap':
+        # Live tables stay readable until the loaded shadow tables are swapped in
+        options['table_suffix'] = etl_swap.SHADOW_SUFFIX
+        index_definitions = etl_swap.parse_index_definitions(
+            loading.get('schema_sql', etl_swap.DEFAULT_SCHEMA_SQL))
+    engine = pipeline.database()
+    checkpoints = pipeline.checkpoints
+    progress = None
+    if checkpoints is None:
+        load_result = etl_loader.load_star_schema_parallel(engine, dimensions, loans_fact, **options)
+    else:
+        # Batches commit with their progress, so a failed load can be resumed from the last committed batch
+        progress = etl_checkpoint.LoadProgress(engine, checkpoints.run_key)
+        if not pipeline.resume:
+            # Batches committed by an earlier run of the same key are only skipped with --resume
+            progress.reset()
+        load_result = etl_checkpoint.load_star_schema_resumable(engine, dimensions, loans_fact, progress, **options)
+    print(etl_loader.format_timing_breakdown(load_result))
+    if mode == 'swap':
+        load_result['swap'] = etl_swap.publish_shadow_tables(engine, list(dimensions) + ['loans_fact'],
+                                                             index_definitions)
+    if progress is not None:
+        progress.reset()
+        checkpoints.clear()
+    drop_change_state(pipeline, 'cdc', 'incremental')
+    create_views(engine)
+    return load_result
+
+
+def incremental_load(pipeline, validated):
+    # Alternative to dimensions/fact/load: replace only the issue_d months that changed
+    import etl_incremental
+    print("Step 6-8: Incremental load by issue_d month...")
+    loading = pipeline.settings('loading')
+    with surrogate_keys(pipeline) as key_store:
+        summary = etl_incremental.run_incremental_load(
+            pipeline.database(), validated[0],
+            pipeline.settings('incremental').get('state_path', etl_incremental.DEFAULT_STATE_PATH),
+            method=loading.get('method', 'multi_values'),
+            batch_size=loading.get('batch_size', etl_loader.DEFAULT_BATCH_SIZE), key_store=key_store)
+    print(f"✅ Incremental load: {summary['rows_loaded']:,} rows loaded, {summary['rows_deleted']:,} replaced, "
+          f"new dimension members {summary['new_members']}")
+    drop_change_state(pipeline, 'cdc')
+    create_views(pipeline.database())
+    return summary
+
+
+def cdc_load(pipeline, validated, dimensions, loans_fact):
+    # Alternative to load: only the fact rows whose hash differs from the previous run are written
+    import etl_cdc
+    print("Step 8: Loading changed rows to database...")
+    if not pipeline.settings('surrogate_keys').get('path'):
+        raise ValueError("CDC load needs stable dimension ids (etl.surrogate_keys.path)")
+    cdc = pipeline.settings('cdc')
+    loading = pipeline.settings('loading')
+    key_columns = [column for column in cdc.get('key_columns', etl_cdc.DEFAULT_KEY_COLUMNS)
+                   if column in validated[0].columns]
+    summary = etl_cdc.run_cdc_load(
+        pipeline.database(), loans_fact, validated[0][key_columns] if key_columns else None, dimensions,
+        cdc.get('index_path', etl_cdc.DEFAULT_INDEX_PATH), method=loading.get('method', 'multi_values'),
+        batch_size=loading.get('batch_size', etl_loader.DEFAULT_BATCH_SIZE))
+    print(f"✅ CDC load: {etl_cdc.format_summary(summary)}, new dimension members {summary['new_members']}")
+    drop_change_state(pipeline, 'incremental')
+    create_views(pipeline.database())
+    return summary
+
+
+def build_aggregates(pipeline, dimensions, loans_fact):
+    # Summary tables of vw_loan_summary / vw_monthly_trends from the in-memory fact table
+    import etl_aggregates
+    print("Step 9: Building summary tables...")
+    summaries = etl_aggregates.summarize(loans_fact, dimensions)
+    for name, frame in summaries.items():
+        print(f"✅ {name}: {len(frame):,} groups")
+    return summaries
+
+
+def load_aggregates(pipeline, summaries, load_result):
+    # After Step 8, so the summary tables always describe the loaded fact table
+    import etl_aggregates
+    written = etl_aggregates.refresh_summary_tables(pipeline.database(), summaries,
+                                                    method=pipeline.settings('loading').get('method', 'multi_values'))
+    print(f"✅ Summary tables refreshed ({', '.join(f'{name}: {rows:,}' for name, rows in written.items())})")
+    return written
+
+
+def incremental_aggregates(pipeline, validated, summary):
+    # Only the months the incremental load replaced are recomputed and rewritten
+    import etl_aggregates
+    import etl_incremental
+    engine = pipeline.database()
+    months = summary['changed'] + summary['deleted']
+    df = validated[0]
+    if summary['full_reload']:
+        print("⚠️  Every loans_fact row was replaced, rebuilding every month")
+        months = None
+    elif all(inspect(engine).has_table(table) for table in etl_aggregates.SUMMARY_TABLES):
+        codes, labels = etl_incremental.month_codes(df[etl_incremental.PARTITION_COLUMN])
+        refreshed = set(months)
+        df = df[np.isin(codes, [index for index, month in enumerate(labels) if month in refreshed])]
+    else:
+        print("⚠️  Summary tables not found, rebuilding every month")
+        months = None
+    # The loaded ids come from the key store when one is configured, so the lookup must too
+    with surrogate_keys(pipeline) as key_store:
+        dimensions = etl_main.build_dimension_tables(df, key_store)
+    summaries = etl_aggregates.summarize(etl_main.build_fact_table(df, dimensions), dimensions)
+    written = etl_aggregates.refresh_summary_tables(engine, summaries, months,
+                                                    method=pipeline.settings('loading').get('method', 'multi_values'))
+    print(f"✅ Summary tables refreshed for {'every month' if months is None else f'{len(months)} months'}")
+    return written
+
+
+def stream(pipeline, sources, column_types):
+    # Alternative to extract..load: chunked passes over a single file within memory_limit_mb
+    import etl_streaming
+    if len(sources) > 1:
+        raise ValueError(f"Streaming mode reads a single file, got {len(sources)} sources")
+    with surrogate_keys(pipeline) as key_store:
+        summary = etl_streaming.run_streaming_etl(sources[0], pipeline.database(), pipeline.config, *column_types,
+                                                  key_store=key_store)
+    drop_change_state(pipeline, 'cdc', 'incremental')
+    create_views(pipeline.database())
+    return summary
+
+
+def streaming_aggregates(pipeline, summary):
+    # Streaming never holds the fact table, so the summaries are rebuilt from the loaded tables month by month
+    import etl_aggregates
+    summaries = etl_aggregates.summarize_warehouse(pipeline.database())
+    return load_aggregates(pipeline, summaries, summary)
+
+
+DEFAULT_NODES = [
+    Node('sources', resolve_sources),
+    Node('type_inference', infer_types, ['sources']),
+    Node('extract', extract, ['sources', 'type_inference']),
+    Node('profile', profile_columns, ['sources', 'extract']),
+    Node('filter', filter_missing, ['extract', 'profile']),
+    Node('transform', transform, ['filter']),
+    Node('validate', validate, ['transform']),
+    Node('dtype_plan', plan_dtypes),
+    Node('dimensions', build_dimensions, ['validate', 'dtype_plan']),
+    Node('fact', build_fact, ['validate', 'dimensions', 'dtype_plan']),
+    Node('load', load, ['dimensions', 'fact'],
+         rows=lambda result: sum(entry['rows'] for entry in result['tables'])),
+    Node('incremental_load', incremental_load, ['validate'], rows=lambda summary: summary['rows_loaded']),
+    Node('cdc_load', cdc_load, ['validate', 'dimensions', 'fact'], rows=lambda summary: summary['rows_written'],
+         details=lambda summary: {category: summary[category]
+                                  for category in ('inserted', 'changed', 'deleted', 'unchanged')}),
+    Node('aggregates', build_aggregates, ['dimensions', 'fact']),
+    Node('load_aggregates', load_aggregates, ['aggregates', 'load'], rows=lambda written: sum(written.values())),
+    Node('cdc_aggregates', load_aggregates, ['aggregates', 'cdc_load'], rows=lambda written: sum(written.values())),
+    Node('incremental_aggregates', incremental_aggregates, ['validate', 'incremental_load'],
+         rows=lambda written: sum(written.values())),
+    Node('streaming', stream, ['sources', 'type_inference'], rows=lambda summary: summary['clean_rows'],
+         details=lambda summary: {'workers': summary['pipelined']['stages']} if summary['pipelined'] else {}),
+    Node('streaming_aggregates', streaming_aggregates, ['streaming'], rows=lambda written: sum(written.values())),
+]
+
+
+class Pipeline:
+    """
+    Lazy ETL pipeline: get(name) computes a node and its inputs once and caches every output.
+
+    config: parsed etl_config.yaml (default: etl_main.load_config())
+    metrics: optional etl_metrics.PipelineMetrics; each computed node is recorded as one stage
+    engine: database engine for the load nodes (default: etl_db.create_db_engine(env) on first use)
+    checkpoint_dir: store checkpointed outputs here; resume=True restores the ones an earlier run left behind
+    """
+
+    def __init__(self, config=None, metrics=None, engine=None, env=None, password=None, refresh_cache=False,
+                 nodes=DEFAULT_NODES, checkpoint_dir=None, resume=False):
+        self.config = etl_main.load_config() if config is None else config
+        self.metrics = metrics
+        self.engine = engine
+        self.env = env
+        self.password = password
+        self.refresh_cache = refresh_cache
+        self.checkpoint_dir = checkpoint_dir
+        self.resume = resume
+        self._checkpoints = None
+        self.nodes = {}
+        self.outputs = {}
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def source(self):
+        return self.config.get('data_sources', {}).get('primary', {})
+
+    @property
+    def delimiter(self):
+        return self.source.get('delimiter', ',')
+
+    @property
+    def has_headers(self):
+        return self.source.get('has_headers', True)
+
+    def settings(self, section):
+        return self.config.get('etl', {}).get(section, {})
+
+    def database(self):
+        # Server/database/pool settings come from config/database.yaml
+        if self.engine is None:
+            self.engine = etl_db.create_db_engine(self.env, password=self.password)
+        return self.engine
+
+    @property
+    def checkpoints(self):
+        # Opened on first use, since the run key needs the resolved source files
+        if self._checkpoints is None and self.checkpoint_dir:
+            store = etl_checkpoint.CheckpointStore(
+                self.checkpoint_dir, etl_checkpoint.run_key(self.get('sources'), self.config), resume=self.resume)
+            if store.resumed:
+                print(f"✅ Resuming from checkpoints: {', '.join(store.stages()) or 'none completed'}")
+            elif self.resume:
+                print(f"ℹ️  No checkpoint of these sources and settings in {self.checkpoint_dir}, starting over")
+            self._checkpoints = store
+        return self._checkpoints
+
+    def restorable(self, name):
+        return (name in etl_checkpoint.CHECKPOINT_NODES and self.checkpoints is not None
+                and self.checkpoints.has(name))
+
+    def pending(self, name):
+        """
+        Nodes that get(name) would compute: not cached and not restorable from a checkpoint.
+        """
+        if name in self.outputs or self.restorable(name):
+            return []
+        names = []
+        for dependency in self.nodes[name].inputs:
+            names.extend(other for other in self.pending(dependency) if other not in names)
+        return names + [name]
+
+    def add_node(self, node):
+        """
+        Add or replace a node; a replaced node's cached output and everything built from it are dropped.
+        """
+        if node.name in self.nodes:
+            self.invalidate(node.name)
+        self.nodes[node.name] = node
+        return self
+
+    def downstream(self, name):
+        # name plus every node that (transitively) takes it as input
+        names = [name]
+        for candidate in names:
+            names.extend(other for other, node in self.nodes.items()
+                         if candidate in node.inputs and other not in names)
+        return names
+
+    def invalidate(self, name):
+        for stale in self.downstream(name):
+            self.outputs.pop(stale, None)
+            if self._checkpoints is not None:
+                self._checkpoints.discard(stale)
+
+    def computed(self, name):
+        return name in self.outputs
+
+    def get(self, name):
+        if name in self.outputs:
+            return self.outputs[name]
+        if name not in self.nodes:
+            raise KeyError(f"Unknown pipeline node: {name} (expected one of {', '.join(self.nodes)})")
+        node = self.nodes[name]
+        if self.restorable(name):
+            # Completed by an earlier run: restored without computing (or even loading) its inputs
+            print(f"⏭️  {name}: restored from checkpoint")
+            output = self._measure(name, node, [], lambda: self.checkpoints.load(name), resumed=True)
+        else:
+            inputs = [self.get(dependency) for dependency in node.inputs]
+            output = self._measure(name, node, inputs, lambda: node.function(self, *inputs))
+            if name in etl_checkpoint.CHECKPOINT_NODES and self.checkpoints is not None:
+                self.checkpoints.save(name, output)
+        self.outputs[name] = output
+        return output
+
+    def _measure(self, name, node, inputs, compute, resumed=False):
+        if self.metrics is None:
+            return compute()
+        counts = [count for count in map(_row_count, inputs) if count is not None]
+        rows_in = max(counts) if counts else None
+        with self.metrics.stage(name, rows_in=rows_in) as record:
+            output = compute()
+            record['rows_out'] = node.rows(output) if node.rows else _row_count(output)
+            if node.details:
+                record.update(node.details(output))
+            if resumed:
+                record['resumed'] = True
+        return output
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def run(self, *names):
+        """
+        Compute the named nodes (default: through 'load') and return {name: output}.
+        """
+        names = names or ('load',)
+        return {name: self.get(name) for name in names}
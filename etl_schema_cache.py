@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Schema cache: column types ที่ infer แล้วถูกจำไว้ตาม fingerprint ของ header และ sampled content hash
+
+key ของ entry คือ header line + delimiter + inference settings ส่วน content hash มาจาก byte blocks ที่กระจายทั่วไฟล์
+(ตัดที่ขอบบรรทัด) และขนาดไฟล์ ถ้าทั้งสองตรง column_types เดิมถูกคืนทันทีโดยไม่อ่านไฟล์เพิ่ม
+ถ้า header ตรงแต่เนื้อหาเปลี่ยน แถวใน blocks เหล่านั้นถูกใช้ตรวจ type เดิมทีละคอลัมน์
+และ infer ใหม่เฉพาะคอลัมน์ที่ไม่ผ่าน header ที่ไม่เคยเห็นจะ infer ทั้งไฟล์ตามปกติ
+
+Usage:
+    cache = SchemaCache()
+    result, column_types, report = cache.column_types(path, lambda: etl_main.sample_column_types(path))
+"""
+
+import hashlib
+import io
+import json
+import os
+import time
+
+import pandas as pd
+
+import etl_main
+import etl_sources
+
+DEFAULT_CACHE_PATH = 'cache/schema_types.json'
+# Entries kept, least recently used dropped first
+MAX_ENTRIES = 32
+
+# Content fingerprint: this many line-aligned blocks spread over the file body
+SAMPLE_BLOCKS = 8
+BLOCK_BYTES = 64 * 1024
+
+HIT, REVALIDATED, MISS = 'hit', 'revalidated', 'miss'
+
+
+def header_key(file_path, delimiter=',', has_headers=True, settings=None):
+    # The header line itself (not the parsed names), so a renamed or reordered column is a different layout
+    with open(file_path, 'rb') as f:
+        header = f.readline() if has_headers else b''
+    payload = json.dumps({'delimiter': delimiter, 'has_headers': has_headers, 'settings': settings or {}},
+                         sort_keys=True, default=str).encode()
+    return hashlib.blake2b(header + b'\0' + payload, digest_size=16).hexdigest()
+
+
+def sample_blocks(file_path, has_headers=True):
+    """
+    Up to SAMPLE_BLOCKS byte blocks of whole lines, evenly spread over the file body.
+
+    The last block is the end of the file, where appended rows land.
+    """
+    body_start = etl_sources.read_header(file_path)[1] if has_headers else 0
+    ranges = etl_sources.split_byte_ranges(file_path, SAMPLE_BLOCKS, body_start)
+    blocks = []
+    with open(file_path, 'rb') as f:
+        for index, (start, end) in enumerate(ranges):
+            if index == len(ranges) - 1 and end - start > BLOCK_BYTES:
+                # Skip the partial line before the tail
+                f.seek(end - BLOCK_BYTES - 1)
+                f.readline()
+                blocks.append(f.read(end - f.tell()))
+                continue
+            f.seek(start)
+            data = f.read(min(BLOCK_BYTES, end - start))
+            if start + len(data) < end:
+                # Cut after the last complete line
+                data = data[:data.rfind(b'\n') + 1]
+            blocks.append(data)
+    return blocks
+
+
+def content_hash(file_path, blocks):
+    digest = hashlib.blake2b(str(os.path.getsize(file_path)).encode(), digest_size=16)
+    for block in blocks:
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def _probe_frame(blocks, names, delimiter):
+    # The sampled rows as raw text, like the reservoir sample of etl_main.sample_column_types()
+    data = b''.join(blocks)
+    if not data.strip():
+        return pd.DataFrame(columns=names, dtype=str)
+    return pd.read_csv(io.BytesIO(data), sep=delimiter, header=None, names=names, dtype=str)
+
+
+class SchemaCache:
+    """
+    Persistent column_types per file layout, with hit/revalidated/miss counters.
+
+    column_types() returns what infer() would, (result, column_types, report); last_status and
+    last_reinferred describe the most recent lookup.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.counters = {HIT: 0, REVALIDATED: 0, MISS: 0}
+        self.last_status = None
+        self.last_reinferred = []
+        self.store = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {'entries': {}, 'stats': {HIT: 0, REVALIDATED: 0, MISS: 0}}
+        with open(self.path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entries = self.store['entries']
+        for key in sorted(entries, key=lambda key: entries[key]['used'])[:max(0, len(entries) - MAX_ENTRIES)]:
+            del entries[key]
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.store, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def hits(self):
+        return self.counters[HIT]
+
+    @property
+    def misses(self):
+        return self.counters[MISS]
+
+    def stats(self):
+        # Counters of this process and, under 'total', of every run that used the cache file
+        return dict(self.counters, total=dict(self.store['stats']))
+
+    def _count(self, status):
+        self.last_status = status
+        self.counters[status] += 1
+        self.store['stats'][status] = self.store['stats'].get(status, 0) + 1
+
+    def column_types(self, file_path, infer, delimiter=',', has_headers=True, settings=None):
+        """
+        Cached column types of file_path; infer() runs only for a layout the cache has not seen.
+
+        settings: the inference options (sample size, method, ...) — part of the key, since they shape the result.
+        Files without a header row have no layout to recognize and are always inferred.
+        """
+        if not has_headers:
+            return infer()
+        key = header_key(file_path, delimiter, has_headers, settings)
+        blocks = sample_blocks(file_path, has_headers)
+        fingerprint = content_hash(file_path, blocks)
+        entry = self.store['entries'].get(key)
+        self.last_reinferred = []
+
+        if entry is None:
+            result, column_types, report = infer()
+            if not result:
+                return result, column_types, report
+            self._count(MISS)
+        elif entry['content_hash'] == fingerprint:
+            self._count(HIT)
+            column_types, report = entry['column_types'], entry['report']
+        else:
+            self._count(REVALIDATED)
+            column_types, report = self._revalidate(entry, _probe_frame(blocks, list(entry['column_types']),
+                                                                        delimiter), delimiter)
+
+        self.store['entries'][key] = {'column_types': column_types, 'report': report, 'content_hash': fingerprint,
+                                      'used': time.time()}
+        self._save()
+        return True, dict(column_types), report
+
+    def _revalidate(self, entry, probe, delimiter):
+        # Keep each cached label the sampled rows still fit; re-infer only the columns they contradict
+        column_types, stale = etl_main.revalidate_column_types(probe, entry['column_types'], delimiter)
+        report = entry['report']
+        if report is not None:
+            probe_report = etl_main.sample_report(probe)
+            report = {column: (probe_report[column] if column in stale or column not in report
+                               # A label confirmed on an earlier file is only sampled evidence for this one
+                               else dict(report[column], confidence=min(report[column]['confidence'],
+                                                                        probe_report[column]['confidence'])))
+                      for column in column_types}
+        self.last_reinferred = stale
+        return column_types, report
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Source reader: อ่าน CSV หลายไฟล์ (glob/list) หรือไฟล์ใหญ่ที่ถูกแบ่งเป็นช่วง byte แบบขนานด้วย ProcessPoolExecutor
+
+ไฟล์ที่ใหญ่กว่า split_bytes ถูกแบ่งเป็นช่วงที่เริ่มต้นหลัง newline เสมอ แต่ละช่วง parse ใน process แยก
+ด้วย read spec เดียวกัน (etl_main.build_read_spec) แล้วรวมเป็น DataFrame เดียวหรือส่งต่อเป็น chunk stream ตามลำดับไฟล์
+
+ข้อจำกัด: การแบ่งตาม byte ถือว่าไม่มี newline อยู่ใน quoted field
+(ตั้ง split_bytes=None เพื่อ parse ทั้งไฟล์ใน task เดียว)
+"""
+
+import glob
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import etl_main
+
+DEFAULT_SPLIT_MB = 256
+
+
+def resolve_sources(sources):
+    """
+    Expand a path, glob pattern or list of them into an ordered list of files.
+    """
+    patterns = [sources] if isinstance(sources, str) else list(sources)
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        files.extend(path for path in matches if path not in files)
+    missing = [path for path in files if not os.path.exists(path)]
+    if not files or missing:
+        raise FileNotFoundError(f"Source files not found: {missing or sources}")
+    return files
+
+
+def read_header(file_path, delimiter=','):
+    with open(file_path, 'rb') as f:
+        first_line = f.readline()
+    return list(pd.read_csv(io.BytesIO(first_line), sep=delimiter, nrows=0).columns), len(first_line)
+
+
+def split_byte_ranges(file_path, parts, body_start=0):
+    # Each boundary is moved forward to the start of the next line, so no row is cut in two
+    size = os.path.getsize(file_path)
+    bounds = [body_start]
+    with open(file_path, 'rb') as f:
+        for part in range(1, parts):
+            target = body_start + (size - body_start) * part // parts
+            if target <= bounds[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()
+            position = f.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def plan_tasks(files, delimiter=',', has_headers=True, split_bytes=DEFAULT_SPLIT_MB * 1024 ** 2):
+    """
+    (path, start, end, names) parse tasks: one per file, or several byte ranges for files above split_bytes.
+
+    Every file must have the same header as the first one.
+    """
+    tasks = []
+    expected = None
+    for path in files:
+        names, body_start = read_header(path, delimiter) if has_headers else (None, 0)
+        if expected is None:
+            expected = names
+        elif names != expected:
+            raise ValueError(f"Header of {path} does not match {files[0]}")
+
+        size = os.path.getsize(path)
+        parts = max(1, -(-(size - body_start) // split_bytes)) if split_bytes else 1
+        tasks.extend((path, start, end, names) for start, end in split_byte_ranges(path, parts, body_start))
+    return tasks
+
+
+def parse_task(task, read_kwargs):
+    # Runs in a worker process: read the byte range and parse it with the shared spec
+    path, start, end, names = task
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(io.BytesIO(data), header=None, names=names, low_memory=False, **read_kwargs)
+
+
+def _worker_count(workers, tasks):
+    workers = workers or os.cpu_count() or 1
+    return max(1, min(workers, len(tasks)))
+
+
+def iter_source_frames(tasks, read_kwargs, workers=None):
+    """
+    Yield one parsed frame per task, in task order, keeping at most 2 x workers tasks in flight.
+    """
+    if not tasks:
+        return
+    workers = _worker_count(workers, tasks)
+    if workers == 1:
+        for task in tasks:
+            yield parse_task(task, read_kwargs)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        queued = iter(tasks)
+        for task in queued:
+            pending.append(executor.submit(parse_task, task, read_kwargs))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            frame = pending.popleft().result()
+            next_task = next(queued, None)
+            if next_task is not None:
+                pending.append(executor.submit(parse_task, next_task, read_kwargs))
+            yield frame
+
+
+def concat_frames(frames):
+    # Category columns get the union of every piece's categories so the result stays categorical
+    if not frames:
+        return pd.DataFrame()
+    for column in frames[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            categories = union_categoricals([frame[column] for frame in frames]).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_sources(sources, read_kwargs=None, delimiter=',', has_headers=True, workers=None,
+                 split_bytes=DEFAULT_SPLIT_MB * 1024 ** 2):
+    """
+    Parse every source file (or byte range of one) in parallel and return one concatenated frame.
+
+    read_kwargs: extra pd.read_csv arguments (dtype, parse_dates, usecols), e.g. from build_read_spec()
+    workers: process count, default os.cpu_count()
+    """
+    tasks = plan_tasks(resolve_sources(sources), delimiter, has_headers, split_bytes)
+    return concat_frames(list(iter_source_frames(tasks, dict(read_kwargs or {}, sep=delimiter), workers)))
+
+
+def load_typed_sources(sources, column_types, report=None, delimiter=',', has_headers=True, columns=None,
+                       categorical=None, workers=None, split_bytes=DEFAULT_SPLIT_MB * 1024 ** 2):
+    # Parallel counterpart of etl_main.load_typed_csv(), with the same untyped fallback
+    spec = etl_main.build_read_spec(column_types, report, columns, categorical)
+    tasks = plan_tasks(resolve_sources(sources), delimiter, has_headers, split_bytes)
+    try:
+        return concat_frames(list(iter_source_frames(tasks, dict(spec, sep=delimiter), workers)))
+    except (ValueError, TypeError) as e:
+        print(f"⚠️  Typed read failed ({e}), re-reading without dtype spec")
+        untyped = {'sep': delimiter, 'usecols': spec.get('usecols')}
+        return concat_frames(list(iter_source_frames(tasks, untyped, workers)))
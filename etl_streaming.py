@@ -0,0 +1,477 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Chunked streaming ETL ภายใต้ etl.processing.chunk_size และ memory_limit_mb
+
+Pass 1 สร้าง column profile (etl_profile) ทีละ chunk เพื่อตัดสินใจ Step 3/4 ที่ต้องใช้สถิติทั้งไฟล์
+Pass 2 อ่านเฉพาะคอลัมน์ที่เลือกแล้วส่งแต่ละ chunk ผ่าน filter -> transform -> dimension lookup -> fact load
+
+etl.processing.pipelined (หรือ etl_main.py --pipelined) ซ้อน pass 2 เป็น producer/consumer: thread หนึ่งอ่านและเตรียม
+chunk ถัดไปขณะที่ loader threads โหลด chunk ก่อนหน้า ผ่าน queue ที่จำกัดทั้งจำนวน chunk และ bytes ตาม memory_limit_mb
+แต่ละ stage รายงาน busy/wait seconds จึงเห็นว่า pipeline ติดที่การอ่าน การเตรียม หรือ database
+"""
+
+import collections
+import gc
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import psutil
+
+import etl_db
+import etl_loader
+import etl_main
+import etl_profile
+import etl_transform
+import etl_validation
+
+# Rows read before the per-row memory cost is known
+PROBE_ROWS = 1000
+MIN_CHUNK_ROWS = 100
+
+# A chunk is alive several times over (raw, filtered, transformed, fact and the to_sql buffers)
+CHUNK_COPY_FACTOR = 4
+
+# Pipelined mode: prepared chunks waiting for a loader, at most
+DEFAULT_QUEUE_CHUNKS = 4
+
+
+def current_rss_mb():
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+
+class ChunkSizer:
+    """ปรับจำนวนแถวต่อ chunk ให้ RSS + working set ของ chunk ไม่เกิน memory_limit_mb"""
+
+    def __init__(self, chunk_size, memory_limit_mb):
+        self.max_rows = chunk_size
+        self.rows = min(chunk_size, PROBE_ROWS)
+        self.memory_limit_mb = memory_limit_mb
+        self.peak_rss_mb = current_rss_mb()
+
+    def check(self):
+        rss = current_rss_mb()
+        if rss > self.memory_limit_mb:
+            gc.collect()
+            rss = current_rss_mb()
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        if rss > self.memory_limit_mb:
+            raise MemoryError(f"RSS {rss:.0f} MB exceeds memory_limit_mb={self.memory_limit_mb}")
+        return rss
+
+    def observe(self, chunk):
+        # Re-size the next chunk from the measured bytes per row and the remaining headroom
+        rss = self.check()
+        if len(chunk) == 0:
+            return
+        bytes_per_row = chunk.memory_usage(deep=True).sum() / len(chunk)
+        headroom = (self.memory_limit_mb - rss) * 1024 ** 2
+        fit = int(headroom / (bytes_per_row * CHUNK_COPY_FACTOR))
+        self.rows = max(MIN_CHUNK_ROWS, min(self.max_rows, fit))
+
+
+def iter_chunks(file_path, sizer, read_kwargs):
+    # get_chunk() lets every chunk use the size the sizer picked after the previous one
+    with pd.read_csv(file_path, iterator=True, **read_kwargs) as reader:
+        while True:
+            try:
+                chunk = reader.get_chunk(sizer.rows)
+            except StopIteration:
+                return
+            sizer.observe(chunk)
+            yield chunk
+
+
+def collect_profile(file_path, sizer, read_kwargs):
+    # Pass 1: one column profile merged across chunks; Step 3/4 need only its null counts and row count
+    profile = etl_profile.DatasetProfile(etl_profile.source_fingerprint(file_path))
+    for chunk in iter_chunks(file_path, sizer, read_kwargs):
+        profile.update(chunk)
+    return profile
+
+
+class DimensionRegistry:
+    """
+    Surrogate id ตามลำดับที่พบครั้งแรก (เหมือน drop_duplicates().reset_index()) สะสมข้าม chunk
+    หรือ id ถาวรจาก key_store (etl_keystore) เมื่อกำหนด etl.surrogate_keys.path เหมือน batch load
+    """
+
+    def __init__(self, column, key_store=None):
+        self.column = column
+        self.key_store = key_store
+        self.members = None
+
+    def ids_for(self, values):
+        uniques = pd.Index(pd.unique(values))
+        if self.members is None:
+            self.members = uniques
+        else:
+            new_members = uniques[self.members.get_indexer(uniques) < 0]
+            if len(new_members):
+                self.members = self.members.append(new_members)
+        if self.key_store is not None:
+            return self.key_store.ids_for(self.column, values)
+        return self.members.get_indexer(values)
+
+    def to_frame(self):
+        members = self.members if self.members is not None else pd.Index([])
+        dim = etl_main.build_dimension_table(members.to_series(), self.column)
+        if self.key_store is not None and len(dim):
+            dim[f'{self.column}_id'] = self.key_store.ids_for(self.column, dim[self.column])
+        return dim
+
+
+class Quarantine:
+    """Rejected rows of every chunk appended to one quarantine file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+
+    def write(self, rejects):
+        if len(rejects):
+            etl_validation.write_quarantine(rejects, self.path, append=self.rows > 0)
+            self.rows += len(rejects)
+
+
+def prepare_chunk(chunk, plan, business_rules, registries, quarantine):
+    # Steps 3-7 for one chunk: the chunk with its surrogate ids, or None when no row is left
+    chunk = chunk.dropna()
+    if chunk.empty:
+        return None
+    etl_transform.apply_plan(chunk, plan)
+    chunk, rejects, _ = etl_validation.validate(chunk, business_rules)
+    quarantine.write(rejects)
+    if chunk.empty:
+        return None
+    for column, registry in registries.items():
+        chunk[f'{column}_id'] = registry.ids_for(chunk[column])
+    return chunk[[col for col in etl_main.FACT_COLUMNS if col in chunk.columns]]
+
+
+### Pipelined pass 2 ###
+
+class WorkerClock:
+    """Busy and waiting seconds of one pipeline stage (or one loader thread)"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.chunks = 0
+
+    @contextmanager
+    def busy(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+
+    @contextmanager
+    def waiting(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.wait_seconds += time.perf_counter() - start
+
+    def summary(self, wall_seconds):
+        return {
+            'stage': self.stage,
+            'busy_seconds': self.busy_seconds,
+            'wait_seconds': self.wait_seconds,
+            'utilization': self.busy_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+            'chunks': self.chunks,
+        }
+
+
+class ChunkQueue:
+    """
+    Bounded hand-off between the chunk producer and the loaders.
+
+    put() blocks while max_chunks chunks are queued, or while the queued and in-flight chunks would go over
+    max_bytes; one chunk always gets through, so a chunk larger than the budget still moves.
+    fail() wakes every waiting thread so one failed side stops the other.
+    """
+
+    def __init__(self, max_chunks, max_bytes):
+        self.max_chunks = max(1, max_chunks)
+        self.max_bytes = max_bytes
+        self.peak_bytes = 0
+        self._items = collections.deque()
+        self._bytes = 0
+        self._in_flight = 0
+        self._closed = False
+        self._failed = False
+        self._condition = threading.Condition()
+
+    def _full(self, nbytes):
+        if len(self._items) >= self.max_chunks:
+            return True
+        return self._bytes + nbytes > self.max_bytes and (self._items or self._in_flight)
+
+    def put(self, chunk, nbytes):
+        # False when the consumers failed and nothing more should be produced
+        with self._condition:
+            while not self._failed and self._full(nbytes):
+                self._condition.wait()
+            if self._failed:
+                return False
+            self._items.append((chunk, nbytes))
+            self._bytes += nbytes
+            self.peak_bytes = max(self.peak_bytes, self._bytes)
+            self._condition.notify_all()
+            return True
+
+    def get(self):
+        # (chunk, nbytes), or None once the queue is closed and drained (or failed)
+        with self._condition:
+            while not self._items and not self._closed and not self._failed:
+                self._condition.wait()
+            if self._failed or not self._items:
+                return None
+            self._in_flight += 1
+            return self._items.popleft()
+
+    def done(self, nbytes):
+        with self._condition:
+            self._in_flight -= 1
+            self._bytes -= nbytes
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def fail(self):
+        with self._condition:
+            self._failed = True
+            self._condition.notify_all()
+
+
+def _loader(queue, clock, engine, method, batch_size, errors):
+    # Consumer: waiting on an empty queue means the producer is the bottleneck
+    try:
+        while True:
+            with clock.waiting():
+                item = queue.get()
+            if item is None:
+                return
+            fact, nbytes = item
+            try:
+                with clock.busy():
+                    etl_loader.insert_rows(fact, 'loans_fact', engine, method, batch_size)
+                clock.chunks += 1
+            finally:
+                queue.done(nbytes)
+    except BaseException as e:
+        errors.append(e)
+        queue.fail()
+
+
+def queue_budget_bytes(memory_limit_mb):
+    # Queued chunks share the headroom left under memory_limit_mb with the chunk being prepared
+    headroom = max(0.0, memory_limit_mb - current_rss_mb()) * 1024 ** 2
+    return int(headroom / CHUNK_COPY_FACTOR)
+
+
+def run_pipelined_load(chunks, prepare, engine, method='multi_values', batch_size=etl_loader.DEFAULT_BATCH_SIZE,
+                       loaders=1, queue_chunks=DEFAULT_QUEUE_CHUNKS, max_queue_bytes=None):
+    """
+    Load the fact chunks while the next ones are read and prepared.
+
+    chunks yields raw chunks, prepare(chunk) returns the fact rows (or None); both run in the calling thread,
+    loaders threads insert into loans_fact. Returns {'rows', 'chunks', 'wall_seconds', 'stages', 'bottleneck',
+    'queue_peak_bytes'}, stages holding busy/wait seconds and utilization for read, prepare and each loader.
+    """
+    loaders = max(1, min(loaders, etl_db.max_connections(engine)))
+    queue = ChunkQueue(queue_chunks, max_queue_bytes if max_queue_bytes is not None else float('inf'))
+    read, produce = WorkerClock('read'), WorkerClock('prepare')
+    clocks = [WorkerClock(f'load-{index + 1}') for index in range(loaders)]
+    errors = []
+    threads = []
+    rows = 0
+    start = time.perf_counter()
+    try:
+        iterator = iter(chunks)
+        while True:
+            with read.busy():
+                chunk = next(iterator, None)
+            if chunk is None:
+                break
+            read.chunks += 1
+            with produce.busy():
+                fact = prepare(chunk)
+            del chunk
+            if fact is None:
+                continue
+            if not threads:
+                # The first prepared chunk fixes the schema; loaders only append
+                etl_loader.create_table(fact, 'loans_fact', engine)
+                threads = [threading.Thread(target=_loader, name=f'etl-{clock.stage}',
+                                            args=(queue, clock, engine, method, batch_size, errors))
+                           for clock in clocks]
+                for thread in threads:
+                    thread.start()
+            # Waiting on a full queue is backpressure: the loaders are the bottleneck
+            with produce.waiting():
+                if not queue.put(fact, int(fact.memory_usage(deep=True).sum())):
+                    break
+            produce.chunks += 1
+            rows += len(fact)
+            del fact
+    except BaseException:
+        queue.fail()
+        raise
+    finally:
+        queue.close()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+
+    wall_seconds = time.perf_counter() - start
+    stages = [clock.summary(wall_seconds) for clock in [read, produce] + clocks]
+    load_utilization = sum(stage['utilization'] for stage in stages[2:]) / len(clocks)
+    busiest = max([('read', stages[0]['utilization']), ('prepare', stages[1]['utilization']),
+                   ('load', load_utilization)], key=lambda stage: stage[1])
+    return {
+        'rows': rows,
+        'chunks': produce.chunks,
+        'wall_seconds': wall_seconds,
+        'stages': stages,
+        'bottleneck': busiest[0],
+        'queue_peak_bytes': queue.peak_bytes,
+    }
+
+
+def format_utilization(result):
+    lines = [f"   {'stage':<10} {'busy s':>8} {'wait s':>8} {'util':>6} {'chunks':>7}"]
+    for stage in result['stages']:
+        lines.append(f"   {stage['stage']:<10} {stage['busy_seconds']:8.2f} {stage['wait_seconds']:8.2f} "
+                     f"{stage['utilization']:6.0%} {stage['chunks']:7,}")
+    lines.append(f"   bottleneck: {result['bottleneck']}, queue peak {result['queue_peak_bytes'] / 1024 ** 2:.1f} MB")
+    return '\n'.join(lines)
+
+
+def _read_kwargs(delimiter, has_headers, column_types, report, columns=None):
+    kwargs = {'sep': delimiter, 'header': 0 if has_headers else None}
+    if column_types:
+        kwargs.update(etl_main.build_read_spec(column_types, report, columns))
+    elif columns is not None:
+        kwargs['usecols'] = columns
+    return kwargs
+
+
+def run_streaming_etl(file_path, engine, config, column_types=None, report=None, key_store=None):
+    """
+    Stream file_path through the ETL steps and load the star schema into engine.
+
+    key_store: persistent surrogate keys (etl_keystore), so the ids match the batch and incremental loads
+
+    Returns a summary dict with row/column counts, dimension sizes, chunk count and peak RSS.
+    """
+    etl_config = config.get('etl', {})
+    processing = etl_config.get('processing', {})
+    loading = etl_config.get('loading', {})
+    quality = etl_config.get('data_quality', {})
+    source = config.get('data_sources', {}).get('primary', {})
+    delimiter = source.get('delimiter', ',')
+    has_headers = source.get('has_headers', True)
+
+    sizer = ChunkSizer(processing.get('chunk_size', 10000), processing.get('memory_limit_mb', 500))
+
+    # Pass 1 also validates the dtype spec before anything is written to the database
+    print("Pass 1: Profiling columns...")
+    try:
+        profile = collect_profile(file_path, sizer, _read_kwargs(delimiter, has_headers, column_types, report))
+    except (ValueError, TypeError) as e:
+        print(f"⚠️  Typed read failed ({e}), streaming without dtype spec")
+        column_types = None
+        profile = collect_profile(file_path, sizer, _read_kwargs(delimiter, has_headers, None, None))
+    profile_path = etl_config.get('profiling', {}).get('output_path', etl_profile.DEFAULT_PROFILE_PATH)
+    if profile_path:
+        profile.save(profile_path)
+    null_counts, row_count = profile.null_counts(), profile.rows
+
+    columns_to_keep = etl_main.filter_columns_by_missing(
+        null_counts, row_count, quality.get('max_missing_percentage', 30))
+    selected_columns = etl_main.select_columns_by_null_count(
+        null_counts[columns_to_keep], quality.get('acceptable_max_null', 26))
+    print(f"✅ {row_count:,} rows scanned, kept {len(columns_to_keep)} columns, selected {len(selected_columns)}")
+
+    # Pass 2: only the selected columns are parsed
+    print("Pass 2: Streaming chunks through transform and load...")
+    plan = etl_transform.compile_transformations(config.get('transformations'))
+    quarantine = Quarantine(quality.get('quarantine_path', etl_validation.DEFAULT_QUARANTINE_PATH))
+    registries = {column: DimensionRegistry(column, key_store)
+                  for column in etl_main.DIMENSION_COLUMNS if column in selected_columns}
+    read_kwargs = _read_kwargs(delimiter, has_headers, column_types, report, selected_columns)
+    clean_rows = 0
+    chunks = 0
+    fact_columns = []
+    load_method = loading.get('method', 'multi_values')
+    batch_size = loading.get('batch_size', etl_loader.DEFAULT_BATCH_SIZE)
+    load_seconds = 0.0
+    pipelined = None
+
+    def prepare(chunk):
+        nonlocal fact_columns
+        fact = prepare_chunk(chunk, plan, config.get('business_rules', {}), registries, quarantine)
+        if fact is not None:
+            fact_columns = list(fact.columns)
+        sizer.check()
+        return fact
+
+    if processing.get('pipelined', False):
+        pipelined = run_pipelined_load(iter_chunks(file_path, sizer, read_kwargs), prepare, engine, load_method,
+                                       batch_size, loaders=processing.get('loader_workers', 1),
+                                       queue_chunks=processing.get('queue_chunks', DEFAULT_QUEUE_CHUNKS),
+                                       max_queue_bytes=queue_budget_bytes(sizer.memory_limit_mb))
+        clean_rows, chunks = pipelined['rows'], pipelined['chunks']
+        load_seconds = max(stage['busy_seconds'] for stage in pipelined['stages'][2:])
+        print("✅ Pipelined pass 2 utilization:")
+        print(format_utilization(pipelined))
+    else:
+        for chunk in iter_chunks(file_path, sizer, read_kwargs):
+            fact = prepare(chunk)
+            del chunk
+            if fact is None:
+                continue
+            stats = etl_loader.load_table(fact, 'loans_fact', engine, load_method, batch_size,
+                                          if_exists='replace' if chunks == 0 else 'append')
+            load_seconds += stats['seconds']
+            clean_rows += len(fact)
+            chunks += 1
+            del fact
+
+    if clean_rows == 0:
+        # loans_fact is created by the first loaded chunk; replacing only the dimensions would orphan its ids
+        raise ValueError(f"No rows of {file_path} left after filtering and validation "
+                         f"({quarantine.rows:,} quarantined); the star schema was not replaced")
+
+    # Dimensions are tiny and only complete once every chunk has been seen
+    dimensions = {f'{column}_dim': registry.to_frame() for column, registry in registries.items()}
+    for name, dim in dimensions.items():
+        stats = etl_loader.load_table(dim, name, engine, load_method, batch_size)
+        print(f"✅ {name} loaded ({etl_loader.format_load_stats(stats)})")
+
+    rate = clean_rows / load_seconds if load_seconds > 0 else 0.0
+    print(f"✅ loans_fact loaded: {clean_rows:,} records in {chunks} chunks ({rate:,.0f} rows/s), "
+          f"peak RSS {sizer.peak_rss_mb:.0f} MB")
+    return {
+        'rows': row_count,
+        'columns': len(null_counts),
+        'selected_columns': selected_columns,
+        'clean_rows': clean_rows,
+        'quarantined_rows': quarantine.rows,
+        'chunks': chunks,
+        'dimensions': {name: len(dim) for name, dim in dimensions.items()},
+        'fact_columns': fact_columns,
+        'peak_rss_mb': sizer.peak_rss_mb,
+        'pipelined': pipelined,
+    }
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Shadow-table swap สำหรับ refresh warehouse โดยไม่มีช่วงที่ตารางว่าง (etl.loading.mode: swap)
+
+Step 8 โหลดเข้า <table>__shadow แทนตารางจริง แล้วสร้าง indexes ตาม sql/create_star_schema.sql หลัง bulk insert
+(insert จึงไม่ต้องดูแล index) จากนั้นเปลี่ยนชื่อ shadow เป็นตารางจริงใน transaction เดียว
+ระหว่างโหลด views เช่น vw_loan_summary และ vw_monthly_trends ยังอ่านข้อมูลชุดเดิมได้ครบ
+"""
+
+import re
+import time
+
+from sqlalchemy import inspect
+
+import etl_db
+
+# replace: drop and refill the live tables; swap: load shadow tables, index them, rename them in
+LOAD_MODES = ('replace', 'swap')
+DEFAULT_SCHEMA_SQL = 'sql/create_star_schema.sql'
+SHADOW_SUFFIX = '__shadow'
+OLD_SUFFIX = '__old'
+# SQLite index names are database wide, so a shadow index takes the alternate name while the live one exists
+ALTERNATE_INDEX_SUFFIX = '__b'
+
+_CREATE_TABLE = re.compile(r'CREATE TABLE (\w+) \((.*?)\n\);', re.DOTALL | re.IGNORECASE)
+_INDEX = re.compile(r'^\s*INDEX (\w+) \(([^)]*)\)', re.MULTILINE | re.IGNORECASE)
+
+
+def parse_index_definitions(sql_path=DEFAULT_SCHEMA_SQL):
+    """
+    {table: [(index_name, [columns])]} from the inline INDEX clauses of the CREATE TABLE statements.
+    """
+    with open(sql_path, encoding='utf-8') as f:
+        script = f.read()
+    definitions = {}
+    for table, body in _CREATE_TABLE.findall(script):
+        definitions[table] = [(name, [column.strip() for column in columns.split(',')])
+                              for name, columns in _INDEX.findall(body)]
+    return definitions
+
+
+def _quote(engine, name):
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def _index_names_in_use(engine):
+    if engine.dialect.name != 'sqlite':
+        return set()
+    with engine.connect() as connection:
+        return {row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def build_indexes(engine, table, definitions):
+    """
+    Create the indexes defined for table on its shadow table; indexes on columns the ETL does not load are skipped.
+
+    Returns [(index name, seconds)].
+    """
+    if engine.dialect.name == 'duckdb':
+        # DuckDB cannot rename an indexed table; its scans prune with per-segment min/max instead
+        return []
+    shadow = table + SHADOW_SUFFIX
+    columns = set(etl_db.table_columns(engine, shadow))
+    existing = {index['name'] for index in inspect(engine).get_indexes(shadow)}
+    in_use = _index_names_in_use(engine)
+    built = []
+    for name, index_columns in definitions.get(table, []):
+        if not set(index_columns) <= columns:
+            continue
+        if name in existing or name + ALTERNATE_INDEX_SUFFIX in existing:
+            continue
+        if name in in_use:
+            name += ALTERNATE_INDEX_SUFFIX
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            connection.exec_driver_sql(f"CREATE INDEX {_quote(engine, name)} ON {_quote(engine, shadow)} "
+                                       f"({', '.join(_quote(engine, column) for column in index_columns)})")
+        built.append((name, time.perf_counter() - start))
+    return built
+
+
+def _rename(connection, engine, old_name, new_name):
+    if engine.dialect.name == 'mssql':
+        connection.exec_driver_sql(f"EXEC sp_rename '{old_name}', '{new_name}'")
+    else:
+        connection.exec_driver_sql(f"ALTER TABLE {_quote(engine, old_name)} RENAME TO {_quote(engine, new_name)}")
+
+
+def swap_tables(engine, tables):
+    """
+    Replace each live table with its shadow table in one transaction, then drop the previous tables.
+
+    Views keep referring to the live names: SQLite renames with legacy_alter_table so views are not rewritten
+    to follow the old table, and SQL Server resolves view references by name at query time.
+    Tables without a shadow (already swapped by an earlier attempt) are left as they are. Returns swapped tables.
+    """
+    existing = set(inspect(engine).get_table_names())
+    tables = [table for table in tables if table + SHADOW_SUFFIX in existing]
+    sqlite = engine.dialect.name == 'sqlite'
+    with engine.connect() as connection:
+        if sqlite:
+            connection.exec_driver_sql('PRAGMA legacy_alter_table = ON')
+            connection.commit()
+        try:
+            with connection.begin():
+                if sqlite:
+                    # pysqlite does not open a transaction for DDL on its own
+                    connection.exec_driver_sql('BEGIN IMMEDIATE')
+                for table in tables:
+                    if table + OLD_SUFFIX in existing:
+                        connection.exec_driver_sql(f'DROP TABLE {_quote(engine, table + OLD_SUFFIX)}')
+                    if table in existing:
+                        _rename(connection, engine, table, table + OLD_SUFFIX)
+                    _rename(connection, engine, table + SHADOW_SUFFIX, table)
+        finally:
+            if sqlite:
+                connection.exec_driver_sql('PRAGMA legacy_alter_table = OFF')
+                connection.commit()
+
+    with engine.begin() as connection:
+        for table in tables:
+            connection.exec_driver_sql(f'DROP TABLE IF EXISTS {_quote(engine, table + OLD_SUFFIX)}')
+    return tables
+
+
+def publish_shadow_tables(engine, tables, definitions):
+    """
+    Build the indexes of every loaded shadow table (definitions from parse_index_definitions()),
+    then swap them all in at once.
+
+    Returns {'indexes': {table: [(name, seconds)]}, 'index_seconds', 'swap_seconds', 'tables'}.
+    """
+    existing = set(inspect(engine).get_table_names())
+    start = time.perf_counter()
+    indexes = {table: build_indexes(engine, table, definitions)
+               for table in tables if table + SHADOW_SUFFIX in existing}
+    index_seconds = time.perf_counter() - start
+    for table, built in indexes.items():
+        if built:
+            print(f"✅ {table}: {len(built)} indexes built in {sum(seconds for _, seconds in built):.2f}s")
+
+    start = time.perf_counter()
+    swapped = swap_tables(engine, tables)
+    swap_seconds = time.perf_counter() - start
+    print(f"✅ Swapped in {len(swapped)} tables in {swap_seconds:.3f}s")
+    return {'indexes': indexes, 'index_seconds': index_seconds, 'swap_seconds': swap_seconds, 'tables': swapped}
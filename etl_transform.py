@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Transformation engine ที่ compile ส่วน transformations ของ etl_config.yaml เป็น plan เดียว
+
+แต่ละ rule แปลงคอลัมน์ in place (ไม่มี copy() ต่อ rule) และทำงานกับค่า unique เท่านั้น:
+issue_d มีเพียงไม่กี่ร้อยเดือนแม้ข้อมูลจะมีหลายล้านแถว จึง parse วันที่ครั้งเดียวต่อค่าแล้วกระจายกลับด้วย codes
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+# Used when the config has no transformations section (the original hard-coded Step 5)
+DEFAULT_TRANSFORMATIONS = {
+    'date_columns': [{'column': 'issue_d', 'format': '%b-%Y'}],
+    'percentage_columns': [{'column': 'int_rate', 'remove_symbol': '%', 'divide_by': 100}],
+}
+
+
+def _by_unique(series, convert):
+    # Convert each distinct value once, then broadcast through the factorized codes
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), pd.Index(series.cat.categories)
+    else:
+        codes, uniques = pd.factorize(series)
+        uniques = pd.Index(uniques)
+    converted = convert(uniques)
+    return pd.Series(converted.take(codes, allow_fill=True, fill_value=np.nan), index=series.index, name=series.name)
+
+
+def parse_dates_cached(series, date_format):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return None
+    return _by_unique(series, lambda uniques: pd.DatetimeIndex(pd.to_datetime(uniques, format=date_format)))
+
+
+def parse_percentages(series, remove_symbol='%', divide_by=100):
+    if pd.api.types.is_numeric_dtype(series):
+        return None
+    return _by_unique(series, lambda uniques: uniques.astype(str).str.rstrip(remove_symbol).astype('float') / divide_by)
+
+
+def _date_rule(rule):
+    date_format = rule.get('format')
+    return 'date', rule['column'], lambda series: parse_dates_cached(series, date_format)
+
+
+def _percentage_rule(rule):
+    symbol = rule.get('remove_symbol', '%')
+    divide_by = rule.get('divide_by', 100)
+    return 'percentage', rule['column'], lambda series: parse_percentages(series, symbol, divide_by)
+
+
+RULE_BUILDERS = {
+    'date_columns': _date_rule,
+    'percentage_columns': _percentage_rule,
+}
+
+
+def compile_transformations(transformations=None):
+    """
+    Compile the transformations section of etl_config.yaml into a list of (kind, column, function).
+
+    A function returns the converted column, or None when the column already has the target type.
+    """
+    transformations = DEFAULT_TRANSFORMATIONS if transformations is None else transformations
+    plan = []
+    for section, rules in transformations.items():
+        if section not in RULE_BUILDERS:
+            raise ValueError(f"Unknown transformation section: {section} "
+                             f"(expected one of {', '.join(RULE_BUILDERS)})")
+        for rule in rules or []:
+            if 'column' not in rule:
+                raise ValueError(f"Transformation rule in {section} has no column: {rule}")
+            plan.append(RULE_BUILDERS[section](rule))
+    return plan
+
+
+def apply_plan(df, plan):
+    """
+    Apply a compiled plan to df in place.
+
+    Returns one timing entry per rule: {'rule', 'column', 'applied', 'seconds', 'rows'}.
+    """
+    timings = []
+    for kind, column, function in plan:
+        start = time.perf_counter()
+        converted = function(df[column]) if column in df.columns else None
+        if converted is not None:
+            df[column] = converted
+        timings.append({
+            'rule': kind,
+            'column': column,
+            'applied': converted is not None,
+            'seconds': time.perf_counter() - start,
+            'rows': len(df),
+        })
+    return timings
+
+
+def format_rule_timings(timings):
+    lines = []
+    for entry in timings:
+        status = 'converted' if entry['applied'] else 'skipped'
+        lines.append(f"   {entry['rule']:<12} {entry['column']:<20} {status:<10} {entry['seconds'] * 1000:8.1f} ms")
+    return '\n'.join(lines)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Validation stage: business_rules ใน etl_config.yaml และ CHECK constraints ของ loans_fact (sql/create_star_schema.sql)
+
+ทุก rule ถูกประเมินเป็น boolean mask ครั้งเดียวทั้งคอลัมน์ ผลของแต่ละแถวถูกเก็บเป็น bitmask
+ข้อความ validation_errors จึงสร้างเพียงครั้งเดียวต่อรูปแบบ bitmask ที่พบ (ไม่มี Python loop ต่อแถว)
+
+- business rules ไม่ผ่าน: แถวยังถูกโหลด แต่ data_quality_score ลดลงและ has_data_issues = 1
+- CHECK/NOT NULL constraints ไม่ผ่าน: แถวถูกย้ายไป quarantine ก่อน load เพื่อไม่ให้ load ล้มกลางทาง
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+QUALITY_COLUMNS = ['data_quality_score', 'has_data_issues', 'validation_errors']
+
+# validation_errors is NVARCHAR(500)
+MAX_ERROR_LENGTH = 500
+
+DEFAULT_QUARANTINE_PATH = 'output/quarantine/loans_fact_rejects.csv'
+
+# loans_fact constraints that would abort the load: (name, columns, violation mask)
+CHECK_CONSTRAINTS = [
+    ('NN_loans_fact_loan_amnt', ['loan_amnt'], lambda df: df['loan_amnt'].isna()),
+    ('NN_loans_fact_funded_amnt', ['funded_amnt'], lambda df: df['funded_amnt'].isna()),
+    ('NN_loans_fact_int_rate', ['int_rate'], lambda df: df['int_rate'].isna()),
+    ('NN_loans_fact_installment', ['installment'], lambda df: df['installment'].isna()),
+    ('CHK_loans_fact_loan_amnt_positive', ['loan_amnt'], lambda df: df['loan_amnt'] <= 0),
+    ('CHK_loans_fact_funded_amnt_positive', ['funded_amnt'], lambda df: df['funded_amnt'] <= 0),
+    ('CHK_loans_fact_funded_le_loan', ['funded_amnt', 'loan_amnt'],
+     lambda df: df['funded_amnt'] > df['loan_amnt']),
+    ('CHK_loans_fact_int_rate_valid', ['int_rate'], lambda df: (df['int_rate'] < 0) | (df['int_rate'] > 1)),
+    ('CHK_loans_fact_installment_positive', ['installment'], lambda df: df['installment'] <= 0),
+]
+
+
+def _range_rule(column, bounds):
+    low, high = bounds.get('min_value'), bounds.get('max_value')
+
+    def mask(df):
+        values = df[column]
+        outside = pd.Series(False, index=df.index)
+        if low is not None:
+            outside |= values < low
+        if high is not None:
+            outside |= values > high
+        return outside
+    return mask
+
+
+def compile_business_rules(business_rules):
+    """
+    Turn the business_rules section into (message, columns, violation mask) entries.
+    """
+    rules = []
+    loan_amount = business_rules.get('loan_amount')
+    if loan_amount:
+        rules.append((f"loan_amnt outside {loan_amount.get('min_value')}-{loan_amount.get('max_value')}",
+                      ['loan_amnt'], _range_rule('loan_amnt', loan_amount)))
+    interest_rate = business_rules.get('interest_rate')
+    if interest_rate:
+        rules.append((f"int_rate outside {interest_rate.get('min_value')}-{interest_rate.get('max_value')}",
+                      ['int_rate'], _range_rule('int_rate', interest_rate)))
+    funding_ratio = business_rules.get('funding_ratio')
+    if funding_ratio:
+        ratio = funding_ratio.get('max_value')
+        rules.append((f"funding_ratio above {ratio}", ['funded_amnt', 'loan_amnt'],
+                      lambda df: df['funded_amnt'] > df['loan_amnt'] * ratio))
+    return rules
+
+
+def evaluate(df, rules):
+    """
+    Evaluate applicable rules as masks and pack them into one bitmask per row.
+
+    Returns (bits, names) where bit i of bits[row] is set when names[i] failed for that row.
+    """
+    applicable = [(name, mask) for name, columns, mask in rules if all(column in df.columns for column in columns)]
+    if len(applicable) > 63:
+        raise ValueError("At most 63 rules can be packed into one bitmask")
+    bits = np.zeros(len(df), dtype=np.int64)
+    for bit, (_, mask) in enumerate(applicable):
+        bits |= mask(df).to_numpy(dtype=bool, na_value=False).astype(np.int64) << bit
+    return bits, [name for name, _ in applicable]
+
+
+def describe_bits(bits, names, separator='; ', limit=MAX_ERROR_LENGTH):
+    # One message per distinct bitmask, broadcast back through the factorized codes; None when nothing failed
+    codes, patterns = pd.factorize(bits)
+    messages = np.array([separator.join(name for bit, name in enumerate(names) if pattern >> bit & 1)[:limit] or None
+                         for pattern in patterns], dtype=object)
+    return messages[codes] if len(codes) else np.array([], dtype=object)
+
+
+def failed_rule_counts(bits, names):
+    return {name: int(np.count_nonzero(bits >> bit & 1)) for bit, name in enumerate(names)}
+
+
+def validate(df, business_rules, constraints=CHECK_CONSTRAINTS):
+    """
+    Split df into rows that can be loaded and rows to quarantine, scoring the loadable rows.
+
+    The loadable frame gets data_quality_score (0-100, share of business rules passed),
+    has_data_issues and validation_errors. The quarantine frame gets a rejected_by column.
+    Returns (valid, quarantine, summary).
+    """
+    check_bits, check_names = evaluate(df, constraints)
+    rejected = check_bits != 0
+
+    quarantine = df[rejected].copy()
+    quarantine['rejected_by'] = describe_bits(check_bits[rejected], check_names)
+    # Without rejects the quality columns are added to df itself, no copy
+    valid = df[~rejected] if rejected.any() else df
+
+    rule_bits, rule_names = evaluate(valid, compile_business_rules(business_rules))
+    failures = np.zeros(len(valid), dtype=np.int64)
+    for bit in range(len(rule_names)):
+        failures += rule_bits >> bit & 1
+    score = 100 - (100 * failures // len(rule_names) if rule_names else failures)
+
+    valid['data_quality_score'] = score.astype(np.uint8)
+    valid['has_data_issues'] = rule_bits != 0
+    valid['validation_errors'] = describe_bits(rule_bits, rule_names)
+
+    summary = {
+        'rows': len(df),
+        'valid_rows': len(valid),
+        'quarantined_rows': len(quarantine),
+        'rows_with_issues': int(np.count_nonzero(rule_bits)),
+        'rule_failures': failed_rule_counts(rule_bits, rule_names),
+        'constraint_failures': failed_rule_counts(check_bits, check_names),
+        'avg_quality_score': float(score.mean()) if len(score) else 100.0,
+    }
+    return valid, quarantine, summary
+
+
+def write_quarantine(quarantine, path=DEFAULT_QUARANTINE_PATH, append=False):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    header = not (append and os.path.exists(path))
+    quarantine.to_csv(path, mode='a' if append else 'w', header=header, index=False)
+    return path
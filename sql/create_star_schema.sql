@@ -139,6 +139,7 @@ CREATE TABLE loans_fact (
     updated_date DATETIME2 DEFAULT GETDATE(),
     etl_batch_id NVARCHAR(50),
     data_source NVARCHAR(50) DEFAULT 'ETL_PIPELINE',
+    row_key BIGINT NULL, -- source key hash of the row, written by --cdc loads (etl_cdc)
     
     -- Foreign Key Constraints
     CONSTRAINT FK_loans_fact_home_ownership 
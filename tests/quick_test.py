@@ -7,7 +7,7 @@ Quick Test Script สำหรับทดสอบการทำงานข
 import os
 import sys
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import inspect, text
 
 def test_data_file():
     """ทดสอบการอ่านไฟล์ข้อมูล"""
@@ -44,13 +44,12 @@ def test_database_connection():
     """ทดสอบการเชื่อมต่อฐานข้อมูล"""
     print("\n🔍 Testing database connection...")
     
-    server = 'mssql.minddatatech.com'
-    database = 'TestDB'
-    username = 'SA'
-    password = 'Passw0rd123456'
-    
     try:
-        engine = create_engine(f'mssql+pymssql://{username}:{password}@{server}/{database}')
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        import etl_db
+        
+        # database.yaml environment from ETL_ENV (ETL_ENV=local: embedded warehouse file); password from DB_PASSWORD
+        engine = etl_db.create_db_engine()
         
         with engine.connect() as connection:
             result = connection.execute(text('SELECT 1 as test'))
@@ -60,11 +59,8 @@ def test_database_connection():
                 print("✅ Database connection successful")
                 
                 # Test table existence
-                tables_check = connection.execute(text("""
-                    SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES 
-                    WHERE TABLE_NAME IN ('home_ownership_dim', 'loan_status_dim', 'issue_d_dim', 'loans_fact')
-                """))
-                table_count = tables_check.fetchone()[0]
+                table_count = sum(inspect(connection).has_table(table) for table in
+                                  ('home_ownership_dim', 'loan_status_dim', 'issue_d_dim', 'loans_fact'))
                 
                 if table_count > 0:
                     print(f"✅ Found {table_count} existing star schema tables")
@@ -79,7 +75,8 @@ def test_database_connection():
     except Exception as e:
         print(f"❌ Database connection failed: {str(e)}")
         print("   Please check:")
-        print("   - Network connectivity to mssql.minddatatech.com")
+        print(f"   - Network connectivity to the {os.getenv('ETL_ENV', 'development')} database "
+              "(ETL_ENV=local for the embedded warehouse)")
         print("   - SQL Server is running")
         print("   - Credentials are correct")
         return False
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ summary tables ที่คำนวณระหว่าง ETL (etl_aggregates.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_aggregates  # noqa: E402
+import etl_keystore  # noqa: E402
+import etl_main  # noqa: E402
+import etl_pipeline  # noqa: E402
+from tests.test_incremental import prepared_loans  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+
+def summary_loans():
+    df = prepared_loans()
+    # One group with two rows, so it has a standard deviation
+    df.loc[1, ['home_ownership', 'loan_status']] = ['RENT', 'Current']
+    return df.assign(funded_amnt=df['loan_amnt'] * 0.9, installment=df['loan_amnt'] / 30)
+
+
+class TestSummarize(unittest.TestCase):
+    """Test Suite สำหรับการคำนวณ aggregates จาก integer FK codes"""
+
+    def test_matches_groupby(self):
+        """ทดสอบว่า summarize() ให้ผลเท่ากับ pandas groupby บนค่าของ dimension"""
+        df = summary_loans()
+        dimensions = etl_main.build_dimension_tables(df)
+        summaries = etl_aggregates.summarize(etl_main.build_fact_table(df, dimensions), dimensions)
+
+        summary = summaries[etl_aggregates.SUMMARY_TABLE]
+        df['issue_month'] = df['issue_d'].dt.strftime('%Y-%m')
+        expected = df.groupby(['issue_month', 'home_ownership', 'loan_status']).agg(
+            loan_count=('loan_amnt', 'size'), total_loan_amount=('loan_amnt', 'sum'),
+            max_loan_amount=('loan_amnt', 'max'), stddev_loan_amount=('loan_amnt', 'std'),
+            avg_interest_rate=('int_rate', 'mean')).reset_index()
+        pd.testing.assert_frame_equal(summary[expected.columns], expected, check_dtype=False)
+        self.assertEqual(summary['stddev_loan_amount'].notna().sum(), 1)
+        self.assertEqual(summary['fiscal_year'].tolist(), [2014] * len(summary))
+
+        trends = summaries[etl_aggregates.TRENDS_TABLE]
+        self.assertEqual(trends['issue_month'].tolist(), ['2015-01', '2015-02', '2015-03'])
+        self.assertEqual(trends['rent_count'].tolist(), [2, 1, 1])
+        self.assertTrue(np.allclose(trends['avg_rate'], df.groupby('issue_month')['int_rate'].mean()))
+        print("✅ Summary measures match groupby")
+
+
+class TestSummaryTables(unittest.TestCase):
+    """Test Suite สำหรับ summary tables ในฐานข้อมูลเทียบกับ view definitions"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        self.frame = write_loans_csv(self.csv_file)
+        self.config = {
+            'data_sources': {'primary': {'file_path': self.csv_file}},
+            'etl': {'profiling': {'output_path': ''},
+                    'staging_cache': {'enabled': False},
+                    'surrogate_keys': {},
+                    'loading': {'mode': 'replace', 'batch_size': 500, 'parallel_workers': 1},
+                    'incremental': {'state_path': os.path.join(self.tmp_dir, 'partition_state.json')},
+                    'data_quality': {'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')}},
+        }
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def assertConsistent(self):
+        results = etl_aggregates.check_against_views(self.engine)
+        for view, result in results.items():
+            self.assertGreater(result['rows'], 0)
+            self.assertEqual(result['mismatches'], [], view)
+
+    def test_batch_load_matches_views(self):
+        """ทดสอบว่า summary tables หลัง batch load ตรงกับ SQL ของ vw_loan_summary / vw_monthly_trends"""
+        written = etl_pipeline.Pipeline(self.config, engine=self.engine).run('load_aggregates')['load_aggregates']
+        self.assertEqual(pd.read_sql('SELECT COUNT(*) AS n FROM agg_monthly_trends', self.engine)['n'][0],
+                         written[etl_aggregates.TRENDS_TABLE])
+        self.assertConsistent()
+        trends = pd.read_sql(f'SELECT * FROM {etl_aggregates.TRENDS_VIEW} ORDER BY year, month', self.engine)
+        self.assertTrue(np.isnan(trends['loan_count_change'].iloc[0]))
+        self.assertEqual(trends['loan_count_change'].iloc[1],
+                         trends['loan_count'].iloc[1] - trends['loan_count'].iloc[0])
+        print("✅ Summary tables consistent with the views")
+
+    def test_incremental_refresh_replaces_changed_months(self):
+        """ทดสอบว่า incremental load เขียน summary ใหม่เฉพาะเดือนที่เปลี่ยน"""
+        etl_pipeline.Pipeline(self.config, engine=self.engine).run('incremental_aggregates')
+        self.assertConsistent()
+
+        changed = self.frame['issue_d'] == 'Dec-2016'
+        self.frame.loc[changed, 'loan_amnt'] += 100
+        self.frame.loc[self.frame['issue_d'] == 'Feb-2015', 'issue_d'] = 'Mar-2015'
+        self.frame.to_csv(self.csv_file, index=False)
+        written = etl_pipeline.Pipeline(self.config, engine=self.engine).run(
+            'incremental_aggregates')['incremental_aggregates']
+        # Dec-2016 changed, Feb-2015 moved into Mar-2015
+        self.assertEqual(written[etl_aggregates.TRENDS_TABLE], 2)
+        trends = pd.read_sql('SELECT issue_month FROM agg_monthly_trends ORDER BY issue_month', self.engine)
+        self.assertEqual(trends['issue_month'].tolist(), ['2015-01', '2015-03', '2016-12'])
+        self.assertConsistent()
+        print("✅ Only the changed months refreshed")
+
+    def test_incremental_refresh_with_key_store(self):
+        """ทดสอบว่า incremental summary ใช้ id จาก key store เดียวกับที่ incremental load เขียน"""
+        key_path = os.path.join(self.tmp_dir, 'keys.db')
+        with etl_keystore.SurrogateKeyStore(key_path) as store:
+            # Ids in another order than the members are first seen in the file
+            store.ids_for('home_ownership', pd.Series(['OTHER', 'MORTGAGE', 'OWN', 'RENT']))
+            store.ids_for('loan_status', pd.Series(['Current', 'Charged Off', 'Fully Paid']))
+        self.config['etl']['surrogate_keys'] = {'path': key_path}
+        etl_pipeline.Pipeline(self.config, engine=self.engine).run('incremental_aggregates')
+        self.assertConsistent()
+        print("✅ Incremental summaries use the persistent keys")
+
+    def test_streaming_refresh(self):
+        """ทดสอบว่า streaming (pipelined) load สร้าง summary tables ใหม่จากตารางที่โหลดแล้ว"""
+        etl_pipeline.Pipeline(self.config, engine=self.engine).run('load_aggregates')
+        self.frame = self.frame[self.frame['issue_d'] != 'Jan-2015']
+        self.frame.to_csv(self.csv_file, index=False)
+        self.config['etl']['processing'] = {'chunk_size': 700, 'memory_limit_mb': 4096, 'pipelined': True}
+        written = etl_pipeline.Pipeline(self.config, engine=self.engine).run(
+            'streaming_aggregates')['streaming_aggregates']
+        self.assertEqual(written[etl_aggregates.TRENDS_TABLE], 3)
+        trends = pd.read_sql('SELECT issue_month FROM agg_monthly_trends ORDER BY issue_month', self.engine)
+        self.assertEqual(trends['issue_month'].tolist(), ['2015-02', '2015-03', '2016-12'])
+        self.assertConsistent()
+        print("✅ Summary tables refreshed after streaming")
+
+
+if __name__ == '__main__':
+    unittest.main()
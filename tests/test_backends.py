@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ embedded warehouse backends และ Arrow load method (etl_backends.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_aggregates  # noqa: E402
+import etl_backends  # noqa: E402
+import etl_db  # noqa: E402
+import etl_loader  # noqa: E402
+import etl_pipeline  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+
+def sample_frame():
+    # Every column kind the star schema loads, with nulls, plus a downcast DECIMAL column
+    return pd.DataFrame({
+        'loan_amnt': [1000.0, np.nan, 25000.0],
+        'int_rate': np.array([0.1356, 0.079, 0.2145], dtype=np.float32),
+        'issue_d_id': np.array([0, 1, 2], dtype=np.int8),
+        'term': pd.Categorical([' 36 months', ' 60 months', None]),
+        'loan_status': ['Fully Paid', None, 'Charged Off'],
+        'issue_d': pd.to_datetime(['2015-01-01', None, '2016-12-01']),
+    })
+
+
+class BackendTestCase(unittest.TestCase):
+    backend = 'sqlite'
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        url = etl_backends.get_backend(self.backend).url(os.path.join(self.tmp_dir, 'warehouse', 'etl.db'))
+        self.engine = etl_db.create_db_engine(url=url)
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def assertArrowLoad(self):
+        df = sample_frame()
+        etl_loader.load_table(df, 'arrow_table', self.engine, 'arrow', batch_size=2)
+        etl_loader.load_table(df, 'values_table', self.engine, 'multi_values', batch_size=2)
+        loaded = pd.read_sql('SELECT * FROM arrow_table', self.engine)
+        pd.testing.assert_frame_equal(loaded, pd.read_sql('SELECT * FROM values_table', self.engine))
+        self.assertEqual(loaded['int_rate'].tolist(), [0.1356, 0.079, 0.2145])
+        self.assertEqual(loaded['loan_status'].isna().tolist(), [False, True, False])
+        self.assertEqual(loaded['term'].isna().tolist(), [False, False, True])
+
+    def assertPipelineLoad(self, mode):
+        csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        write_loans_csv(csv_file)
+        config = {
+            'data_sources': {'primary': {'file_path': csv_file}},
+            'etl': {'profiling': {'output_path': ''},
+                    'staging_cache': {'enabled': False},
+                    'loading': {'mode': mode, 'method': 'arrow', 'batch_size': 500, 'parallel_workers': 2},
+                    'data_quality': {'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')}},
+        }
+        # A second run replaces the tables underneath the views
+        for _ in range(2):
+            pipeline = etl_pipeline.Pipeline(config, engine=self.engine)
+            pipeline.run('load', 'load_aggregates')
+        summary = pd.read_sql('SELECT * FROM vw_loan_summary', self.engine)
+        trends = pd.read_sql('SELECT * FROM vw_monthly_trends ORDER BY year, month', self.engine)
+        self.assertEqual(summary['loan_count'].sum(), len(pipeline['fact']))
+        self.assertEqual(trends['loan_count'].tolist(),
+                         pd.read_sql(f'SELECT loan_count FROM {etl_aggregates.TRENDS_VIEW} ORDER BY year, month',
+                                     self.engine)['loan_count'].tolist())
+        results = etl_aggregates.check_against_views(self.engine)
+        self.assertEqual([result['mismatches'] for result in results.values()], [[], []])
+
+
+class TestSQLiteBackend(BackendTestCase):
+    """Test Suite สำหรับ embedded SQLite warehouse"""
+
+    def test_arrow_method(self):
+        """ทดสอบว่า method arrow บน SQLite (executemany) โหลดค่าเดียวกับ multi_values"""
+        self.assertArrowLoad()
+        print("✅ Arrow method loads SQLite like multi_values")
+
+    def test_pipeline_views(self):
+        """ทดสอบว่า pipeline โหลด star schema และสร้าง vw_loan_summary / vw_monthly_trends"""
+        self.assertPipelineLoad('swap')
+        print("✅ SQLite warehouse loaded with views")
+
+    def test_database_yaml_environment(self):
+        """ทดสอบว่า environment ที่มี backend: sqlite ได้ URL ของไฟล์ warehouse"""
+        config_path = os.path.join(self.tmp_dir, 'database.yaml')
+        path = os.path.join(self.tmp_dir, 'out', 'warehouse.db')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            f.write(f"database:\n  local:\n    backend: sqlite\n    path: '{path}'\n")
+        self.assertEqual(etl_db.build_db_url('local', config_path), f'sqlite:///{path}')
+        self.assertTrue(os.path.isdir(os.path.dirname(path)))
+        with self.assertRaises(ValueError):
+            etl_backends.get_backend('oracle')
+        print("✅ Embedded backend selected from database.yaml")
+
+
+@unittest.skipUnless(etl_backends.duckdb is not None, "duckdb / duckdb-engine not installed")
+class TestDuckDBBackend(BackendTestCase):
+    """Test Suite สำหรับ embedded DuckDB warehouse ที่รับ Arrow buffers"""
+
+    backend = 'duckdb'
+
+    def test_arrow_method(self):
+        """ทดสอบว่า method arrow บน DuckDB (INSERT ... SELECT จาก Arrow) โหลดค่าเดียวกับ multi_values"""
+        self.assertTrue(etl_backends.backend_for(self.engine).zero_copy)
+        self.assertArrowLoad()
+        print("✅ Arrow buffers ingested by DuckDB")
+
+    def test_pipeline_views(self):
+        """ทดสอบว่า pipeline โหลด DuckDB ด้วย shadow-table swap และสร้าง views"""
+        self.assertPipelineLoad('swap')
+        print("✅ DuckDB warehouse loaded with views")
+
+
+if __name__ == '__main__':
+    unittest.main()
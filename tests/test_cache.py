@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ columnar staging cache (etl_cache.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_cache  # noqa: E402
+import etl_main  # noqa: E402
+
+
+@unittest.skipUnless(etl_cache.pa is not None, "pyarrow not installed")
+class TestStagingCache(unittest.TestCase):
+    """Test Suite สำหรับ cache ของ CSV ที่ parse แล้ว"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        self.write_csv(self.csv_file, seed=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_csv(self, path, seed, rows=500):
+        rng = np.random.default_rng(seed)
+        pd.DataFrame({
+            'loan_amnt': rng.integers(10, 400, rows) * 100,
+            'int_rate': [f'{rate:.2f}%' for rate in rng.uniform(5, 25, rows)],
+            'home_ownership': rng.choice(['RENT', 'OWN', 'MORTGAGE'], rows),
+            'issue_d': rng.choice(['2015-01-01', '2015-02-01'], rows),
+        }).to_csv(path, index=False)
+
+    def test_warm_read_matches_csv(self):
+        """ทดสอบว่า cache hit ให้ DataFrame เหมือน pd.read_csv รวมถึง dtype"""
+        kwargs = {'dtype': {'home_ownership': 'category'}, 'parse_dates': ['issue_d']}
+        expected = pd.read_csv(self.csv_file, **kwargs)
+
+        cache = etl_cache.StagingCache(self.cache_dir)
+        cold = cache.read_csv(self.csv_file, **kwargs)
+        warm = etl_cache.StagingCache(self.cache_dir).read_csv(self.csv_file, **kwargs)
+        pd.testing.assert_frame_equal(cold, expected)
+        pd.testing.assert_frame_equal(warm, expected)
+        self.assertEqual(cache.misses, 1)
+        print("✅ Warm read matches CSV parse")
+
+    def test_column_subset_and_invalidation(self):
+        """ทดสอบการอ่านเฉพาะคอลัมน์ และ cache miss เมื่อไฟล์หรือ option เปลี่ยน"""
+        cache = etl_cache.StagingCache(self.cache_dir)
+        cache.read_csv(self.csv_file)
+        subset = cache.read_csv(self.csv_file, usecols=['loan_amnt', 'home_ownership'])
+        self.assertEqual(list(subset.columns), ['loan_amnt', 'home_ownership'])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.read_csv(self.csv_file, dtype={'home_ownership': 'category'})
+        self.assertEqual(cache.misses, 2)
+
+        self.write_csv(self.csv_file, seed=2)
+        changed = cache.read_csv(self.csv_file)
+        pd.testing.assert_frame_equal(changed, pd.read_csv(self.csv_file))
+        self.assertEqual(cache.misses, 3)
+
+        cache.read_csv(self.csv_file, refresh=True)
+        self.assertEqual(cache.misses, 4)
+        print("✅ Column subset and invalidation")
+
+    def test_lru_eviction(self):
+        """ทดสอบว่า entry ที่ไม่ได้ใช้นานที่สุดถูกลบเมื่อเกินขนาด"""
+        cache = etl_cache.StagingCache(self.cache_dir)
+        files = []
+        for seed in range(3):
+            path = os.path.join(self.tmp_dir, f'loans_{seed}.csv')
+            self.write_csv(path, seed=seed)
+            files.append(path)
+            cache.read_csv(path)
+            time.sleep(0.01)
+        cache.read_csv(files[0])
+        entry_bytes = max(entry['bytes'] for entry in cache.index['entries'].values())
+
+        cache.max_bytes = 2 * entry_bytes
+        evicted = cache.evict()
+        self.assertEqual(len(evicted), 1)
+        remaining = {entry['source'] for entry in cache.index['entries'].values()}
+        self.assertEqual(remaining, {os.path.abspath(files[0]), os.path.abspath(files[2])})
+        self.assertEqual(len([name for name in os.listdir(self.cache_dir) if name.endswith('.arrow')]), 2)
+        print("✅ LRU eviction")
+
+    def test_typed_read_through_cache(self):
+        """ทดสอบ load_typed_csv ผ่าน cache"""
+        column_types = {'loan_amnt': 'integer', 'int_rate': 'string', 'home_ownership': 'string',
+                        'issue_d': 'date'}
+        cache = etl_cache.StagingCache(self.cache_dir)
+        first = etl_main.load_typed_csv(self.csv_file, column_types, cache=cache)
+        second = etl_main.load_typed_csv(self.csv_file, column_types, cache=cache, columns=['loan_amnt'])
+        self.assertEqual(cache.hits, 1)
+        pd.testing.assert_frame_equal(second, first[['loan_amnt']])
+        print("✅ Typed read through cache")
+
+
+if __name__ == '__main__':
+    unittest.main()
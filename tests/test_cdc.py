@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ change data capture ของ loans_fact (etl_cdc.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_cdc  # noqa: E402
+import etl_pipeline  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+
+class TestHashIndex(unittest.TestCase):
+    """Test Suite สำหรับ row hash index และการเทียบกับรอบก่อน"""
+
+    def test_diff_index(self):
+        """ทดสอบว่า diff แยก inserted, changed และ deleted โดยไม่ขึ้นกับลำดับแถว"""
+        identities = np.array([5, 1, 3, 7], dtype=np.uint64)
+        hashes = np.array([50, 10, 30, 70], dtype=np.uint64)
+        previous, _ = etl_cdc.build_index(identities, hashes)
+        current, group_of_row = etl_cdc.build_index(np.array([3, 9, 1, 5], dtype=np.uint64),
+                                                    np.array([30, 90, 11, 50], dtype=np.uint64))
+        self.assertEqual(current[:, etl_cdc.IDENTITY].tolist(), [1, 3, 5, 9])
+        self.assertEqual(group_of_row.tolist(), [1, 3, 0, 2])
+
+        inserted, changed, deleted = etl_cdc.diff_index(current, previous)
+        self.assertEqual(current[inserted, etl_cdc.IDENTITY].tolist(), [9])
+        self.assertEqual(current[changed, etl_cdc.IDENTITY].tolist(), [1])
+        self.assertEqual(previous[deleted, etl_cdc.IDENTITY].tolist(), [7])
+
+        shuffled, _ = etl_cdc.build_index(identities[::-1], hashes[::-1])
+        self.assertFalse(any(mask.any() for mask in etl_cdc.diff_index(shuffled, previous)))
+        print("✅ Inserted, changed and deleted identities found")
+
+
+class TestCDCLoad(unittest.TestCase):
+    """Test Suite สำหรับ CDC load เข้า SQLite"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        self.frame = write_loans_csv(self.csv_file)
+        self.frame.insert(0, 'id', np.arange(len(self.frame)))
+        self.frame.to_csv(self.csv_file, index=False)
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}")
+        self.index_path = os.path.join(self.tmp_dir, 'fact_hashes.npy')
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def pipeline(self, key_columns=('id',)):
+        config = {
+            'data_sources': {'primary': {'file_path': self.csv_file}},
+            'etl': {'profiling': {'output_path': ''},
+                    'staging_cache': {'enabled': False},
+                    'surrogate_keys': {'path': os.path.join(self.tmp_dir, 'surrogate_keys.db')},
+                    'cdc': {'index_path': self.index_path, 'key_columns': list(key_columns)},
+                    'incremental': {'state_path': os.path.join(self.tmp_dir, 'partition_state.json')},
+                    'loading': {'batch_size': 500},
+                    'data_quality': {'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')}},
+        }
+        return etl_pipeline.Pipeline(config, engine=self.engine)
+
+    def run_cdc(self, key_columns=('id',)):
+        pipeline = self.pipeline(key_columns)
+        return pipeline['cdc_load'], pipeline['fact']
+
+    def edit_source(self):
+        # Rows 0-1 change, row 2 is removed and one new loan arrives
+        frame = self.frame.copy()
+        frame.loc[[0, 1], 'loan_amnt'] += 100
+        frame.loc[[0, 1], 'funded_amnt'] += 100
+        arrival = frame.iloc[[5]].assign(id=len(frame), loan_amnt=123400, funded_amnt=123400)
+        frame = pd.concat([frame.drop(index=2), arrival], ignore_index=True)
+        frame.to_csv(self.csv_file, index=False)
+
+    def loaded_fact(self):
+        fact = pd.read_sql('SELECT * FROM loans_fact', self.engine).drop(columns=etl_cdc.KEY_COLUMN)
+        return fact.sort_values(list(fact.columns), ignore_index=True)
+
+    def assertLoaded(self, loans_fact):
+        expected = loans_fact.astype({'application_type': str, 'term': str}).astype(
+            {column: np.int64 for column in ('home_ownership_id', 'loan_status_id', 'issue_d_id')})
+        expected = expected.sort_values(list(expected.columns), ignore_index=True)
+        pd.testing.assert_frame_equal(self.loaded_fact(), expected, check_dtype=False)
+
+    def test_only_churn_written(self):
+        """ทดสอบว่ารอบที่สองเขียนเฉพาะแถวที่เปลี่ยน และผลในฐานข้อมูลเท่ากับ full reload"""
+        first, _ = self.run_cdc()
+        self.assertTrue(first['full_reload'])
+        self.assertEqual(first['inserted'], first['rows'])
+
+        unchanged, _ = self.run_cdc()
+        self.assertEqual((unchanged['rows_written'], unchanged['rows_deleted']), (0, 0))
+
+        self.edit_source()
+        summary, loans_fact = self.run_cdc()
+        self.assertFalse(summary['full_reload'])
+        self.assertEqual((summary['inserted'], summary['changed'], summary['deleted']), (1, 2, 1))
+        self.assertEqual(summary['unchanged'], summary['rows'] - 3)
+        self.assertEqual((summary['rows_written'], summary['rows_deleted']), (3, 3))
+        self.assertLoaded(loans_fact)
+        print("✅ Only inserted, changed and deleted rows written")
+
+    def test_without_key_changes_are_replacements(self):
+        """ทดสอบว่าเมื่อไม่มี key column แถวที่แก้ถูกนับเป็น deleted + inserted"""
+        self.run_cdc(key_columns=())
+        self.edit_source()
+        summary, loans_fact = self.run_cdc(key_columns=())
+        self.assertEqual((summary['inserted'], summary['changed'], summary['deleted']), (3, 0, 3))
+        self.assertLoaded(loans_fact)
+        print("✅ Row hash identity without key columns")
+
+    def test_mixed_load_modes(self):
+        """ทดสอบว่า --cdc หลัง --incremental โหลดใหม่ทั้งหมดแทนการทิ้งแถวซ้ำไว้"""
+        self.run_cdc()
+        self.pipeline()['incremental_load']
+        self.assertFalse(os.path.exists(self.index_path))
+
+        self.edit_source()
+        self.pipeline()['incremental_load']
+        summary, loans_fact = self.run_cdc()
+        self.assertTrue(summary['full_reload'])
+        self.assertLoaded(loans_fact)
+
+        # An index that survived a load without row keys (e.g. a direct etl_incremental run) is not trusted
+        shutil.copy(self.index_path, f'{self.index_path}.bak')
+        self.frame.to_csv(self.csv_file, index=False)
+        self.pipeline()['incremental_load']
+        shutil.move(f'{self.index_path}.bak', self.index_path)
+        self.assertFalse(etl_cdc.index_matches_table(self.engine, etl_cdc.load_index(self.index_path)))
+        summary, loans_fact = self.run_cdc()
+        self.assertTrue(summary['full_reload'])
+        self.assertLoaded(loans_fact)
+        print("✅ CDC reloads after another load mode")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ checkpoints และ resumable load (etl_checkpoint.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+from sqlalchemy import create_engine, inspect, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_checkpoint  # noqa: E402
+import etl_loader  # noqa: E402
+import etl_metrics  # noqa: E402
+import etl_pipeline  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+
+class TestCheckpointStore(unittest.TestCase):
+    """Test Suite สำหรับการเก็บและคืน output ของ stage"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.directory = os.path.join(self.tmp_dir, 'checkpoints')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_round_trip(self):
+        """ทดสอบว่า tuple/dict ของ DataFrame คืนค่าเหมือนเดิม รวม index และ category dtype"""
+        valid = pd.DataFrame({'loan_amnt': [1000, 2500], 'home_ownership': pd.Categorical(['RENT', 'OWN'])},
+                             index=[3, 7])
+        output = (valid, valid.head(0), {'rows': 2, 'rule_failures': {'dti_range': 0}})
+        store = etl_checkpoint.CheckpointStore(self.directory, 'run-a')
+        self.assertTrue(store.save('validate', output))
+        self.assertTrue(store.save('dimensions', {'home_ownership_dim': valid[['home_ownership']]}))
+
+        resumed = etl_checkpoint.CheckpointStore(self.directory, 'run-a', resume=True)
+        self.assertTrue(resumed.resumed)
+        self.assertEqual(resumed.stages(), ['validate', 'dimensions'])
+        restored = resumed.load('validate')
+        pd.testing.assert_frame_equal(restored[0], valid)
+        self.assertEqual(list(restored[1].columns), list(valid.columns))
+        self.assertEqual(restored[2], output[2])
+        self.assertEqual(list(resumed.load('dimensions')), ['home_ownership_dim'])
+
+        # Another run key, or no --resume, starts from an empty store
+        self.assertFalse(etl_checkpoint.CheckpointStore(self.directory, 'run-b', resume=True).has('validate'))
+        self.assertFalse(etl_checkpoint.CheckpointStore(self.directory, 'run-b').resumed)
+        print("✅ Checkpoint round trip")
+
+
+class TestResumableLoad(unittest.TestCase):
+    """Test Suite สำหรับ resume หลัง Step 8 ล้มกลางการโหลด loans_fact"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        write_loans_csv(self.csv_file)
+        self.checkpoint_dir = os.path.join(self.tmp_dir, 'checkpoints')
+        self.config = {
+            'data_sources': {'primary': {'file_path': self.csv_file}},
+            'etl': {'profiling': {'output_path': ''},
+                    'staging_cache': {'enabled': False},
+                    'surrogate_keys': {},
+                    'loading': {'batch_size': 200, 'parallel_workers': 1, 'fact_partitions': 2},
+                    'data_quality': {'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')}},
+        }
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def pipeline(self, metrics=None, resume=False):
+        return etl_pipeline.Pipeline(self.config, metrics=metrics, engine=self.engine,
+                                     checkpoint_dir=self.checkpoint_dir, resume=resume)
+
+    def test_resume_after_failed_load(self):
+        """ทดสอบว่า run ที่ resume ข้าม stage ที่เสร็จแล้ว และโหลด loans_fact ต่อจาก batch ที่ commit แล้ว"""
+        insert_batch = etl_loader.insert_batch
+        calls = []
+
+        def failing_insert_batch(*args, **kwargs):
+            calls.append(len(args[1]))
+            if len(calls) == 4:
+                raise ConnectionError('connection reset')
+            return insert_batch(*args, **kwargs)
+
+        with mock.patch.object(etl_loader, 'insert_batch', failing_insert_batch):
+            with self.assertRaises(ConnectionError):
+                self.pipeline().run()
+        # The failed partition kept its first three batches, the other partition finished
+        with self.engine.connect() as connection:
+            committed_rows = connection.execute(text('SELECT COUNT(*) FROM loans_fact')).scalar()
+        self.assertGreaterEqual(committed_rows, sum(calls[:3]))
+
+        metrics = etl_metrics.PipelineMetrics()
+        pipeline = self.pipeline(metrics, resume=True)
+        self.assertEqual(pipeline.pending('load'), ['load'])
+        result = pipeline.run()['load']
+
+        stages = {record['stage']: record for record in metrics.stages}
+        self.assertNotIn('extract', stages)
+        self.assertTrue(stages['fact'].get('resumed'))
+        loans_fact = pipeline.get('fact')
+        self.assertLess(committed_rows, len(loans_fact))
+        fact_rows = sum(entry['rows'] for entry in result['tables'] if entry['table'] == 'loans_fact')
+        self.assertEqual(fact_rows, len(loans_fact) - committed_rows)
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text('SELECT COUNT(*) FROM loans_fact')).scalar(), len(loans_fact))
+            self.assertEqual(connection.execute(text('SELECT SUM(loan_amnt) FROM loans_fact')).scalar(),
+                             int(loans_fact['loan_amnt'].sum()))
+            self.assertEqual(connection.execute(text(f'SELECT COUNT(*) FROM {etl_checkpoint.PROGRESS_TABLE}'))
+                             .scalar(), 0)
+        self.assertIn('issue_d_dim', inspect(self.engine).get_table_names())
+        # A completed load leaves no checkpoints behind
+        self.assertFalse(os.path.exists(os.path.join(self.checkpoint_dir, etl_checkpoint.MANIFEST_FILE)))
+        print("✅ Resumed from the last committed batch")
+
+    def test_fresh_run_ignores_committed_batches(self):
+        """ทดสอบว่า run ที่ไม่ได้ --resume โหลดทุก batch ใหม่ แม้ run ก่อนหน้าที่ล้มจะ commit บาง batch ไว้"""
+        insert_batch = etl_loader.insert_batch
+        calls = []
+
+        def failing_insert_batch(*args, **kwargs):
+            calls.append(len(args[1]))
+            if len(calls) == 4:
+                raise ConnectionError('connection reset')
+            return insert_batch(*args, **kwargs)
+
+        with mock.patch.object(etl_loader, 'insert_batch', failing_insert_batch):
+            with self.assertRaises(ConnectionError):
+                self.pipeline().run()
+
+        pipeline = self.pipeline()
+        result = pipeline.run()['load']
+        loans_fact = pipeline.get('fact')
+        fact_rows = sum(entry['rows'] for entry in result['tables'] if entry['table'] == 'loans_fact')
+        self.assertEqual(fact_rows, len(loans_fact))
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text('SELECT COUNT(*) FROM loans_fact')).scalar(), len(loans_fact))
+            self.assertEqual(connection.execute(text('SELECT SUM(loan_amnt) FROM loans_fact')).scalar(),
+                             int(loans_fact['loan_amnt'].sum()))
+        print("✅ Fresh run reloads every batch")
+
+    def test_changed_source_starts_over(self):
+        """ทดสอบว่า checkpoint ของไฟล์ต้นทางเดิมไม่ถูกใช้เมื่อไฟล์เปลี่ยน"""
+        self.pipeline().get('fact')
+        write_loans_csv(self.csv_file, rows=2000)
+        pipeline = self.pipeline(resume=True)
+        self.assertIn('extract', pipeline.pending('fact'))
+        self.assertEqual(len(pipeline.get('fact')), len(pipeline.get('validate')[0]))
+        print("✅ Changed source invalidates checkpoints")
+
+
+if __name__ == '__main__':
+    unittest.main()
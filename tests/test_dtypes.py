@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับการ downcast dtypes ตาม star schema DDL (etl_dtypes.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_dtypes  # noqa: E402
+import etl_pipeline  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+SCHEMA_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql',
+                          'create_star_schema.sql')
+
+
+class TestPlan(unittest.TestCase):
+    """Test Suite สำหรับการอ่าน DDL และการตรวจ precision ก่อน downcast"""
+
+    def test_parse_schema_sql(self):
+        """ทดสอบว่า column types มาจาก DDL และ computed columns ไม่ถูกนับ"""
+        schema = etl_dtypes.load_schema(SCHEMA_SQL, {'loans_fact': {'term': 'VARCHAR(10)'}})
+        self.assertEqual(schema['loans_fact']['int_rate'],
+                         {'type': 'DECIMAL', 'precision': 8, 'scale': 6, 'length': None})
+        self.assertEqual(schema['loans_fact']['term']['length'], 10)
+        self.assertEqual(schema['issue_d_dim']['month']['type'], 'INT')
+        self.assertNotIn('fiscal_year', schema['issue_d_dim'])
+        self.assertNotIn('CASE', schema['issue_d_dim'])
+        print("✅ DDL column types parsed")
+
+    def test_only_lossless_downcasts(self):
+        """ทดสอบว่าคอลัมน์ถูก downcast เฉพาะเมื่อทุกค่าเก็บได้ตรงตาม scale ของ DDL"""
+        columns = {name: etl_dtypes.parse_sql_type(definition) for name, definition in {
+            'status_id': 'INT', 'loan_amnt': 'DECIMAL(18,2)', 'int_rate': 'DECIMAL(8,6)',
+            'installment': 'DECIMAL(18,2)', 'big_rate': 'DECIMAL(8,6)', 'fee': 'DECIMAL(18,2)',
+            'score': 'INT', 'term': 'NVARCHAR(20)'}.items()}
+        df = pd.DataFrame({
+            'status_id': np.arange(6, dtype=np.int64),
+            'loan_amnt': np.array([1000, 25000, 40000, 500, 3000, 12000], dtype=np.int64),
+            'int_rate': np.array([13.56, 7.9, 21.45, 5.32, 10.0, 30.99]) / 100,
+            'installment': [123.45, 80.5, 1200.99, 19.99, np.nan, 460.01],
+            'big_rate': [12.5, 99.0, 100.0, 1.0, 2.0, 3.0],
+            'fee': [1.005, 2.0, 3.0, 4.0, 5.0, 6.0],
+            'score': [1.0, 2.0, np.nan, 4.0, 5.0, 6.0],
+            'term': ['36 months', '60 months'] * 3,
+        })
+        result, report = etl_dtypes.downcast(df, columns, 'loans_fact')
+        reasons = {entry['column']: (entry['to'], entry['reason']) for entry in report['columns']}
+        self.assertEqual(reasons['status_id'][0], 'int8')
+        self.assertEqual(reasons['loan_amnt'][0], 'int32')
+        self.assertEqual(reasons['int_rate'][0], 'float32')
+        self.assertEqual(reasons['installment'][0], 'float32')
+        self.assertEqual(reasons['big_rate'], (None, 'exceeds DECIMAL(8,6)'))
+        self.assertEqual(reasons['fee'], (None, 'more than 2 decimals'))
+        self.assertEqual(reasons['score'], (None, 'has nulls'))
+        self.assertEqual(str(result['term'].dtype), 'category')
+        self.assertLess(report['memory_after'], report['memory_before'])
+        self.assertLess(report['payload_row_after'], report['payload_row_before'])
+
+        # Widened back, the downcast values are the original decimals at the DDL scale
+        np.testing.assert_array_equal(etl_dtypes.exact_float64(result['int_rate'].to_numpy()),
+                                      df['int_rate'].round(6))
+        np.testing.assert_array_equal(etl_dtypes.widen_frame(result)['installment'], df['installment'])
+        self.assertEqual(df['int_rate'].dtype, np.float64)
+        print("✅ Only lossless downcasts applied")
+
+
+class TestPipelineDowncast(unittest.TestCase):
+    """Test Suite สำหรับ pipeline ที่เปิด etl.dtypes"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        write_loans_csv(self.csv_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def load(self, enabled, name):
+        config = {
+            'data_sources': {'primary': {'file_path': self.csv_file}},
+            'etl': {'profiling': {'output_path': ''},
+                    'staging_cache': {'enabled': False},
+                    'surrogate_keys': {},
+                    'dtypes': {'enabled': enabled, 'schema_sql': SCHEMA_SQL},
+                    'loading': {'mode': 'replace', 'batch_size': 500, 'parallel_workers': 1},
+                    'data_quality': {'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')}},
+        }
+        engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, name)}")
+        pipeline = etl_pipeline.Pipeline(config, engine=engine)
+        pipeline.run('load')
+        tables = {table: pd.read_sql(f'SELECT * FROM {table}', engine)
+                  for table in ('loans_fact', 'issue_d_dim', 'home_ownership_dim')}
+        engine.dispose()
+        return pipeline, tables
+
+    def test_loaded_values_unchanged(self):
+        """ทดสอบว่าตารางที่โหลดมีค่าเดิมที่ scale ของ DDL เมื่อ downcast ก่อนโหลด"""
+        pipeline, downcast = self.load(True, 'downcast.db')
+        _, full = self.load(False, 'full.db')
+        self.assertEqual(pipeline['fact']['int_rate'].dtype, np.float32)
+        self.assertEqual(pipeline['dimensions']['issue_d_dim']['issue_d_id'].dtype, np.int8)
+        # 9.39 / 100 is 0.09390000000000001 without downcasting, both are 0.093900 as DECIMAL(8,6)
+        scales = {'int_rate': 6, 'installment': 2}
+        for table, frame in full.items():
+            pd.testing.assert_frame_equal(downcast[table].round(scales), frame.round(scales), check_exact=True)
+        self.assertEqual(downcast['loans_fact']['int_rate'].round(6).tolist(),
+                         downcast['loans_fact']['int_rate'].tolist())
+        print("✅ Loaded values identical with downcasting")
+
+
+if __name__ == '__main__':
+    unittest.main()
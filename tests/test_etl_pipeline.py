@@ -6,15 +6,41 @@ ETL Unit Testing Framework using Real Data from data/LoanStats_web_small.csv
 """
 
 import unittest
-import pandas as pd
-import numpy as np
 import os
 import sys
-from unittest.mock import patch, MagicMock
-from sqlalchemy import create_engine, text
+import tempfile
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_cache  # noqa: E402
+import etl_main  # noqa: E402
+import etl_pipeline  # noqa: E402
+
+# ทุก test class อ่าน CSV เดียวกัน: parse ครั้งเดียวแล้วใช้ staging cache ร่วมกัน (ข้ามรอบการรันด้วย)
+SOURCE_CACHE = etl_cache.StagingCache(os.path.join(tempfile.gettempdir(), 'etl_test_staging_cache'), max_size_mb=256)
+
+
+def read_source_csv(csv_file):
+    """อ่าน CSV ต้นทางผ่าน staging cache"""
+    return SOURCE_CACHE.read_csv(csv_file, low_memory=False)
+
+
+def pipeline_test_config():
+    """etl_config.yaml ที่ให้ cache, profile และ quarantine อยู่ใน temp directory แทน working tree"""
+    config = etl_main.load_config()
+    etl = config.setdefault('etl', {})
+    inference = etl.setdefault('type_inference', {})
+    inference['schema_cache'] = dict(inference.get('schema_cache', {}), path=os.path.join(
+        tempfile.gettempdir(), 'etl_test_schema_types.json'))
+    etl['staging_cache'] = dict(etl.get('staging_cache', {}), dir=SOURCE_CACHE.cache_dir, max_size_mb=256)
+    etl['profiling'] = {'output_path': os.path.join(tempfile.gettempdir(), 'etl_test_profile.json')}
+    etl['data_quality'] = dict(etl.get('data_quality', {}), quarantine_path=os.path.join(
+        tempfile.gettempdir(), 'etl_test_rejects.csv'))
+    etl['surrogate_keys'] = {}
+    return config
+
+
 class TestDataLoading(unittest.TestCase):
     """Test Suite สำหรับการโหลดและตรวจสอบข้อมูลต้นฉบับ"""
     
@@ -35,7 +61,7 @@ class TestDataLoading(unittest.TestCase):
     def test_csv_file_readable(self):
         """ทดสอบว่าไฟล์ CSV อ่านได้"""
         try:
-            df = pd.read_csv(self.csv_file, low_memory=False)
+            df = read_source_csv(self.csv_file)
             self.assertGreater(len(df), 0, "ไฟล์ CSV ต้องมีข้อมูล")
             self.assertGreater(len(df.columns), 0, "ไฟล์ CSV ต้องมีคอลัมน์")
             print(f"✅ อ่านไฟล์สำเร็จ: {len(df):,} แถว, {len(df.columns)} คอลัมน์")
@@ -44,7 +70,7 @@ class TestDataLoading(unittest.TestCase):
     
     def test_required_columns_exist(self):
         """ทดสอบว่าคอลัมน์ที่จำเป็นมีอยู่ใน CSV"""
-        df = pd.read_csv(self.csv_file, low_memory=False)
+        df = read_source_csv(self.csv_file)
         
         required_columns = [
             'loan_amnt', 'funded_amnt', 'term', 'int_rate', 'installment',
@@ -65,7 +91,7 @@ class TestDataQuality(unittest.TestCase):
     def setUpClass(cls):
         """โหลดข้อมูลจริงจาก CSV"""
         cls.csv_file = 'data/LoanStats_web_small.csv'
-        cls.raw_df = pd.read_csv(cls.csv_file, low_memory=False)
+        cls.raw_df = read_source_csv(cls.csv_file)
         print(f"โหลดข้อมูลต้นฉบับ: {len(cls.raw_df):,} แถว")
     
     def test_data_completeness(self):
@@ -127,61 +153,16 @@ class TestETLPipeline(unittest.TestCase):
     
     @classmethod
     def run_etl_pipeline(cls):
-        """รัน ETL pipeline เหมือนใน ETL-dev.py"""
-        # Load raw data
-        cls.raw_df = pd.read_csv(cls.csv_file, low_memory=False)
-        
-        # Filter columns by missing data
-        missing_percentage = cls.raw_df.isnull().mean() * 100
-        columns_to_keep = missing_percentage[missing_percentage <= 30].index.tolist()
-        filtered_col_df = cls.raw_df[columns_to_keep]
-        
-        # Filter rows by null count
-        acceptable_max_null = 26
-        selected_columns = [col for col in filtered_col_df.columns 
-                          if filtered_col_df[col].isnull().sum() <= acceptable_max_null]
-        df_selected = filtered_col_df[selected_columns]
-        cls.no_null_df = df_selected.dropna()
-        
-        # Transform data
-        cls.df_prepared = cls.no_null_df.copy()
-        
-        if 'issue_d' in cls.df_prepared.columns:
-            cls.df_prepared['issue_d'] = pd.to_datetime(cls.df_prepared['issue_d'], format='%b-%Y')
-        
-        if 'int_rate' in cls.df_prepared.columns and cls.df_prepared['int_rate'].dtype == 'object':
-            cls.df_prepared['int_rate'] = cls.df_prepared['int_rate'].str.rstrip('%').astype('float') / 100.0
-        
-        # Create dimension tables
-        if 'home_ownership' in cls.df_prepared.columns:
-            cls.home_ownership_dim = cls.df_prepared[['home_ownership']].drop_duplicates().reset_index(drop=True)
-            cls.home_ownership_dim['home_ownership_id'] = cls.home_ownership_dim.index
-        
-        if 'loan_status' in cls.df_prepared.columns:
-            cls.loan_status_dim = cls.df_prepared[['loan_status']].drop_duplicates().reset_index(drop=True)
-            cls.loan_status_dim['loan_status_id'] = cls.loan_status_dim.index
-        
-        if 'issue_d' in cls.df_prepared.columns:
-            cls.issue_d_dim = cls.df_prepared[['issue_d']].drop_duplicates().reset_index(drop=True)
-            cls.issue_d_dim['month'] = cls.issue_d_dim['issue_d'].dt.month
-            cls.issue_d_dim['year'] = cls.issue_d_dim['issue_d'].dt.year
-            cls.issue_d_dim['issue_d_id'] = cls.issue_d_dim.index
-        
-        # Create fact table
-        home_ownership_map = cls.home_ownership_dim.set_index('home_ownership')['home_ownership_id'].to_dict()
-        loan_status_map = cls.loan_status_dim.set_index('loan_status')['loan_status_id'].to_dict()
-        issue_d_map = cls.issue_d_dim.set_index('issue_d')['issue_d_id'].to_dict()
-        
-        cls.loans_fact = cls.df_prepared.copy()
-        cls.loans_fact['home_ownership_id'] = cls.loans_fact['home_ownership'].map(home_ownership_map)
-        cls.loans_fact['loan_status_id'] = cls.loans_fact['loan_status'].map(loan_status_map)
-        cls.loans_fact['issue_d_id'] = cls.loans_fact['issue_d'].map(issue_d_map)
-        
-        # Select fact columns
-        fact_columns = ['application_type', 'loan_amnt', 'funded_amnt', 'term', 'int_rate', 
-                       'installment', 'home_ownership_id', 'loan_status_id', 'issue_d_id']
-        available_columns = [col for col in fact_columns if col in cls.loans_fact.columns]
-        cls.loans_fact = cls.loans_fact[available_columns]
+        """รัน ETL pipeline ผ่าน etl_pipeline.Pipeline เดียวกับ CLI (ถึง fact table ไม่โหลดเข้า database)"""
+        pipeline = etl_pipeline.Pipeline(pipeline_test_config())
+        cls.raw_df = pipeline.get('extract')
+        cls.no_null_df = pipeline.get('filter')
+        # Before validation quarantines rule violators, so test_business_rules checks the data itself
+        cls.df_prepared = pipeline.get('transform')
+        dimensions = etl_main.build_dimension_tables(cls.df_prepared)
+        for name, dim in dimensions.items():
+            setattr(cls, name, dim)
+        cls.loans_fact = etl_main.build_fact_table(cls.df_prepared, dimensions)
     
     def test_data_filtering_effectiveness(self):
         """ทดสอบประสิทธิภาพของการกรองข้อมูล"""
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ incremental load ตามเดือนของ issue_d (etl_incremental.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_incremental  # noqa: E402
+import etl_pipeline  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+
+def prepared_loans():
+    return pd.DataFrame({
+        'loan_amnt': [1000.0, 2000.0, 3000.0, 4000.0, 5000.0, 6000.0],
+        'int_rate': [0.10, 0.12, 0.08, 0.15, 0.11, 0.09],
+        'home_ownership': ['RENT', 'OWN', 'RENT', 'MORTGAGE', 'OWN', 'RENT'],
+        'loan_status': ['Current', 'Fully Paid', 'Current', 'Charged Off', 'Current', 'Current'],
+        'issue_d': pd.to_datetime(['2015-01-01', '2015-01-01', '2015-02-01', '2015-02-01',
+                                   '2015-03-01', '2015-03-01']),
+    })
+
+
+class TestIncrementalLoad(unittest.TestCase):
+    """Test Suite สำหรับ partition checksum และ incremental load"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.tmp_dir, 'state', 'partition_state.json')
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def run_load(self, df):
+        return etl_incremental.run_incremental_load(self.engine, df, self.state_path)
+
+    def test_checksums_ignore_row_order(self):
+        """ทดสอบว่า checksum ไม่ขึ้นกับลำดับแถว แต่เปลี่ยนเมื่อค่าเปลี่ยน"""
+        df = prepared_loans()
+        checksums = etl_incremental.partition_checksums(df)
+        self.assertEqual(sorted(checksums), ['2015-01', '2015-02', '2015-03'])
+
+        shuffled = df.sample(frac=1, random_state=1).reset_index(drop=True)
+        self.assertEqual(etl_incremental.partition_checksums(shuffled), checksums)
+
+        df.loc[2, 'loan_amnt'] = 3500.0
+        changed = etl_incremental.partition_checksums(df)
+        self.assertNotEqual(changed['2015-02'], checksums['2015-02'])
+        self.assertEqual(changed['2015-01'], checksums['2015-01'])
+        print("✅ Partition checksums are order independent")
+
+    def test_unchanged_source_loads_nothing(self):
+        """ทดสอบว่ารอบที่สองที่ข้อมูลไม่เปลี่ยนไม่โหลดอะไรเลย"""
+        first = self.run_load(prepared_loans())
+        self.assertEqual(first['rows_loaded'], 6)
+        self.assertEqual(first['changed'], ['2015-01', '2015-02', '2015-03'])
+
+        second = self.run_load(prepared_loans())
+        self.assertEqual(second['changed'], [])
+        self.assertEqual(second['rows_loaded'], 0)
+        self.assertEqual(second['rows_deleted'], 0)
+        self.assertEqual(len(pd.read_sql('SELECT * FROM loans_fact', self.engine)), 6)
+        print("✅ Unchanged partitions skipped")
+
+    def test_changed_month_reloaded_with_stable_ids(self):
+        """ทดสอบว่าโหลดใหม่เฉพาะเดือนที่เปลี่ยน และ id เดิมของ dimension ไม่เปลี่ยน"""
+        self.run_load(prepared_loans())
+        dim_before = pd.read_sql('SELECT * FROM home_ownership_dim', self.engine)
+
+        df = prepared_loans()
+        df.loc[4, 'home_ownership'] = 'OTHER'
+        summary = self.run_load(df)
+        self.assertEqual(summary['changed'], ['2015-03'])
+        self.assertEqual(summary['rows_deleted'], 2)
+        self.assertEqual(summary['rows_loaded'], 2)
+        self.assertEqual(summary['new_members']['home_ownership_dim'], 1)
+
+        dim_after = pd.read_sql('SELECT * FROM home_ownership_dim', self.engine)
+        pd.testing.assert_frame_equal(dim_after.iloc[:len(dim_before)], dim_before)
+        self.assertEqual(dim_after['home_ownership'].iloc[-1], 'OTHER')
+        self.assertEqual(dim_after['home_ownership_id'].iloc[-1], dim_before['home_ownership_id'].max() + 1)
+
+        loaded = pd.read_sql(
+            'SELECT f.loan_amnt, h.home_ownership FROM loans_fact f '
+            'JOIN home_ownership_dim h ON f.home_ownership_id = h.home_ownership_id ORDER BY f.loan_amnt',
+            self.engine)
+        self.assertEqual(len(loaded), 6)
+        self.assertEqual(loaded['home_ownership'].tolist(), df.sort_values('loan_amnt')['home_ownership'].tolist())
+        print("✅ Only the changed month reloaded")
+
+    def test_removed_month_deleted(self):
+        """ทดสอบว่าเดือนที่หายไปจาก source ถูกลบออกจาก fact table"""
+        self.run_load(prepared_loans())
+        df = prepared_loans()
+        summary = self.run_load(df[df['issue_d'] < '2015-03-01'])
+        self.assertEqual(summary['deleted'], ['2015-03'])
+        self.assertEqual(summary['rows_deleted'], 2)
+        self.assertEqual(len(pd.read_sql('SELECT * FROM loans_fact', self.engine)), 4)
+
+        state = etl_incremental.load_partition_state(self.state_path)
+        self.assertEqual(state['watermark'], '2015-02')
+        print("✅ Removed month deleted")
+
+    def test_full_load_resets_partition_state(self):
+        """ทดสอบว่า --incremental หลัง full load ของไฟล์อื่นโหลดทุกเดือนใหม่ แทนการรายงานว่าไม่มีอะไรเปลี่ยน"""
+        file_a, file_b = (os.path.join(self.tmp_dir, name) for name in ('loans_a.csv', 'loans_b.csv'))
+        write_loans_csv(file_a, rows=1200, seed=1)
+        frame = write_loans_csv(file_b, rows=1000, seed=2)
+        frame[frame['issue_d'] != 'Dec-2016'].to_csv(file_b, index=False)
+
+        def run(node, csv_file):
+            config = {
+                'data_sources': {'primary': {'file_path': csv_file}},
+                'etl': {'profiling': {'output_path': ''},
+                        'staging_cache': {'enabled': False},
+                        'surrogate_keys': {},
+                        'incremental': {'state_path': self.state_path},
+                        'cdc': {'index_path': os.path.join(self.tmp_dir, 'fact_hashes.npy')},
+                        'loading': {'mode': 'replace', 'method': 'executemany'},
+                        'data_quality': {'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')}},
+            }
+            pipeline = etl_pipeline.Pipeline(config, engine=self.engine)
+            return pipeline[node], pipeline['validate'][0]
+
+        run('incremental_load', file_b)
+        run('load', file_a)
+        self.assertFalse(os.path.exists(self.state_path))
+
+        summary, validated = run('incremental_load', file_b)
+        self.assertTrue(summary['full_reload'])
+        self.assertEqual(summary['changed'], ['2015-01', '2015-02', '2015-03'])
+        self.assertEqual(summary['rows_loaded'], len(validated))
+        loaded = pd.read_sql('SELECT f.loan_amnt, d.issue_d FROM loans_fact f '
+                             'JOIN issue_d_dim d ON f.issue_d_id = d.issue_d_id', self.engine)
+        self.assertEqual(sorted(loaded['loan_amnt']), sorted(validated['loan_amnt']))
+        self.assertFalse(loaded['issue_d'].str.startswith('2016').any())
+        print("✅ Incremental run after a full load replaces every month")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ persistent surrogate key store (etl_keystore.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_db  # noqa: E402
+import etl_keystore  # noqa: E402
+import etl_main  # noqa: E402
+import etl_pipeline  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+
+class TestSurrogateKeyStore(unittest.TestCase):
+    """Test Suite สำหรับ surrogate key ที่คงที่ข้ามรอบการรัน"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'state', 'keys.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_ids_stable_across_runs(self):
+        """ทดสอบว่า id เดิมไม่เปลี่ยนและ member ใหม่ได้ id ต่อท้าย"""
+        with etl_keystore.SurrogateKeyStore(self.path) as store:
+            ids = store.ids_for('home_ownership', pd.Series(['RENT', 'OWN', 'RENT', 'MORTGAGE']))
+            self.assertEqual(ids.tolist(), [0, 1, 0, 2])
+
+        # A later run sees the members in a different order plus a new one
+        with etl_keystore.SurrogateKeyStore(self.path) as store:
+            ids = store.ids_for('home_ownership', pd.Series(['OTHER', 'MORTGAGE', 'RENT']))
+            self.assertEqual(ids.tolist(), [3, 2, 0])
+            self.assertEqual(list(store.members('home_ownership')), ['RENT', 'OWN', 'MORTGAGE', 'OTHER'])
+        print("✅ Surrogate keys stable across runs")
+
+    def test_dates_and_dimensions_are_separate(self):
+        """ทดสอบ natural key ที่เป็นวันที่และการแยก key ตาม dimension"""
+        dates = pd.Series(pd.to_datetime(['2015-02-01', '2015-01-01', '2015-02-01']))
+        with etl_keystore.SurrogateKeyStore(self.path) as store:
+            self.assertEqual(store.ids_for('issue_d', dates).tolist(), [0, 1, 0])
+            self.assertEqual(store.ids_for('loan_status', pd.Series(['Current'])).tolist(), [0])
+            self.assertEqual(list(store.members('issue_d')), ['2015-02-01T00:00:00', '2015-01-01T00:00:00'])
+            with self.assertRaises(ValueError):
+                store.ids_for('loan_status', pd.Series(['Current', None]))
+        print("✅ Date keys and per-dimension ids")
+
+    def test_star_schema_uses_store(self):
+        """ทดสอบว่า dimension และ fact table ใช้ id จาก key store"""
+        first = pd.DataFrame({
+            'loan_amnt': [1000.0, 2000.0],
+            'home_ownership': ['RENT', 'OWN'],
+            'loan_status': ['Current', 'Current'],
+            'issue_d': pd.to_datetime(['2015-01-01', '2015-02-01']),
+        })
+        second = pd.DataFrame({
+            'loan_amnt': [3000.0, 4000.0, 5000.0],
+            'home_ownership': ['MORTGAGE', 'OWN', 'MORTGAGE'],
+            'loan_status': ['Fully Paid', 'Current', 'Current'],
+            'issue_d': pd.to_datetime(['2015-02-01', '2015-03-01', '2015-03-01']),
+        })
+        with etl_keystore.SurrogateKeyStore(self.path) as store:
+            etl_main.build_dimension_tables(first, store)
+            dimensions = etl_main.build_dimension_tables(second, store)
+
+        home_dim = dimensions['home_ownership_dim']
+        self.assertEqual(dict(zip(home_dim['home_ownership'], home_dim['home_ownership_id'])),
+                         {'MORTGAGE': 2, 'OWN': 1})
+        loans_fact = etl_main.build_fact_table(second, dimensions)
+        self.assertEqual(loans_fact['home_ownership_id'].tolist(), [2, 1, 2])
+        self.assertEqual(loans_fact['issue_d_id'].tolist(), [1, 2, 2])
+        self.assertEqual(loans_fact['loan_status_id'].tolist(), [1, 0, 0])
+        print("✅ Star schema built from persistent keys")
+
+    def test_ids_stable_across_load_modes(self):
+        """ทดสอบว่า batch, streaming และ incremental load สลับกันแล้ว id ของ dimension ไม่เปลี่ยน"""
+        engine = etl_db.create_db_engine(url=f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}")
+        files = []
+        for seed in (3, 8):
+            # Different seeds see the members in a different first-seen order
+            files.append(os.path.join(self.tmp_dir, f'loans_{seed}.csv'))
+            write_loans_csv(files[-1], rows=1500, seed=seed)
+
+        def dimension_ids():
+            return {column: dict(pd.read_sql(f'SELECT * FROM {column}_dim', engine)[[column, f'{column}_id']]
+                                 .astype(str).itertuples(index=False))
+                    for column in ('home_ownership', 'loan_status', 'issue_d')}
+
+        runs = []
+        for node, csv_file in [('load', files[0]), ('streaming', files[1]), ('load', files[1]),
+                               ('streaming', files[0]), ('incremental_load', files[1])]:
+            config = {
+                'data_sources': {'primary': {'file_path': csv_file}},
+                'etl': {'profiling': {'output_path': ''},
+                        'processing': {'chunk_size': 400, 'memory_limit_mb': 4096},
+                        'staging_cache': {'enabled': False},
+                        'surrogate_keys': {'path': self.path},
+                        'incremental': {'state_path': os.path.join(self.tmp_dir, 'state', 'partitions.json')},
+                        'loading': {'mode': 'replace', 'method': 'executemany'},
+                        'data_quality': {'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')}},
+            }
+            etl_pipeline.Pipeline(config, engine=engine).run(node)
+            runs.append(dimension_ids())
+        engine.dispose()
+
+        for node, ids in zip(['streaming', 'load', 'streaming', 'incremental_load'], runs[1:]):
+            self.assertEqual(ids, runs[0], node)
+        print("✅ Surrogate keys stable across batch, streaming and incremental loads")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ bulk loader (etl_loader.py) โดยใช้ SQLite แทน SQL Server
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_loader  # noqa: E402
+
+
+class TestBulkLoader(unittest.TestCase):
+    """Test Suite สำหรับทุก load method บน SQLite"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}")
+        rows = 2500
+        rng = np.random.default_rng(11)
+        self.loans_fact = pd.DataFrame({
+            'application_type': rng.choice(['Individual', 'Joint App'], rows),
+            'loan_amnt': rng.integers(10, 400, rows) * 100.0,
+            'term': rng.choice([' 36 months', ' 60 months'], rows),
+            'int_rate': np.round(rng.uniform(0.05, 0.25, rows), 4),
+            'home_ownership_id': rng.integers(0, 3, rows),
+        })
+        self.loans_fact.loc[5, 'term'] = None
+        self.issue_d_dim = pd.DataFrame({'issue_d': pd.to_datetime(['2015-01-01', '2015-02-01']),
+                                         'issue_d_id': [0, 1]})
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_all_methods_load_identical_rows(self):
+        """ทดสอบว่าทุก method โหลดข้อมูลได้ครบและถูกต้อง"""
+        for method in etl_loader.LOAD_METHODS:
+            with self.subTest(method=method):
+                stats = etl_loader.load_table(self.loans_fact, 'loans_fact', self.engine, method, batch_size=700)
+                loaded = pd.read_sql('SELECT * FROM loans_fact', self.engine)
+
+                self.assertEqual(stats['rows'], len(self.loans_fact))
+                self.assertGreater(stats['rows_per_sec'], 0)
+                self.assertEqual(len(loaded), len(self.loans_fact))
+                self.assertTrue(pd.isna(loaded.loc[5, 'term']))
+                pd.testing.assert_series_equal(loaded['int_rate'], self.loans_fact['int_rate'])
+                pd.testing.assert_series_equal(loaded['home_ownership_id'], self.loans_fact['home_ownership_id'],
+                                               check_dtype=False)
+
+    def test_multi_values_respects_parameter_limit(self):
+        """ทดสอบว่าจำนวน parameter ต่อ statement ไม่เกินขีดจำกัดของ SQL Server"""
+        self.assertEqual(etl_loader.values_batch_rows(9), 222)
+        self.assertEqual(etl_loader.values_batch_rows(1), etl_loader.MAX_VALUES_ROWS)
+        stats = etl_loader.load_table(self.loans_fact, 'loans_fact', self.engine, 'multi_values')
+        self.assertEqual(stats['batches'], -(-len(self.loans_fact) // etl_loader.values_batch_rows(5)))
+
+    def test_append_and_star_schema(self):
+        """ทดสอบการโหลด star schema และโหมด append"""
+        stats = etl_loader.load_star_schema(self.engine, {'issue_d_dim': self.issue_d_dim}, self.loans_fact,
+                                            method='executemany')
+        self.assertEqual([s['table'] for s in stats], ['issue_d_dim', 'loans_fact'])
+
+        etl_loader.load_table(self.loans_fact, 'loans_fact', self.engine, 'executemany', if_exists='append')
+        count = pd.read_sql('SELECT COUNT(*) AS n FROM loans_fact', self.engine)['n'][0]
+        self.assertEqual(count, 2 * len(self.loans_fact))
+
+    def test_staging_file_format(self):
+        """ทดสอบว่า staging file ไม่มี escape character และเขียน bool เป็น 0/1 ตามที่ bcp -c ต้องการ"""
+        df = pd.DataFrame({'title': ['tab\there, "quoted"', None], 'flag': [True, False],
+                           'maybe': pd.array([None, True], dtype='boolean')})
+        path = os.path.join(self.tmp_dir, 'staging.dat')
+        etl_loader._write_staging_file(df, path)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'tab\there, "quoted"\x1f1\x1f\x1e\x1f0\x1f1\x1e')
+        self.assertEqual(list(etl_loader._iter_staging_batches(path, 10)),
+                         [[('tab\there, "quoted"', '1', None), (None, '0', '1')]])
+
+        etl_loader.load_table(df, 'flags', self.engine, 'staging_file')
+        loaded = pd.read_sql('SELECT * FROM flags', self.engine)
+        self.assertEqual(loaded['title'][0], df['title'][0])
+        self.assertEqual(loaded['flag'].tolist(), [1, 0])
+
+        with self.assertRaises(ValueError):
+            etl_loader._write_staging_file(pd.DataFrame({'title': ['a\x1fb']}), path)
+
+        engine = create_engine('mssql+pymssql://etl@sqlserver/TestDB')
+        command = etl_loader._bcp_command(engine, 'loans_fact', path, 1000)
+        self.assertIn('-T', command)
+        self.assertNotIn('-P', command)
+        self.assertEqual(command[command.index('-t') + 1], '0x1f')
+
+    def test_unknown_method(self):
+        """ทดสอบว่า method ที่ไม่รู้จักถูกปฏิเสธ"""
+        with self.assertRaises(ValueError):
+            etl_loader.load_table(self.loans_fact, 'loans_fact', self.engine, 'bulk_magic')
+
+
+class TestParallelLoader(unittest.TestCase):
+    """Test Suite สำหรับการโหลด dimension พร้อมกันและ fact แบบแบ่ง partition"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}",
+                                    pool_size=4, max_overflow=0, connect_args={'timeout': 30})
+        rows = 3001
+        self.loans_fact = pd.DataFrame({'loan_amnt': np.arange(rows) * 10.0,
+                                        'home_ownership_id': np.arange(rows) % 3})
+        self.dimensions = {
+            'home_ownership_dim': pd.DataFrame({'home_ownership': ['RENT', 'OWN', 'MORTGAGE'],
+                                                'home_ownership_id': [0, 1, 2]}),
+            'loan_status_dim': pd.DataFrame({'loan_status': ['Current'], 'loan_status_id': [0]}),
+        }
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_partitions_cover_all_rows(self):
+        """ทดสอบว่า partition ครอบคลุมทุกแถวโดยไม่ซ้ำ"""
+        parts = etl_loader.partition_frame(self.loans_fact, 4)
+        self.assertEqual(len(parts), 4)
+        self.assertEqual(sum(len(part) for part in parts), len(self.loans_fact))
+        self.assertEqual(len(etl_loader.partition_frame(self.loans_fact.head(2), 4)), 2)
+
+    def test_parallel_load(self):
+        """ทดสอบการโหลดแบบขนานและ timing breakdown ต่อ table/worker"""
+        result = etl_loader.load_star_schema_parallel(self.engine, self.dimensions, self.loans_fact,
+                                                      method='executemany', workers=3, fact_partitions=4)
+
+        loaded = pd.read_sql('SELECT loan_amnt FROM loans_fact ORDER BY loan_amnt', self.engine)
+        self.assertEqual(list(loaded['loan_amnt']), list(self.loans_fact['loan_amnt']))
+        self.assertEqual(len(pd.read_sql('SELECT * FROM home_ownership_dim', self.engine)), 3)
+
+        partitions = [entry for entry in result['tables'] if entry['table'] == 'loans_fact']
+        self.assertEqual(len(partitions), 4)
+        self.assertTrue(set(result['workers']) <= {entry['worker'] for entry in result['tables']})
+        self.assertIn('loans_fact', etl_loader.format_timing_breakdown(result))
+
+    def test_timing_breakdown_alignment(self):
+        """ทดสอบว่า timing breakdown จัดคอลัมน์ตรงกันเมื่อชื่อตารางยาว เช่น shadow tables"""
+        result = {'tables': [{'table': 'loans_fact__shadow_archive', 'rows': 1000, 'seconds': 1.0},
+                             {'table': 'issue_d_dim__shadow', 'rows': 60, 'seconds': 0.5}],
+                  'workers': {'etl-load_0': 1.5}, 'seconds': 1.5}
+        lines = etl_loader.format_timing_breakdown(result).splitlines()[1:]
+        width = len('loans_fact__shadow_archive')
+        self.assertEqual([line[3:3 + width].rstrip() for line in lines],
+                         ['loans_fact__shadow_archive', 'issue_d_dim__shadow', 'etl-load_0', 'wall time'])
+        self.assertTrue(all(line[3 + width] == ' ' for line in lines))
+        self.assertEqual(len({line.index(' rows') for line in lines[:2]}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ stage instrumentation (etl_metrics.py)
+"""
+
+import json
+import os
+import sys
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_metrics  # noqa: E402
+
+
+class TestPipelineMetrics(unittest.TestCase):
+    """Test Suite สำหรับการวัดแต่ละ stage, รูปแบบ output และ budgets"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.metrics = etl_metrics.PipelineMetrics(run_id='test-run')
+        with self.metrics.stage('load') as record:
+            self.block = np.ones(8 * 1024 ** 2)  # 64 MB, still held when the stage ends
+            record['rows_out'] = len(self.block)
+        with self.metrics.stage('transform', rows_in=100) as record:
+            time.sleep(0.05)
+            record['rows_out'] = 90
+
+    def tearDown(self):
+        del self.block
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_stage_records(self):
+        """ทดสอบ wall time, CPU time, peak RSS delta และจำนวนแถวของแต่ละ stage"""
+        load, transform = self.metrics.stages
+        self.assertEqual(load['rows_out'], 8 * 1024 ** 2)
+        self.assertGreater(load['peak_rss_delta_mb'], 32)
+        self.assertGreaterEqual(transform['wall_seconds'], 0.05)
+        self.assertLess(transform['cpu_seconds'], transform['wall_seconds'])
+        self.assertEqual((transform['rows_in'], transform['rows_out']), (100, 90))
+
+        with self.assertRaises(ValueError):
+            with self.metrics.stage('db_load'):
+                raise ValueError('connection lost')
+        self.assertEqual(self.metrics.stages[-1]['status'], 'failed')
+        print("✅ Stage records")
+
+    def test_outputs(self):
+        """ทดสอบ JSON lines (ต่อท้ายทุก run) และ Prometheus text format"""
+        json_path = os.path.join(self.tmp_dir, 'metrics', 'stages.jsonl')
+        self.metrics.write_json_lines(json_path)
+        self.metrics.write_json_lines(json_path)
+        with open(json_path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['stage'] for record in records], ['load', 'transform'] * 2)
+        self.assertEqual(records[0]['run_id'], 'test-run')
+
+        text = self.metrics.to_prometheus()
+        self.assertIn('# TYPE etl_stage_wall_seconds gauge', text)
+        self.assertIn('etl_stage_rows_out{pipeline="loans_etl",stage="transform"} 90', text)
+        self.assertIn('etl_run_success{pipeline="loans_etl"} 1', text)
+        # rows_in of load is unknown, so no sample is emitted for it
+        self.assertNotIn('etl_stage_rows_in{pipeline="loans_etl",stage="load"}', text)
+        print("✅ JSON lines and Prometheus output")
+
+    def test_budgets(self):
+        """ทดสอบว่า budgets ที่เกินทำให้ publish() ล้มหลังเขียน metrics แล้ว"""
+        self.assertEqual(self.metrics.check_budgets(max_total_seconds=300, max_rss_mb=1024 ** 2), [])
+        violations = self.metrics.check_budgets(stage_seconds={'transform': 0.01})
+        self.assertEqual(len(violations), 1)
+        self.assertIn('stage transform', violations[0])
+
+        prometheus_path = os.path.join(self.tmp_dir, 'etl.prom')
+        config = {'etl': {'validation': {'max_processing_time': 300},
+                          'metrics': {'json_path': '', 'prometheus_path': prometheus_path,
+                                      'budgets': {'max_rss_mb': 1}}}}
+        with self.assertRaises(etl_metrics.BudgetExceeded) as context:
+            etl_metrics.publish(self.metrics, config)
+        self.assertIn('peak RSS', str(context.exception))
+        self.assertTrue(os.path.exists(prometheus_path))
+        print("✅ Budgets enforced")
+
+
+if __name__ == '__main__':
+    unittest.main()
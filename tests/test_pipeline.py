@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ staged pipeline API (etl_pipeline.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, inspect
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_metrics  # noqa: E402
+import etl_pipeline  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+
+class TestPipeline(unittest.TestCase):
+    """Test Suite สำหรับ lazy evaluation, cache ของ output และการเปลี่ยน node"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        write_loans_csv(self.csv_file)
+        self.config = {
+            'data_sources': {'primary': {'file_path': self.csv_file}},
+            'etl': {'profiling': {'output_path': os.path.join(self.tmp_dir, 'profile.json')},
+                    'data_quality': {'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')}},
+        }
+        self.metrics = etl_metrics.PipelineMetrics()
+        self.pipeline = etl_pipeline.Pipeline(self.config, metrics=self.metrics)
+
+    def tearDown(self):
+        if self.pipeline.engine is not None:
+            self.pipeline.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_only_requested_nodes_run(self):
+        """ทดสอบว่าการขอ dimension ไม่ build fact table และไม่โหลดเข้า database"""
+        issue_d_dim = self.pipeline['dimensions']['issue_d_dim']
+        self.assertGreater(len(issue_d_dim), 0)
+        self.assertTrue(self.pipeline.computed('validate'))
+        self.assertFalse(self.pipeline.computed('fact'))
+        self.assertFalse(self.pipeline.computed('load'))
+        self.assertIsNone(self.pipeline.engine)
+        self.assertEqual([record['stage'] for record in self.metrics.stages],
+                         ['sources', 'type_inference', 'extract', 'profile', 'filter', 'transform', 'validate',
+                          'dtype_plan', 'dimensions'])
+        print("✅ Lazy evaluation")
+
+    def test_outputs_cached(self):
+        """ทดสอบว่า output ถูกคำนวณครั้งเดียวและ transform ไม่แก้ output ของ filter ที่ cache ไว้"""
+        fact = self.pipeline.get('fact')
+        self.assertIs(self.pipeline.get('fact'), fact)
+        self.assertEqual(sum(record['stage'] == 'extract' for record in self.metrics.stages), 1)
+        self.assertEqual(self.pipeline.get('filter')['int_rate'].dtype.kind, 'O')
+        self.assertEqual(self.pipeline.get('transform')['int_rate'].dtype.kind, 'f')
+        self.assertNotIn('data_quality_score', self.pipeline.get('transform').columns)
+        print("✅ Cached outputs")
+
+    def test_replace_node_invalidates_downstream(self):
+        """ทดสอบการเปลี่ยน node: output ที่สร้างจาก node นั้นถูกคำนวณใหม่ ส่วน upstream ใช้ของเดิม"""
+        raw_df = self.pipeline.get('extract')
+        self.pipeline.get('fact')
+
+        self.pipeline.add_node(etl_pipeline.Node(
+            'filter', lambda pipeline, raw, profile: raw[raw['home_ownership'] == 'RENT'].dropna(
+                subset=['issue_d', 'int_rate', 'loan_amnt']), ['extract', 'profile']))
+        self.assertFalse(self.pipeline.computed('fact'))
+        self.assertIs(self.pipeline.get('extract'), raw_df)
+        self.assertEqual(len(self.pipeline.get('dimensions')['home_ownership_dim']), 1)
+        print("✅ Replaced node recomputes downstream outputs only")
+
+    def test_load(self):
+        """ทดสอบ run() จนถึง load ด้วย engine ที่ส่งเข้ามา"""
+        self.pipeline.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}")
+        outputs = self.pipeline.run()
+        tables = set(inspect(self.pipeline.engine).get_table_names())
+        self.assertTrue({'loans_fact', 'issue_d_dim'} <= tables)
+        self.assertEqual(self.metrics.stages[-1]['rows_out'],
+                         sum(entry['rows'] for entry in outputs['load']['tables']))
+        print("✅ Pipeline run through load")
+
+
+if __name__ == '__main__':
+    unittest.main()
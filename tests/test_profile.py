@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ column profiler (etl_profile.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_main  # noqa: E402
+import etl_profile  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+
+class TestColumnProfile(unittest.TestCase):
+    """Test Suite สำหรับ HyperLogLog, histogram และการ merge profile ข้าม chunk"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        self.frame = write_loans_csv(self.csv_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_distinct_estimate(self):
+        """ทดสอบว่า HyperLogLog ประมาณจำนวนค่าไม่ซ้ำได้ใกล้เคียงค่าจริง"""
+        for distinct in (100, 50000):
+            sketch = etl_profile.HyperLogLog()
+            sketch.update(pd.Series(np.arange(distinct * 2) % distinct, dtype='int64'))
+            self.assertLess(abs(sketch.estimate() - distinct) / distinct, 0.05)
+
+        sketch = etl_profile.HyperLogLog()
+        sketch.update(pd.Series([f'member-{i}' for i in range(20000)]))
+        self.assertLess(abs(sketch.estimate() - 20000) / 20000, 0.05)
+        print("✅ HyperLogLog distinct estimate")
+
+    def test_chunks_merge_to_full_profile(self):
+        """ทดสอบว่า profile ที่สร้างทีละ chunk เท่ากับ profile ของทั้ง DataFrame"""
+        full = etl_profile.profile_frame(self.frame).to_dict()
+        chunked = etl_profile.profile_frame(self.frame, chunk_size=333).to_dict()
+        merged = etl_profile.profile_frame(self.frame.iloc[:1000])
+        merged.merge(etl_profile.profile_frame(self.frame.iloc[1000:]))
+        merged = merged.to_dict()
+
+        for other in (chunked, merged):
+            self.assertEqual(other['rows'], full['rows'])
+            for column, stats in full['columns'].items():
+                for key in ('count', 'nulls', 'min', 'max', 'histogram', 'hll', 'numeric'):
+                    self.assertEqual(other['columns'][column][key], stats[key], f'{column}.{key}')
+        print("✅ Chunked profile matches full profile")
+
+    def test_filters_from_profile(self):
+        """ทดสอบว่า Step 3/4 จาก profile เลือกคอลัมน์เหมือนการนับ null จาก DataFrame"""
+        raw_df = pd.read_csv(self.csv_file, low_memory=False)
+        profile = etl_profile.profile_csv(self.csv_file, chunk_size=500)
+        pd.testing.assert_series_equal(profile.null_counts().sort_index(), raw_df.isnull().sum().sort_index(),
+                                       check_names=False)
+
+        expected = etl_main.filter_columns_by_missing(raw_df.isnull().sum(), len(raw_df), 30)
+        kept = etl_main.filter_columns_by_missing(profile.null_counts(), profile.rows, 30)
+        self.assertEqual(sorted(kept), sorted(expected))
+        print("✅ Missing-data filters from profile")
+
+    def test_saved_profile_reused(self):
+        """ทดสอบการบันทึก JSON และการใช้ซ้ำเมื่อไฟล์ต้นทางไม่เปลี่ยน"""
+        profile_path = os.path.join(self.tmp_dir, 'reports', 'profile.json')
+        profile, reused = etl_profile.load_or_build_profile(self.csv_file, profile_path)
+        self.assertFalse(reused)
+        self.assertTrue(os.path.exists(profile_path))
+
+        loaded, reused = etl_profile.load_or_build_profile(self.csv_file, profile_path)
+        self.assertTrue(reused)
+        self.assertEqual(loaded.to_dict()['columns'], profile.to_dict()['columns'])
+        pd.testing.assert_series_equal(loaded.null_counts(), profile.null_counts())
+
+        # A changed source invalidates the saved profile
+        self.frame.iloc[:100].to_csv(self.csv_file, index=False)
+        self.assertIsNone(etl_profile.load_saved_profile(self.csv_file, profile_path))
+        rebuilt, reused = etl_profile.load_or_build_profile(self.csv_file, profile_path)
+        self.assertFalse(reused)
+        self.assertEqual(rebuilt.rows, 100)
+        print("✅ Saved profile reused until the source changes")
+
+
+if __name__ == '__main__':
+    unittest.main()
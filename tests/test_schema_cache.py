@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ schema cache ของ type inference (etl_schema_cache.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_main  # noqa: E402
+import etl_schema_cache  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+
+def no_inference():
+    raise AssertionError('inference should have been skipped')
+
+
+class TestSchemaCache(unittest.TestCase):
+    """Test Suite สำหรับ cache hit, revalidation และ miss"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        self.frame = write_loans_csv(self.csv_file)
+        self.cache_path = os.path.join(self.tmp_dir, 'cache', 'schema_types.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def sample(self):
+        return etl_main.sample_column_types(self.csv_file, sample_size=500, method='head')
+
+    def test_unchanged_file_hits(self):
+        """ทดสอบว่าไฟล์เดิมได้ column types จาก cache โดยไม่ infer ใหม่ แม้ข้าม process"""
+        cache = etl_schema_cache.SchemaCache(self.cache_path)
+        first = cache.column_types(self.csv_file, self.sample)
+        self.assertEqual(cache.last_status, etl_schema_cache.MISS)
+
+        cache = etl_schema_cache.SchemaCache(self.cache_path)
+        second = cache.column_types(self.csv_file, no_inference)
+        self.assertEqual(cache.last_status, etl_schema_cache.HIT)
+        self.assertEqual(second, first)
+        self.assertEqual(cache.stats()['total'], {'hit': 1, 'revalidated': 0, 'miss': 1})
+
+        # Other inference settings are another entry
+        cache.column_types(self.csv_file, self.sample, settings={'sample_size': 500})
+        self.assertEqual(cache.misses, 1)
+        print("✅ Unchanged layout served from the cache")
+
+    def test_changed_content_reinfers_only_contradicted_columns(self):
+        """ทดสอบว่าเนื้อหาที่เปลี่ยน infer ใหม่เฉพาะคอลัมน์ที่ค่าไม่ตรงกับ type เดิม"""
+        cache = etl_schema_cache.SchemaCache(self.cache_path)
+        _, column_types, _ = cache.column_types(self.csv_file, self.sample)
+        self.assertEqual(column_types['loan_amnt'], 'integer')
+
+        frame = pd.concat([self.frame, self.frame.head(100).assign(loan_amnt='unknown')], ignore_index=True)
+        frame.to_csv(self.csv_file, index=False)
+        result, revalidated, report = cache.column_types(self.csv_file, no_inference)
+        self.assertTrue(result)
+        self.assertEqual(cache.last_status, etl_schema_cache.REVALIDATED)
+        self.assertEqual(cache.last_reinferred, ['loan_amnt'])
+        self.assertEqual(revalidated['loan_amnt'], 'string')
+        self.assertEqual({column: label for column, label in revalidated.items() if column != 'loan_amnt'},
+                         {column: label for column, label in column_types.items() if column != 'loan_amnt'})
+        self.assertLess(report['loan_amnt']['confidence'], 1.0)
+
+        # The revalidated types are stored for the new content
+        cache.column_types(self.csv_file, no_inference)
+        self.assertEqual(cache.last_status, etl_schema_cache.HIT)
+        print("✅ Only contradicted columns re-inferred")
+
+    def test_new_header_misses(self):
+        """ทดสอบว่า header ที่เปลี่ยนต้อง infer ใหม่ และ guess_column_types ให้ผลเหมือนไม่ใช้ cache"""
+        cache = etl_schema_cache.SchemaCache(self.cache_path)
+        self.assertEqual(etl_main.guess_column_types(self.csv_file, cache=cache),
+                         etl_main.guess_column_types(self.csv_file))
+        self.frame.rename(columns={'term': 'loan_term'}).to_csv(self.csv_file, index=False)
+        result, column_types = etl_main.guess_column_types(self.csv_file, cache=cache)
+        self.assertTrue(result)
+        self.assertIn('loan_term', column_types)
+        self.assertEqual(cache.misses, 2)
+        print("✅ New header inferred again")
+
+
+if __name__ == '__main__':
+    unittest.main()
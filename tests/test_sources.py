@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ parallel source reader (etl_sources.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_sources  # noqa: E402
+from test_streaming import write_loans_csv  # noqa: E402
+
+
+class TestSourceReader(unittest.TestCase):
+    """Test Suite สำหรับการแบ่งไฟล์และ parse แบบขนาน"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'LoanStats_2015.csv')
+        write_loans_csv(self.csv_file, rows=2000)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_byte_ranges_align_on_lines(self):
+        """ทดสอบว่าทุกช่วงเริ่มต้นที่ต้นบรรทัดและครอบคลุมทั้งไฟล์"""
+        _, body_start = etl_sources.read_header(self.csv_file)
+        ranges = etl_sources.split_byte_ranges(self.csv_file, 7, body_start)
+        self.assertEqual(len(ranges), 7)
+        self.assertEqual(ranges[0][0], body_start)
+        self.assertEqual(ranges[-1][1], os.path.getsize(self.csv_file))
+
+        with open(self.csv_file, 'rb') as f:
+            data = f.read()
+        for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, next_start)
+            self.assertEqual(data[start - 1:start], b'\n')
+        print("✅ Byte ranges aligned on line boundaries")
+
+    def test_split_file_matches_single_parse(self):
+        """ทดสอบว่าการ parse แบบแบ่งช่วงในหลาย process ให้ผลเหมือน pd.read_csv"""
+        expected = pd.read_csv(self.csv_file, low_memory=False)
+        spec = {'dtype': {'home_ownership': 'category'}, 'parse_dates': ['issue_d']}
+        df = etl_sources.read_sources(self.csv_file, spec, workers=2, split_bytes=20000)
+
+        self.assertEqual(len(etl_sources.plan_tasks([self.csv_file], split_bytes=20000)),
+                         -(-os.path.getsize(self.csv_file) // 20000))
+        self.assertIsInstance(df['home_ownership'].dtype, pd.CategoricalDtype)
+        pd.testing.assert_series_equal(df['home_ownership'].astype(str), expected['home_ownership'].astype(str))
+        pd.testing.assert_frame_equal(df.drop(columns=['home_ownership', 'issue_d']),
+                                      expected.drop(columns=['home_ownership', 'issue_d']))
+        print("✅ Split parse matches single parse")
+
+    def test_glob_of_files_in_order(self):
+        """ทดสอบการอ่านหลายไฟล์จาก glob ตามลำดับชื่อไฟล์"""
+        second = os.path.join(self.tmp_dir, 'LoanStats_2016.csv')
+        write_loans_csv(second, rows=500, seed=9)
+        pattern = os.path.join(self.tmp_dir, 'LoanStats_*.csv')
+
+        self.assertEqual(etl_sources.resolve_sources(pattern), [self.csv_file, second])
+        df = etl_sources.read_sources(pattern, workers=2, split_bytes=None)
+        expected = pd.concat([pd.read_csv(self.csv_file), pd.read_csv(second)], ignore_index=True)
+        pd.testing.assert_frame_equal(df, expected)
+
+        frames = list(etl_sources.iter_source_frames(etl_sources.plan_tasks([self.csv_file, second]), {}, 2))
+        self.assertEqual([len(frame) for frame in frames], [2000, 500])
+        print("✅ Multi-file glob read in order")
+
+    def test_header_mismatch_and_missing_files(self):
+        """ทดสอบ error เมื่อ header ไม่ตรงกันหรือไม่พบไฟล์"""
+        other = os.path.join(self.tmp_dir, 'other.csv')
+        pd.DataFrame({'a': [1]}).to_csv(other, index=False)
+        with self.assertRaises(ValueError):
+            etl_sources.read_sources([self.csv_file, other])
+        with self.assertRaises(FileNotFoundError):
+            etl_sources.resolve_sources(os.path.join(self.tmp_dir, 'missing_*.csv'))
+        print("✅ Header mismatch and missing files rejected")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ chunked streaming ETL (etl_streaming.py)
+เปรียบเทียบผลลัพธ์กับ batch pipeline บนข้อมูลสังเคราะห์และ SQLite
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_loader  # noqa: E402
+import etl_main  # noqa: E402
+import etl_streaming  # noqa: E402
+import etl_validation  # noqa: E402
+
+
+def write_loans_csv(path, rows=3000, seed=3):
+    rng = np.random.default_rng(seed)
+    loan_amnt = rng.integers(10, 400, rows) * 100
+    frame = pd.DataFrame({
+        'loan_amnt': loan_amnt,
+        'funded_amnt': loan_amnt,
+        'term': rng.choice([' 36 months', ' 60 months'], rows),
+        'int_rate': [f'{rate:.2f}%' for rate in rng.uniform(5, 25, rows)],
+        'installment': np.round(loan_amnt / 36 * 1.1, 2),
+        'home_ownership': rng.choice(['RENT', 'OWN', 'MORTGAGE'], rows),
+        'loan_status': rng.choice(['Fully Paid', 'Current', 'Charged Off'], rows),
+        'issue_d': rng.choice(['Jan-2015', 'Feb-2015', 'Mar-2015', 'Dec-2016'], rows),
+        'application_type': 'Individual',
+        'emp_title': np.where(rng.random(rows) < 0.005, None, 'Teacher'),
+        'mostly_empty': np.where(rng.random(rows) < 0.9, np.nan, 1.0),
+    })
+    frame.to_csv(path, index=False)
+    return frame
+
+
+class TestStreamingETL(unittest.TestCase):
+    """Test Suite สำหรับ streaming mode"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        write_loans_csv(self.csv_file)
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}")
+        self.config = {'etl': {'processing': {'chunk_size': 700, 'memory_limit_mb': 4096},
+                               'data_quality': {'max_missing_percentage': 30, 'acceptable_max_null': 26,
+                                                'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')},
+                               'profiling': {'output_path': os.path.join(self.tmp_dir, 'profile.json')}},
+                       'business_rules': {'loan_amount': {'min_value': 1000, 'max_value': 100000}}}
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def batch_result(self):
+        raw_df = pd.read_csv(self.csv_file, low_memory=False)
+        null_counts = raw_df.isnull().sum()
+        keep = etl_main.filter_columns_by_missing(null_counts, len(raw_df), 30)
+        selected = etl_main.select_columns_by_null_count(null_counts[keep], 26)
+        prepared = raw_df[selected].dropna()
+        etl_main.transform_data(prepared)
+        prepared, _, _ = etl_validation.validate(prepared, self.config['business_rules'])
+        dimensions = etl_main.build_dimension_tables(prepared)
+        return dimensions, etl_main.build_fact_table(prepared, dimensions)
+
+    def test_streaming_matches_batch(self):
+        """ทดสอบว่า streaming ให้ star schema เหมือน batch"""
+        summary = etl_streaming.run_streaming_etl(self.csv_file, self.engine, self.config)
+        dimensions, loans_fact = self.batch_result()
+
+        self.assertGreater(summary['chunks'], 1)
+        self.assertNotIn('mostly_empty', summary['selected_columns'])
+        self.assertEqual(summary['clean_rows'], len(loans_fact))
+
+        loaded_fact = pd.read_sql('SELECT * FROM loans_fact', self.engine)
+        self.assertEqual(list(loaded_fact.columns), list(loans_fact.columns))
+        pd.testing.assert_series_equal(loaded_fact['home_ownership_id'],
+                                       loans_fact['home_ownership_id'].reset_index(drop=True),
+                                       check_dtype=False)
+        pd.testing.assert_series_equal(loaded_fact['issue_d_id'],
+                                       loans_fact['issue_d_id'].reset_index(drop=True),
+                                       check_dtype=False)
+
+        for name, dim in dimensions.items():
+            loaded_dim = pd.read_sql(f'SELECT * FROM {name}', self.engine)
+            self.assertEqual(len(loaded_dim), len(dim), name)
+            self.assertEqual(list(loaded_dim[f"{name[:-4]}_id"]), list(dim[f"{name[:-4]}_id"]))
+
+    def test_typed_streaming(self):
+        """ทดสอบ streaming ด้วย dtype spec จาก type inference"""
+        _, column_types, report = etl_main.sample_column_types(self.csv_file, sample_size=200, method='head')
+        summary = etl_streaming.run_streaming_etl(self.csv_file, self.engine, self.config, column_types, report)
+        _, loans_fact = self.batch_result()
+        self.assertEqual(summary['clean_rows'], len(loans_fact))
+
+    def test_chunk_size_adapts_to_memory_limit(self):
+        """ทดสอบว่าขนาด chunk ถูกลดลงเมื่อ headroom ของ memory เหลือน้อย"""
+        rss = etl_streaming.current_rss_mb()
+        # Leave room for the chunk itself: Arrow-backed strings copy the values into one buffer
+        sizer = etl_streaming.ChunkSizer(chunk_size=100000, memory_limit_mb=rss + 64)
+        chunk = pd.DataFrame({'text': ['x' * 20000] * 1000})
+        sizer.observe(chunk)
+        self.assertLess(sizer.rows, 1000)
+        self.assertGreaterEqual(sizer.rows, etl_streaming.MIN_CHUNK_ROWS)
+
+    def test_memory_limit_enforced(self):
+        """ทดสอบว่า RSS เกิน memory_limit_mb แล้วหยุดทำงาน"""
+        self.config['etl']['processing']['memory_limit_mb'] = 1
+        with self.assertRaises(MemoryError):
+            etl_streaming.run_streaming_etl(self.csv_file, self.engine, self.config)
+
+    def test_no_clean_rows_keeps_star_schema(self):
+        """ทดสอบว่าเมื่อทุกแถวถูก quarantine จะ error โดยไม่แทนที่ dimension ข้าง loans_fact เดิม"""
+        etl_streaming.run_streaming_etl(self.csv_file, self.engine, self.config)
+        before = {table: pd.read_sql(f'SELECT * FROM {table}', self.engine)
+                  for table in ('loans_fact', 'home_ownership_dim', 'issue_d_dim')}
+        frame = write_loans_csv(self.csv_file, seed=5)
+        frame.assign(funded_amnt=frame['loan_amnt'] * 2).to_csv(self.csv_file, index=False)
+
+        for pipelined in (False, True):
+            with self.subTest(pipelined=pipelined):
+                self.config['etl']['processing']['pipelined'] = pipelined
+                with self.assertRaisesRegex(ValueError, 'not replaced'):
+                    etl_streaming.run_streaming_etl(self.csv_file, self.engine, self.config)
+                for table, rows in before.items():
+                    pd.testing.assert_frame_equal(pd.read_sql(f'SELECT * FROM {table}', self.engine), rows)
+
+
+
+class TestPipelinedLoad(unittest.TestCase):
+    """Test Suite สำหรับ producer/consumer pass 2 (etl.processing.pipelined)"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}")
+        self.chunks = [pd.DataFrame({'loan_amnt': np.arange(start, start + 500) * 10.0})
+                       for start in range(0, 5000, 500)]
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_pipelined_matches_sequential(self):
+        """ทดสอบว่า pipelined streaming โหลด fact table เหมือน streaming แบบลำดับ"""
+        csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        write_loans_csv(csv_file)
+        config = {'etl': {'processing': {'chunk_size': 700, 'memory_limit_mb': 4096},
+                          'profiling': {'output_path': ''},
+                          'data_quality': {'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')}}}
+        sequential = etl_streaming.run_streaming_etl(csv_file, self.engine, config)
+        expected = pd.read_sql('SELECT * FROM loans_fact', self.engine)
+
+        config['etl']['processing'].update(pipelined=True, queue_chunks=2)
+        summary = etl_streaming.run_streaming_etl(csv_file, self.engine, config)
+        self.assertEqual(summary['clean_rows'], sequential['clean_rows'])
+        self.assertEqual(summary['chunks'], sequential['chunks'])
+        self.assertIsNone(sequential['pipelined'])
+        # A single loader appends the chunks in order
+        pd.testing.assert_frame_equal(pd.read_sql('SELECT * FROM loans_fact', self.engine), expected)
+        stages = [stage['stage'] for stage in summary['pipelined']['stages']]
+        self.assertEqual(stages, ['read', 'prepare', 'load-1'])
+        for stage in summary['pipelined']['stages']:
+            self.assertGreaterEqual(stage['utilization'], 0.0)
+            self.assertLessEqual(stage['utilization'], 1.0)
+        print("✅ Pipelined load matches the sequential one")
+
+    def test_backpressure_on_slow_loader(self):
+        """ทดสอบว่า producer รอเมื่อ queue เต็ม bytes ที่ค้างไม่เกิน budget และ bottleneck คือ load"""
+        insert_rows = etl_loader.insert_rows
+
+        def slow_insert_rows(*args, **kwargs):
+            time.sleep(0.02)
+            return insert_rows(*args, **kwargs)
+
+        chunk_bytes = int(self.chunks[0].memory_usage(deep=True).sum())
+        with mock.patch.object(etl_loader, 'insert_rows', slow_insert_rows):
+            result = etl_streaming.run_pipelined_load(self.chunks, lambda chunk: chunk, self.engine,
+                                                      max_queue_bytes=chunk_bytes * 2)
+        self.assertEqual(result['rows'], 5000)
+        self.assertLessEqual(result['queue_peak_bytes'], chunk_bytes * 2)
+        self.assertEqual(result['bottleneck'], 'load')
+        prepare = result['stages'][1]
+        self.assertGreater(prepare['wait_seconds'], 0.05)
+        self.assertEqual(pd.read_sql('SELECT COUNT(*) AS n FROM loans_fact', self.engine)['n'][0], 5000)
+        print("✅ Backpressure holds the producer behind a slow loader")
+
+    def test_loader_failure_stops_producer(self):
+        """ทดสอบว่า loader ที่ล้มหยุด producer และส่ง exception กลับมา"""
+        prepared = []
+
+        def prepare(chunk):
+            prepared.append(len(chunk))
+            return chunk
+
+        with mock.patch.object(etl_loader, 'insert_rows', side_effect=ConnectionError('connection reset')):
+            with self.assertRaises(ConnectionError):
+                etl_streaming.run_pipelined_load(self.chunks, prepare, self.engine, queue_chunks=1)
+        self.assertLess(len(prepared), len(self.chunks))
+        print("✅ A failed loader stops the pipeline")
+
+
+if __name__ == "__main__":
+    unittest.main()
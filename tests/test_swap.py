@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ shadow-table load และ atomic swap (etl_swap.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, inspect, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_loader  # noqa: E402
+import etl_pipeline  # noqa: E402
+import etl_swap  # noqa: E402
+from tests.test_streaming import write_loans_csv  # noqa: E402
+
+SCHEMA_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql',
+                          'create_star_schema.sql')
+
+MONTHLY_VIEW = """
+CREATE VIEW vw_monthly_loans AS
+SELECT h.home_ownership, COUNT(*) AS loan_count, SUM(f.loan_amnt) AS total_volume
+FROM loans_fact f JOIN home_ownership_dim h ON f.home_ownership_id = h.home_ownership_id
+GROUP BY h.home_ownership
+"""
+
+
+class TestSwapLoad(unittest.TestCase):
+    """Test Suite สำหรับการโหลดเข้า shadow tables โดย views ยังอ่านข้อมูลชุดเดิมได้"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'loans.csv')
+        write_loans_csv(self.csv_file)
+        self.config = {
+            'data_sources': {'primary': {'file_path': self.csv_file}},
+            'etl': {'profiling': {'output_path': ''},
+                    'staging_cache': {'enabled': False},
+                    'surrogate_keys': {},
+                    'loading': {'mode': 'swap', 'schema_sql': SCHEMA_SQL, 'batch_size': 500,
+                                'parallel_workers': 1},
+                    'data_quality': {'quarantine_path': os.path.join(self.tmp_dir, 'rejects.csv')}},
+        }
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'warehouse.db')}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def run_pipeline(self):
+        return etl_pipeline.Pipeline(self.config, engine=self.engine).run()['load']
+
+    def count(self, sql):
+        with self.engine.connect() as connection:
+            return connection.execute(text(sql)).scalar()
+
+    def test_parse_index_definitions(self):
+        """ทดสอบการอ่าน INDEX ของแต่ละตารางจาก create_star_schema.sql"""
+        definitions = etl_swap.parse_index_definitions(SCHEMA_SQL)
+        self.assertEqual(set(definitions), {'home_ownership_dim', 'loan_status_dim', 'issue_d_dim', 'loans_fact'})
+        self.assertIn(('IX_loans_fact_composite_date_amount', ['issue_d_id', 'loan_amnt']), definitions['loans_fact'])
+        print("✅ Index definitions parsed")
+
+    def test_swap_keeps_views_available(self):
+        """ทดสอบว่า view อ่านข้อมูลชุดเดิมระหว่างโหลด และชุดใหม่หลัง swap"""
+        result = self.run_pipeline()
+        self.assertEqual(result['swap']['tables'], ['home_ownership_dim', 'loan_status_dim', 'issue_d_dim',
+                                                    'loans_fact'])
+        indexes = {index['name'] for index in inspect(self.engine).get_indexes('loans_fact')}
+        self.assertIn('IX_loans_fact_issue_d', indexes)
+        with self.engine.begin() as connection:
+            connection.execute(text(MONTHLY_VIEW))
+        old_rows = self.count('SELECT SUM(loan_count) FROM vw_monthly_loans')
+
+        # While the shadow tables fill up, the view still reads the complete previous load
+        write_loans_csv(self.csv_file, rows=2000, seed=5)
+        seen = []
+        insert_rows = etl_loader.insert_rows
+
+        def observed_insert_rows(*args, **kwargs):
+            seen.append(self.count('SELECT SUM(loan_count) FROM vw_monthly_loans'))
+            return insert_rows(*args, **kwargs)
+
+        with mock.patch.object(etl_loader, 'insert_rows', observed_insert_rows):
+            result = self.run_pipeline()
+        self.assertTrue(seen)
+        self.assertEqual(set(seen), {old_rows})
+
+        new_rows = sum(entry['rows'] for entry in result['tables'] if entry['table'].startswith('loans_fact'))
+        self.assertNotEqual(new_rows, old_rows)
+        self.assertEqual(self.count('SELECT SUM(loan_count) FROM vw_monthly_loans'), new_rows)
+        tables = set(inspect(self.engine).get_table_names())
+        self.assertFalse({name for name in tables if name.endswith((etl_swap.SHADOW_SUFFIX, etl_swap.OLD_SUFFIX))})
+        # The second generation of indexes took the alternate names while the first still existed
+        indexes = {index['name'] for index in inspect(self.engine).get_indexes('loans_fact')}
+        self.assertIn('IX_loans_fact_issue_d' + etl_swap.ALTERNATE_INDEX_SUFFIX, indexes)
+        print("✅ Views read complete data throughout the swap load")
+
+    def test_failed_load_leaves_live_tables(self):
+        """ทดสอบว่า load ที่ล้มระหว่างโหลด shadow ไม่แตะตารางจริง"""
+        self.run_pipeline()
+        live_rows = self.count('SELECT COUNT(*) FROM loans_fact')
+
+        write_loans_csv(self.csv_file, rows=2000, seed=5)
+        with mock.patch.object(etl_loader, 'insert_rows', side_effect=ConnectionError('connection reset')):
+            with self.assertRaises(ConnectionError):
+                self.run_pipeline()
+        self.assertEqual(self.count('SELECT COUNT(*) FROM loans_fact'), live_rows)
+        print("✅ Failed shadow load keeps the live tables")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ transformation engine (etl_transform.py)
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_main  # noqa: E402
+import etl_transform  # noqa: E402
+
+
+class TestTransformEngine(unittest.TestCase):
+    """Test Suite สำหรับการ compile และ apply transformation rules จาก config"""
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'issue_d': ['Dec-2015', 'Jan-2016', 'Dec-2015', None],
+            'int_rate': ['10.50%', ' 7.25%', '10.50%', None],
+            'revol_util': ['45.1%', '80%', None, '0%'],
+        })
+
+    def test_plan_from_config(self):
+        """ทดสอบว่า plan ตาม etl_config.yaml ให้ผลเหมือน transform เดิม"""
+        config = etl_main.load_config()
+        plan = etl_transform.compile_transformations(config.get('transformations'))
+        self.assertEqual([(kind, column) for kind, column, _ in plan], [('date', 'issue_d'), ('percentage', 'int_rate')])
+
+        expected_dates = pd.to_datetime(self.df['issue_d'], format='%b-%Y')
+        expected_rates = self.df['int_rate'].str.rstrip('%').astype('float') / 100.0
+        timings = etl_transform.apply_plan(self.df, plan)
+
+        pd.testing.assert_series_equal(self.df['issue_d'], expected_dates, check_dtype=False)
+        pd.testing.assert_series_equal(self.df['int_rate'], expected_rates)
+        self.assertTrue(all(entry['applied'] for entry in timings))
+        self.assertIn('issue_d', etl_transform.format_rule_timings(timings))
+        print("✅ Config plan matches the hard-coded transforms")
+
+    def test_rules_are_idempotent(self):
+        """ทดสอบว่าคอลัมน์ที่แปลงแล้ว หรือไม่มีใน DataFrame จะถูกข้าม"""
+        plan = etl_transform.compile_transformations({
+            'date_columns': [{'column': 'issue_d', 'format': '%b-%Y'}, {'column': 'missing', 'format': '%Y'}],
+            'percentage_columns': [{'column': 'revol_util'}],
+        })
+        etl_transform.apply_plan(self.df, plan)
+        np.testing.assert_allclose(self.df['revol_util'], [0.451, 0.8, np.nan, 0.0])
+
+        timings = etl_transform.apply_plan(self.df, plan)
+        self.assertFalse(any(entry['applied'] for entry in timings))
+        self.assertEqual(etl_main.transform_data(self.df), ['int_rate'])
+        print("✅ Rules skip converted and missing columns")
+
+    def test_categorical_and_invalid_rules(self):
+        """ทดสอบ category input และ config ที่ไม่ถูกต้อง"""
+        categorical = self.df.astype({'issue_d': 'category', 'int_rate': 'category'})
+        etl_transform.apply_plan(categorical, etl_transform.compile_transformations())
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(categorical['issue_d']))
+        self.assertTrue(pd.isna(categorical['issue_d'].iloc[3]))
+        np.testing.assert_allclose(categorical['int_rate'], [0.105, 0.0725, 0.105, np.nan])
+
+        with self.assertRaises(ValueError):
+            etl_transform.compile_transformations({'currency_columns': [{'column': 'loan_amnt'}]})
+        with self.assertRaises(ValueError):
+            etl_transform.compile_transformations({'date_columns': [{'format': '%Y'}]})
+        print("✅ Category input and invalid rules")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับการเดา data type ของคอลัมน์ (guess_column_types)
+ใช้ไฟล์ CSV ขนาดเล็กที่สร้างขึ้นในแต่ละ test จึงไม่ต้องใช้ข้อมูลจริง
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_main  # noqa: E402
+
+
+class TestColumnTypeInference(unittest.TestCase):
+    """Test Suite สำหรับ vectorized type inference"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'types.csv')
+        pd.DataFrame({
+            'loan_amnt': [1000, 2500, 3000, 1200],
+            'int_rate': ['10.5%', '11.2%', '9.9%', '13.0%'],
+            'installment': [33.5, 80.1, None, 40.0],
+            'issue_date': ['2015-01-01', '2015-02-01', '2015-03-01', '2015-04-01'],
+            'created_at': ['2015-01-01 10:00:00', '2015-02-01 11:30:00',
+                           '2015-03-01 09:15:00', '2015-04-01 23:59:59'],
+            'partial_date': ['2015-01-01', '2015-02-01', None, '2015-04-01'],
+            'late_mismatch': ['2015-01-01', '2015-02-01', '2015-03-01', 'n/a'],
+            'empty': [None, None, None, None],
+        }).to_csv(self.csv_file, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_type_labels(self):
+        """ทดสอบว่า label ที่ได้ตรงกับพฤติกรรมเดิม"""
+        result, column_types = etl_main.guess_column_types(self.csv_file)
+
+        self.assertTrue(result)
+        self.assertEqual(column_types, {
+            'loan_amnt': 'integer',
+            'int_rate': 'string',
+            'installment': 'floating',
+            'issue_date': 'date',
+            'created_at': 'datetime64',
+            'partial_date': 'string',
+            'late_mismatch': 'string',
+            'empty': 'floating',
+        })
+
+    def test_probe_does_not_hide_late_mismatch(self):
+        """ทดสอบว่าค่าที่ผิดรูปแบบหลังช่วง probe ยังถูกตรวจพบ"""
+        values = ['2015-01-01'] * (etl_main.PROBE_SIZE + 10) + ['Dec-2015']
+        self.assertEqual(etl_main.infer_column_type(pd.Series(values, dtype=object)), 'string')
+
+    def test_prefix_match_semantics(self):
+        """ทดสอบว่า pattern ตรวจเฉพาะส่วนต้นของค่าเหมือน re.match"""
+        series = pd.Series(['2015-01-01T10:00:00', '2016-12-31 extra'], dtype=object)
+        self.assertEqual(etl_main.infer_column_type(series), 'date')
+
+    def test_parser_error(self):
+        """ทดสอบว่า parser error ถูกส่งกลับเป็นข้อความ"""
+        bad_file = os.path.join(self.tmp_dir, 'bad.csv')
+        with open(bad_file, 'w') as f:
+            f.write('a,b\n1,2\n3,4,5,6\n')
+
+        result, error = etl_main.guess_column_types(bad_file)
+        self.assertFalse(result)
+        self.assertIsInstance(error, str)
+
+
+class TestSampledTypeInference(unittest.TestCase):
+    """Test Suite สำหรับการเดา data type จาก sample แบบ streaming"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.csv_file = os.path.join(cls.tmp_dir, 'sampled.csv')
+        rows = 20000
+        rng = np.random.default_rng(7)
+        late_date = ['2015-01-01'] * rows
+        late_date[-1] = 'Dec-2015'
+        pd.DataFrame({
+            'loan_amnt': rng.integers(1000, 40000, rows),
+            'installment': rng.random(rows) * 500,
+            'home_ownership': rng.choice(['RENT', 'OWN', 'MORTGAGE'], rows),
+            'issue_date': ['2015-01-01'] * rows,
+            'late_date': late_date,
+        }).to_csv(cls.csv_file, index=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def test_sample_matches_full_inference(self):
+        """ทดสอบว่า sample ให้ผลเหมือนการอ่านทั้งไฟล์เมื่อข้อมูลสม่ำเสมอ"""
+        _, full_types = etl_main.guess_column_types(self.csv_file)
+        result, sampled_types, report = etl_main.sample_column_types(self.csv_file, sample_size=500,
+                                                                     chunk_size=3000)
+        self.assertTrue(result)
+        for column in ['loan_amnt', 'installment', 'home_ownership', 'issue_date']:
+            self.assertEqual(sampled_types[column], full_types[column])
+
+        self.assertEqual(report['loan_amnt']['sampled'], 500)
+        self.assertEqual(report['home_ownership']['distinct'], 3)
+        self.assertGreater(report['loan_amnt']['confidence'], 0.99)
+        self.assertLess(report['loan_amnt']['confidence'], 1.0)
+
+    def test_confirm_pass_demotes_label(self):
+        """ทดสอบว่า full streaming pass แก้ label ที่ sample เดาผิด"""
+        _, sampled_types, _ = etl_main.sample_column_types(self.csv_file, sample_size=200, method='head')
+        self.assertEqual(sampled_types['late_date'], 'date')
+
+        _, confirmed_types, report = etl_main.sample_column_types(self.csv_file, sample_size=200,
+                                                                  method='head', confirm=True)
+        _, full_types = etl_main.guess_column_types(self.csv_file)
+        self.assertEqual(confirmed_types, full_types)
+        self.assertEqual(report['late_date']['confidence'], 1.0)
+
+    def test_small_file_is_complete(self):
+        """ทดสอบว่าไฟล์ที่เล็กกว่า sample ได้ confidence = 1.0"""
+        result, column_types = etl_main.guess_column_types(self.csv_file, sample_size=50000)
+        self.assertTrue(result)
+        self.assertEqual(len(column_types), 5)
+        _, _, report = etl_main.sample_column_types(self.csv_file, sample_size=50000)
+        self.assertTrue(all(stats['confidence'] == 1.0 for stats in report.values()))
+
+
+class TestTypedRead(unittest.TestCase):
+    """Test Suite สำหรับการอ่านไฟล์ครั้งเดียวด้วย dtype ที่เดาได้"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.tmp_dir, 'typed.csv')
+        with open(self.csv_file, 'w') as f:
+            f.write('loan_amnt,installment,home_ownership,last_pymnt_d\n'
+                    '1000,33.5,RENT,2016-01-01\n'
+                    '2500,80.1,OWN,2016-02-01\n'
+                    '3000,12.0,RENT,2016-03-01\n'
+                    ',40.0,MORTGAGE,2016-04-01\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_read_spec(self):
+        """ทดสอบการแปลง column types เป็น dtype/parse_dates/usecols"""
+        column_types = {'loan_amnt': 'integer', 'installment': 'floating',
+                        'home_ownership': 'string', 'last_pymnt_d': 'date'}
+        report = {'loan_amnt': {'confidence': 0.99}}
+
+        spec = etl_main.build_read_spec(column_types, report, columns=['loan_amnt', 'last_pymnt_d'])
+        self.assertEqual(spec['dtype'], {'loan_amnt': 'Int64'})
+        self.assertEqual(spec['parse_dates'], ['last_pymnt_d'])
+        self.assertEqual(spec['usecols'], ['loan_amnt', 'last_pymnt_d'])
+
+        confirmed = etl_main.build_read_spec(column_types)
+        self.assertEqual(confirmed['dtype']['loan_amnt'], 'int64')
+        self.assertNotIn('usecols', confirmed)
+
+    def test_head_sample_typed_read(self):
+        """ทดสอบว่า null ที่อยู่นอก sample ยังอ่านได้ด้วย nullable dtype"""
+        _, column_types, report = etl_main.sample_column_types(self.csv_file, sample_size=2, method='head')
+        df = etl_main.load_typed_csv(self.csv_file, column_types, report)
+
+        self.assertEqual(len(df), 4)
+        self.assertEqual(str(df['loan_amnt'].dtype), 'Int64')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['last_pymnt_d']))
+        self.assertFalse((df.dtypes == object).any())
+
+    def test_fallback_on_wrong_sample(self):
+        """ทดสอบว่าเมื่อ dtype จาก sample ผิดจะอ่านใหม่แบบไม่กำหนด dtype"""
+        df = etl_main.load_typed_csv(self.csv_file, {'home_ownership': 'integer'})
+        self.assertEqual(len(df), 4)
+        self.assertEqual(list(df['home_ownership']), ['RENT', 'OWN', 'RENT', 'MORTGAGE'])
+
+
+
+class TestCategoricalColumns(unittest.TestCase):
+    """Test Suite สำหรับคอลัมน์ cardinality ต่ำที่เก็บเป็น category ตลอด pipeline"""
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        rows = 400
+        self.df = pd.DataFrame({
+            'home_ownership': rng.choice(['RENT', 'OWN', 'MORTGAGE'], rows),
+            'loan_status': rng.choice(['Current', 'Fully Paid'], rows),
+            'int_rate': rng.choice(['10.50%', '7.25%', '12.00%'], rows),
+            'issue_d': rng.choice(['Jan-2015', 'Feb-2015'], rows),
+            'emp_title': [f'title {i}' for i in range(rows)],
+            'loan_amnt': rng.integers(10, 400, rows) * 100,
+        })
+
+    def test_low_cardinality_detection(self):
+        """ทดสอบการเลือกคอลัมน์ category จาก sample report"""
+        column_types = {'home_ownership': 'string', 'emp_title': 'string', 'loan_amnt': 'integer'}
+        report = {'home_ownership': {'non_null': 400, 'distinct': 3},
+                  'emp_title': {'non_null': 400, 'distinct': 400},
+                  'loan_amnt': {'non_null': 400, 'distinct': 3}}
+        categorical = etl_main.low_cardinality_columns(column_types, report)
+        self.assertEqual(categorical, ['home_ownership'])
+
+        spec = etl_main.build_read_spec(column_types, categorical=categorical)
+        self.assertEqual(spec['dtype']['home_ownership'], 'category')
+        self.assertEqual(spec['dtype']['emp_title'], 'str')
+
+    def test_star_schema_from_categories(self):
+        """ทดสอบว่า dimension จาก category column ได้ id ตามลำดับที่พบครั้งแรก เหมือน object column"""
+        categorical = self.df.astype({column: 'category' for column in
+                                      ['home_ownership', 'loan_status', 'int_rate', 'issue_d']})
+        usage = etl_main.categorical_memory_report(categorical)
+        self.assertGreater(usage['home_ownership']['saved_bytes'], 0)
+        self.assertNotIn('emp_title', usage)
+
+        plain = self.df.copy()
+        etl_main.transform_data(categorical)
+        etl_main.transform_data(plain)
+        np.testing.assert_allclose(categorical['int_rate'], plain['int_rate'])
+
+        # Drop a member so the unused category must not reach the dimension
+        categorical = categorical[categorical['home_ownership'] != 'OWN']
+        plain = plain[plain['home_ownership'] != 'OWN']
+        dimensions = etl_main.build_dimension_tables(categorical)
+        self.assertNotIn('OWN', list(dimensions['home_ownership_dim']['home_ownership']))
+        plain_dimensions = etl_main.build_dimension_tables(plain)
+        for name in ('home_ownership_dim', 'loan_status_dim'):
+            self.assertEqual(dimensions[name].astype(str).values.tolist(),
+                             plain_dimensions[name].astype(str).values.tolist(), name)
+
+        loans_fact = etl_main.build_fact_table(categorical, dimensions)
+        home_dim = dimensions['home_ownership_dim'].set_index('home_ownership_id')['home_ownership']
+        self.assertEqual(list(home_dim[loans_fact['home_ownership_id']]),
+                         list(categorical['home_ownership'].astype(str)))
+        self.assertEqual(list(loans_fact['loan_status_id']),
+                         list(etl_main.build_fact_table(plain, plain_dimensions)['loan_status_id']))
+
+
+if __name__ == "__main__":
+    unittest.main()
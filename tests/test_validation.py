@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit tests สำหรับ validation stage (etl_validation.py)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl_main  # noqa: E402
+import etl_validation  # noqa: E402
+
+
+class TestValidationStage(unittest.TestCase):
+    """Test Suite สำหรับ business rules, quality score และ quarantine"""
+
+    def setUp(self):
+        self.business_rules = etl_main.load_config().get('business_rules', {})
+        self.df = pd.DataFrame({
+            'loan_amnt': [5000.0, 500.0, 200000.0, 8000.0, -10.0, 6000.0],
+            'funded_amnt': [5000.0, 500.0, 200000.0, 9000.0, 100.0, 6000.0],
+            'int_rate': [0.10, 0.60, 0.005, 0.12, 0.10, 1.50],
+            'installment': [150.0, 20.0, 900.0, 300.0, 5.0, 0.0],
+        })
+
+    def test_scores_and_quarantine(self):
+        """ทดสอบคะแนนคุณภาพ validation_errors และแถวที่ถูก quarantine"""
+        valid, quarantine, summary = etl_validation.validate(self.df, self.business_rules)
+
+        # Rows 3-5 break CHECK constraints (funded > loan, loan <= 0, int_rate > 1 / installment <= 0)
+        self.assertEqual(list(quarantine.index), [3, 4, 5])
+        self.assertIn('CHK_loans_fact_funded_le_loan', quarantine.loc[3, 'rejected_by'])
+        self.assertEqual(quarantine.loc[5, 'rejected_by'],
+                         'CHK_loans_fact_int_rate_valid; CHK_loans_fact_installment_positive')
+
+        self.assertEqual(list(valid.index), [0, 1, 2])
+        self.assertEqual(list(valid['data_quality_score']), [100, 34, 34])
+        self.assertEqual(list(valid['has_data_issues']), [False, True, True])
+        self.assertTrue(pd.isna(valid.loc[0, 'validation_errors']))
+        self.assertEqual(valid.loc[1, 'validation_errors'], 'loan_amnt outside 1000-100000; int_rate outside 0.01-0.5')
+        self.assertEqual(summary['quarantined_rows'], 3)
+        self.assertEqual(summary['rule_failures']['loan_amnt outside 1000-100000'], 2)
+        print("✅ Quality scores and quarantine")
+
+    def test_clean_frame_scored_in_place(self):
+        """ทดสอบว่าเมื่อไม่มีแถวถูก quarantine คอลัมน์คุณภาพถูกเพิ่มใน DataFrame เดิม"""
+        clean = self.df.iloc[:3].copy()
+        valid, quarantine, _ = etl_validation.validate(clean, {})
+        self.assertIs(valid, clean)
+        self.assertTrue(quarantine.empty)
+        self.assertTrue((clean['data_quality_score'] == 100).all())
+
+        loans_fact = etl_main.build_fact_table(clean, {})
+        self.assertEqual(list(loans_fact.columns[-3:]), etl_validation.QUALITY_COLUMNS)
+        print("✅ Clean frame scored in place")
+
+    def test_error_text_truncated_and_quarantine_written(self):
+        """ทดสอบการตัดข้อความที่ยาวเกิน 500 ตัวอักษรและการเขียนไฟล์ quarantine"""
+        names = [f'rule_{i}_' + 'x' * 40 for i in range(20)]
+        bits = np.array([0, (1 << 20) - 1], dtype=np.int64)
+        messages = etl_validation.describe_bits(bits, names)
+        self.assertIsNone(messages[0])
+        self.assertEqual(len(messages[1]), etl_validation.MAX_ERROR_LENGTH)
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            _, quarantine, _ = etl_validation.validate(self.df, self.business_rules)
+            path = os.path.join(tmp_dir, 'quarantine', 'rejects.csv')
+            etl_validation.write_quarantine(quarantine, path)
+            etl_validation.write_quarantine(quarantine, path, append=True)
+            written = pd.read_csv(path)
+            self.assertEqual(len(written), 6)
+            self.assertIn('rejected_by', written.columns)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        print("✅ Error text truncated and quarantine written")
+
+
+if __name__ == '__main__':
+    unittest.main()